@@ -0,0 +1,173 @@
+"""録音サンプルの保存領域モジュール。
+
+最大録音時間ぶんのサンプル配列を最初に一度だけ確保し、録音コールバックは
+そこへブロックを書き込むだけにする。コールバック内でのメモリ確保と、停止時の
+結合コピーをなくすためのもの。
+"""
+
+import numpy as np
+
+
+class SampleBuffer:
+    """事前確保したサンプルバッファ。
+
+    通常モードでは容量に達した時点で書き込みを打ち切る。リングモードでは
+    古いサンプルを上書きし、直近 capacity フレームを保持し続ける。
+
+    リングモードは容量の 2 倍の配列を確保し、各ブロックを 2 か所に書き込む。
+    これにより、折り返し後も直近のサンプルが常に連続した領域に並び、
+    view() がコピーなしで返せる。
+
+    Attributes:
+        capacity: 保持できる最大フレーム数。
+        channels: チャンネル数。
+        ring: リングモードかどうか。
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        channels: int = 1,
+        dtype: str | np.dtype = "int16",
+        ring: bool = False,
+    ):
+        """SampleBufferを初期化する。
+
+        Args:
+            capacity: 保持できる最大フレーム数。
+            channels: チャンネル数。
+            dtype: サンプルの型。
+            ring: リングモードにするかどうか。
+
+        Raises:
+            ValueError: capacity または channels が正でない場合。
+        """
+        if capacity <= 0 or channels <= 0:
+            raise ValueError("capacity and channels must be positive")
+        self.capacity = capacity
+        self.channels = channels
+        self.ring = ring
+        rows = capacity * 2 if ring else capacity
+        self._data = np.zeros((rows, channels), dtype=dtype)
+        self._pos = 0
+        self._frames = 0
+        self._written = 0
+
+    @property
+    def dtype(self) -> np.dtype:
+        """サンプルの型を返す。"""
+        return self._data.dtype
+
+    @property
+    def frames(self) -> int:
+        """保持しているフレーム数を返す。"""
+        return self._frames
+
+    @property
+    def written(self) -> int:
+        """clear() 以降に書き込まれた総フレーム数を返す（上書き分を含む）。"""
+        return self._written
+
+    @property
+    def full(self) -> bool:
+        """通常モードで容量に達したかどうかを返す。リングモードでは常に False。"""
+        return not self.ring and self._frames >= self.capacity
+
+    def clear(self) -> None:
+        """保持しているサンプルを破棄する。配列は再確保しない。"""
+        self._pos = 0
+        self._frames = 0
+        self._written = 0
+
+    def write(self, block: np.ndarray | bytes | memoryview) -> int:
+        """ブロックを書き込む。
+
+        sounddevice の InputStream が渡す ndarray と、RawInputStream が渡す
+        バッファのどちらも受け付ける。バッファはコピーせず ndarray として
+        参照する。
+
+        Args:
+            block: (frames, channels) の配列、またはインターリーブされた
+                サンプル列のバッファ。
+
+        Returns:
+            書き込んだフレーム数。通常モードで容量を超えた分は捨てる。
+        """
+        if not isinstance(block, np.ndarray):
+            block = np.frombuffer(block, dtype=self._data.dtype)
+        block = block.reshape(-1, self.channels)
+        count = len(block)
+        if self.ring:
+            return self._write_ring(block, count)
+
+        count = min(count, self.capacity - self._pos)
+        if count <= 0:
+            return 0
+        self._data[self._pos : self._pos + count] = block[:count]
+        self._pos += count
+        self._frames = self._pos
+        self._written += count
+        return count
+
+    def _write_ring(self, block: np.ndarray, count: int) -> int:
+        """リングモードで書き込む。"""
+        capacity = self.capacity
+        if count > capacity:
+            # 容量を超えるブロックは末尾だけが残る
+            self._written += count - capacity
+            self._pos = (self._pos + count - capacity) % capacity
+            block = block[-capacity:]
+            count = capacity
+        pos = self._pos
+        first = min(count, capacity - pos)
+        # 各サンプルを pos と pos + capacity の 2 か所に置く
+        self._data[pos : pos + first] = block[:first]
+        self._data[pos + capacity : pos + capacity + first] = block[:first]
+        rest = count - first
+        if rest:
+            self._data[:rest] = block[first:]
+            self._data[capacity : capacity + rest] = block[first:]
+        self._pos = (pos + count) % capacity
+        self._frames = min(self._frames + count, capacity)
+        self._written += count
+        return count
+
+    def view_range(self, start: int, end: int) -> np.ndarray:
+        """clear() からの通し番号で範囲を指定してサンプルをコピーせずに返す。
+
+        録音中に別スレッドから、書き込み済みの部分を読むために使う。
+
+        Args:
+            start: 先頭フレームの通し番号。
+            end: 末尾フレームの通し番号（含まない）。written 以下であること。
+
+        Returns:
+            (end - start, channels) の配列。上書き済みの部分は含まない。
+        """
+        start = max(start, self._written - self._frames, 0)
+        if end <= start:
+            return self._data[:0]
+        if not self.ring:
+            return self._data[start:end]
+        # ミラーのおかげで start から capacity 個までは常に連続している
+        offset = start % self.capacity
+        return self._data[offset : offset + end - start]
+
+    def view(self, start: int = 0) -> np.ndarray:
+        """保持しているサンプルをコピーせずに返す。
+
+        返す配列は内部バッファの一部なので、次の write() または clear() 後は
+        内容が変わる。残す場合は呼び出し側でコピーすること。
+
+        Args:
+            start: 先頭から飛ばすフレーム数。
+
+        Returns:
+            古い順に並んだ (frames - start, channels) の配列。
+        """
+        start = min(max(start, 0), self._frames)
+        if not self.ring:
+            return self._data[start : self._frames]
+        # 直近 frames 個は常に [pos + capacity - frames, pos + capacity) に連続して並ぶ
+        end = self._pos + self.capacity
+        return self._data[end - self._frames + start : end]
@@ -0,0 +1,264 @@
+"""Pluggable output backends for keyboard events and the clipboard.
+
+The typing code talks to three small interfaces instead of binding
+Quartz, pynput, and pyperclip directly:
+
+- KeyEventSink: CGEvent-style posting (cgevent.TypingContext on macOS).
+- KeyboardBackend: pynput-style press/release/type (PynputKeyboard).
+- ClipboardBackend: copy/paste of text (NativePasteboard or pyperclip).
+
+TypingContext and pyperclip satisfy these protocols structurally.
+MemoryBackend implements all three in memory and records every event
+with a timestamp, so typing throughput can be measured on any platform.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Protocol
+
+
+class KeyEventSink(Protocol):
+    """Destination for low-level keyboard events."""
+
+    def post_unicode(self, text: str) -> None:
+        """Post one key down/up pair carrying a Unicode string."""
+
+    def post_keycode(self, keycode: int, flags: int = 0) -> None:
+        """Post one key down/up pair for a virtual key code with modifier flags."""
+
+    def post_paste(self, keycode: Optional[int] = None) -> None:
+        """Post the Cmd+V paste chord, with keycode as the "v" key if given."""
+
+
+class KeyboardBackend(Protocol):
+    """pynput-style keyboard.
+
+    Keys are either a single character or the name of a pynput Key
+    member such as "enter", "tab", or "cmd".
+    """
+
+    def press(self, key: str) -> None:
+        """Press a key."""
+
+    def release(self, key: str) -> None:
+        """Release a key."""
+
+    def type(self, text: str) -> None:
+        """Type a string by pressing and releasing each key."""
+
+
+class ClipboardBackend(Protocol):
+    """pyperclip compatible text clipboard.
+
+    Backends may additionally provide change_count() and
+    wait_for_read(timeout) to speed up paste synchronization, and
+    snapshot()/restore(items) to preserve non-text content; see
+    direct_typer.clipboard.
+    """
+
+    def copy(self, text: str) -> None:
+        """Replace the clipboard content with text."""
+
+    def paste(self) -> str:
+        """Return the clipboard content as text."""
+
+
+class PynputKeyboard:
+    """KeyboardBackend on top of a pynput Controller."""
+
+    def __init__(self, controller: Any):
+        """Initialize PynputKeyboard.
+
+        Args:
+            controller: pynput keyboard Controller to send keys through.
+        """
+        self._controller = controller
+        self._keys: dict[str, Any] = {}
+
+    def _resolve(self, key: str) -> Any:
+        """Map a key name to a pynput Key, leaving characters unchanged."""
+        if len(key) == 1:
+            return key
+        resolved = self._keys.get(key)
+        if resolved is None:
+            from pynput.keyboard import Key
+
+            resolved = self._keys[key] = getattr(Key, key)
+        return resolved
+
+    def press(self, key: str) -> None:
+        """Press a key."""
+        self._controller.press(self._resolve(key))
+
+    def release(self, key: str) -> None:
+        """Release a key."""
+        self._controller.release(self._resolve(key))
+
+    def type(self, text: str) -> None:
+        """Type a string by pressing and releasing each key."""
+        self._controller.type(text)
+
+
+@dataclass(frozen=True)
+class RecordedEvent:
+    """One event captured by MemoryBackend.
+
+    Attributes:
+        timestamp: Monotonic time the event was recorded, in seconds.
+        kind: Event kind, e.g. "key_down", "key_up", "copy", "paste".
+        value: Payload: text, key code, or key name.
+        named: Whether value is a key name such as "enter" rather than text.
+        flags: Modifier flags of a key code event.
+    """
+
+    timestamp: float
+    kind: str
+    value: Any = None
+    named: bool = False
+    flags: int = 0
+
+
+class MemoryBackend:
+    """In-memory sink that records every event instead of sending it.
+
+    Implements KeyEventSink, KeyboardBackend, and ClipboardBackend so a
+    single instance can stand in for all outputs of a DirectTyper.
+    Only "key_down" and "key_up" events count as posted keyboard events.
+    """
+
+    KEY_EVENT_KINDS = ("key_down", "key_up")
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        keymap: Optional[dict[str, tuple[int, int]]] = None,
+    ):
+        """Initialize MemoryBackend.
+
+        Args:
+            clock: Clock used to timestamp events.
+            keymap: Character -> (key code, flags) table used to turn
+                posted key codes back into text in typed_text().
+        """
+        self._clock = clock
+        self._keystrokes = {stroke: char for char, stroke in (keymap or {}).items()}
+        self.events: list[RecordedEvent] = []
+        self.clipboard = ""
+        self.clipboard_changes = 0
+        self._held: set[str] = set()
+
+    def _record(self, kind: str, value: Any = None, named: bool = False, flags: int = 0) -> None:
+        """Append an event stamped with the current time."""
+        self.events.append(RecordedEvent(self._clock(), kind, value, named, flags))
+
+    # KeyEventSink
+
+    def post_unicode(self, text: str) -> None:
+        """Record a key down/up pair carrying text."""
+        self._record("key_down", text)
+        self._record("key_up", text)
+
+    def post_keycode(self, keycode: int, flags: int = 0) -> None:
+        """Record a key down/up pair for a key code."""
+        self._record("key_down", keycode, flags=flags)
+        self._record("key_up", keycode, flags=flags)
+
+    def post_paste(self, keycode: Optional[int] = None) -> None:
+        """Record the Cmd+V chord and what it would have pasted."""
+        self._record("key_down", "cmd+v", named=True)
+        self._record("key_up", "cmd+v", named=True)
+        self._record("pasted", self.clipboard)
+
+    # KeyboardBackend
+
+    def press(self, key: str) -> None:
+        """Record a key press. Cmd+V also records what would be pasted."""
+        self._held.add(key)
+        self._record("key_down", key, named=len(key) > 1)
+        if key == "v" and "cmd" in self._held:
+            self._record("pasted", self.clipboard)
+
+    def release(self, key: str) -> None:
+        """Record a key release."""
+        self._held.discard(key)
+        self._record("key_up", key, named=len(key) > 1)
+
+    def type(self, text: str) -> None:
+        """Record a press/release pair for every character."""
+        for char in text:
+            self.press(char)
+            self.release(char)
+
+    # ClipboardBackend
+
+    def copy(self, text: str) -> None:
+        """Store text as the clipboard content."""
+        self.clipboard = text
+        self.clipboard_changes += 1
+        self._record("copy", text)
+
+    def paste(self) -> str:
+        """Return the stored clipboard content."""
+        self._record("paste")
+        return self.clipboard
+
+    def change_count(self) -> int:
+        """Return how many times the clipboard was written."""
+        return self.clipboard_changes
+
+    # Inspection
+
+    @property
+    def key_event_count(self) -> int:
+        """Number of keyboard events recorded."""
+        return sum(1 for event in self.events if event.kind in self.KEY_EVENT_KINDS)
+
+    def events_per_char(self, chars: int) -> float:
+        """Return recorded keyboard events per typed character.
+
+        Args:
+            chars: Number of characters that were typed.
+        """
+        return self.key_event_count / chars if chars else 0.0
+
+    def typed_text(self) -> str:
+        """Reconstruct the text that the recorded events would produce.
+
+        Unicode payloads and single-character keys are taken from key down
+        events, Return/Tab key codes become newline/tab, other key codes
+        are looked up in the keymap, Backspace deletes
+        the last grapheme cluster, and paste chords insert the clipboard
+        content at the time of pasting.
+        """
+        from direct_typer.cgevent import iter_graphemes
+
+        keycodes = {36: "\n", 48: "\t"}
+        named = {"enter": "\n", "tab": "\t"}
+        parts: list[str] = []
+        held: set[str] = set()
+        for event in self.events:
+            if event.kind == "pasted":
+                parts.append(event.value)
+            elif event.kind == "key_up":
+                held.discard(event.value)
+            elif event.kind != "key_down":
+                continue
+            elif event.named and event.value in ("cmd", "ctrl", "alt"):
+                held.add(event.value)
+            elif held & {"cmd", "ctrl", "alt"}:
+                continue  # Shortcut, not text
+            elif event.named and event.value == "backspace":
+                parts = list(iter_graphemes("".join(parts)))[:-1]
+            elif event.named:
+                parts.append(named.get(event.value, ""))
+            elif isinstance(event.value, int):
+                text = self._keystrokes.get((event.value, event.flags))
+                parts.append(text if text is not None else keycodes.get(event.value, ""))
+            else:
+                parts.append(event.value)
+        return "".join(parts)
+
+    def clear(self) -> None:
+        """Forget all recorded events."""
+        self.events.clear()
+        self._held.clear()
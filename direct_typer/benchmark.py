@@ -0,0 +1,366 @@
+"""Typing throughput benchmarks against in-memory backends.
+
+Drives DirectTyper.type with every TypingMethod over several corpora and
+lengths, with all keyboard and clipboard output going to MemoryBackend.
+Runs on any platform, so results can be tracked between releases in CI.
+
+With --targets, CGEvent typing is additionally benchmarked through real
+TypingContexts posting to each EventTarget (macOS only). Those events
+really type into the focused (or target) application.
+
+Usage:
+    python -m direct_typer.benchmark --output bench.json
+    python -m direct_typer.benchmark --targets hid session app:com.apple.TextEdit
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from itertools import cycle, islice
+from typing import Any, Callable, Optional
+
+from direct_typer import __version__
+from direct_typer.backends import MemoryBackend
+from direct_typer.cgevent import EventTarget, get_context, iter_graphemes
+from direct_typer.typer import DirectTyper, TypingMethod
+
+# Sample text per corpus; repeated and cut to each benchmark length
+CORPORA = {
+    "ascii_code": "def add(a, b):\n\treturn a + b  # sum\nprint(add(1, 2))\n",
+    "japanese": "音声入力で日本語の文章を書いています。句読点も正しく入力されることを確認します。",
+    "emoji": "\U0001F44D\U0001F3FD\U0001F468\u200d\U0001F469\u200d\U0001F467\U0001F1EF\U0001F1F5\U0001F600",
+    "mixed": "ReactのuseStateを使って状態管理する。Node.jsで処理するコードを書く\n",
+}
+
+DEFAULT_LENGTHS = (10, 50, 200)
+
+METHODS = (
+    TypingMethod.AUTO,
+    TypingMethod.CGEVENT,
+    TypingMethod.PYNPUT,
+    TypingMethod.CLIPBOARD,
+    TypingMethod.SEGMENTED,
+)
+
+
+@dataclass
+class BenchmarkResult:
+    """Aggregated measurements for one method, corpus, and length.
+
+    Attributes:
+        method: Typing method value.
+        corpus: Corpus name.
+        length: Length of the typed text in characters (grapheme clusters).
+        repeat: Number of timed calls.
+        chars_per_sec: Characters typed per second of total call time.
+        events_per_char: Keyboard events posted per character.
+        latency_p50_ms: Median call latency in milliseconds.
+        latency_p99_ms: 99th percentile call latency in milliseconds.
+        sleep_s: Total time spent sleeping across all calls.
+        active_s: Total time spent working (not sleeping) across all calls.
+    """
+
+    method: str
+    corpus: str
+    length: int
+    repeat: int
+    chars_per_sec: float
+    events_per_char: float
+    latency_p50_ms: float
+    latency_p99_ms: float
+    sleep_s: float
+    active_s: float
+
+
+class SleepMeter:
+    """Sleep function for one DirectTyper that adds up the time slept.
+
+    Passed as DirectTyper's sleep, so only that typer's pacing and
+    clipboard waits are counted, not sleeps on other threads.
+    """
+
+    def __init__(self):
+        """Initialize SleepMeter."""
+        self.total = 0.0
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep and add the time actually slept."""
+        start = time.perf_counter()
+        time.sleep(seconds)
+        self.total += time.perf_counter() - start
+
+
+class ForwardingBackend(MemoryBackend):
+    """MemoryBackend that also forwards keyboard events to another sink.
+
+    Lets real event sinks be measured with the same event accounting as
+    the in-memory benchmarks.
+    """
+
+    def __init__(self, sink: Any):
+        """Initialize ForwardingBackend.
+
+        Args:
+            sink: KeyEventSink that receives every posted event.
+        """
+        super().__init__()
+        self._sink = sink
+
+    def post_unicode(self, text: str) -> None:
+        """Post and record a Unicode key event pair."""
+        self._sink.post_unicode(text)
+        super().post_unicode(text)
+
+    def post_keycode(self, keycode: int, flags: int = 0) -> None:
+        """Post and record a key code event pair."""
+        self._sink.post_keycode(keycode, flags)
+        super().post_keycode(keycode, flags)
+
+    def post_paste(self, keycode: Optional[int] = None) -> None:
+        """Post and record the paste chord."""
+        self._sink.post_paste(keycode)
+        super().post_paste(keycode)
+
+
+def make_text(corpus: str, length: int) -> str:
+    """Build benchmark text of a given length from a corpus.
+
+    The sample is repeated and cut on grapheme cluster boundaries, so
+    emoji sequences are never split.
+
+    Args:
+        corpus: Corpus name in CORPORA.
+        length: Number of grapheme clusters.
+
+    Returns:
+        The benchmark text.
+    """
+    clusters = list(iter_graphemes(CORPORA[corpus]))
+    return "".join(islice(cycle(clusters), length))
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Return the nearest-rank percentile of values."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_case(
+    method: TypingMethod,
+    text: str,
+    repeat: int = 5,
+    delay_ms: float = 5,
+    event_sink: Any = None,
+) -> tuple[list[float], MemoryBackend, float]:
+    """Type text repeatedly with one method.
+
+    Args:
+        method: Typing method to benchmark.
+        text: Text to type.
+        repeat: Number of timed calls.
+        delay_ms: DirectTyper delay_ms setting.
+        event_sink: Real KeyEventSink to post CGEvents to. If None,
+            everything stays in memory.
+
+    Returns:
+        Tuple of (per-call latencies in seconds, backend of the last
+        call, total sleep time in seconds).
+    """
+    latencies: list[float] = []
+    backend = ForwardingBackend(event_sink) if event_sink is not None else MemoryBackend()
+    meter = SleepMeter()
+    typer = DirectTyper(
+        delay_ms=delay_ms,
+        keyboard=backend,
+        clipboard=backend,
+        event_sink=backend,
+        sleep=meter.sleep,
+    )
+    for _ in range(repeat):
+        backend.clear()
+        start = time.perf_counter()
+        typer.type(text, method=method)
+        latencies.append(time.perf_counter() - start)
+    return latencies, backend, meter.total
+
+
+def run_benchmarks(
+    methods: tuple[TypingMethod, ...] = METHODS,
+    corpora: Optional[list[str]] = None,
+    lengths: tuple[int, ...] = DEFAULT_LENGTHS,
+    repeat: int = 5,
+    delay_ms: float = 5,
+) -> list[BenchmarkResult]:
+    """Run every method against every corpus and length.
+
+    Args:
+        methods: Typing methods to benchmark.
+        corpora: Corpus names. If None, uses all of CORPORA.
+        lengths: Text lengths in characters.
+        repeat: Number of timed calls per case.
+        delay_ms: DirectTyper delay_ms setting.
+
+    Returns:
+        One BenchmarkResult per case.
+    """
+    results: list[BenchmarkResult] = []
+    for corpus in corpora or list(CORPORA):
+        for length in lengths:
+            text = make_text(corpus, length)
+            for method in methods:
+                latencies, backend, slept = run_case(method, text, repeat, delay_ms)
+                results.append(
+                    _summarize(method.value, corpus, length, latencies, backend, slept)
+                )
+    return results
+
+
+def run_target_benchmarks(
+    targets: list[str],
+    corpora: Optional[list[str]] = None,
+    lengths: tuple[int, ...] = DEFAULT_LENGTHS,
+    repeat: int = 5,
+    delay_ms: float = 5,
+    context_factory: Callable[[EventTarget], Any] = get_context,
+) -> list[BenchmarkResult]:
+    """Benchmark CGEvent typing through each event posting target.
+
+    Args:
+        targets: Target specs for EventTarget.parse, e.g. "hid",
+            "session", "pid:1234", or "app:com.apple.TextEdit".
+        corpora: Corpus names. If None, uses all of CORPORA.
+        lengths: Text lengths in characters.
+        repeat: Number of timed calls per case.
+        delay_ms: DirectTyper delay_ms setting.
+        context_factory: Creates the event sink for a target. Defaults
+            to the shared TypingContext, which posts real events.
+
+    Returns:
+        One BenchmarkResult per case, with method "cgevent@<target>".
+    """
+    results: list[BenchmarkResult] = []
+    for spec in targets:
+        sink = context_factory(EventTarget.parse(spec))
+        for corpus in corpora or list(CORPORA):
+            for length in lengths:
+                text = make_text(corpus, length)
+                latencies, backend, slept = run_case(
+                    TypingMethod.CGEVENT, text, repeat, delay_ms, event_sink=sink
+                )
+                results.append(
+                    _summarize(f"cgevent@{spec}", corpus, length, latencies, backend, slept)
+                )
+    return results
+
+
+def _summarize(
+    method: str,
+    corpus: str,
+    length: int,
+    latencies: list[float],
+    backend: MemoryBackend,
+    slept: float,
+) -> BenchmarkResult:
+    """Aggregate one case's measurements."""
+    total = sum(latencies)
+    return BenchmarkResult(
+        method=method,
+        corpus=corpus,
+        length=length,
+        repeat=len(latencies),
+        chars_per_sec=length * len(latencies) / total if total > 0 else 0.0,
+        events_per_char=backend.events_per_char(length),
+        latency_p50_ms=statistics.median(latencies) * 1000,
+        latency_p99_ms=_percentile(latencies, 99) * 1000,
+        sleep_s=slept,
+        active_s=max(total - slept, 0.0),
+    )
+
+
+def to_json(results: list[BenchmarkResult], **settings) -> dict:
+    """Wrap results with run metadata for JSON export.
+
+    Args:
+        results: Benchmark results.
+        **settings: Benchmark settings to record (repeat, delay_ms, ...).
+
+    Returns:
+        JSON-serializable dictionary.
+    """
+    return {
+        "meta": {
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            **settings,
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+
+def _format_table(results: list[BenchmarkResult]) -> str:
+    """Format results as a plain text table."""
+    header = (
+        f"{'method':<18}{'corpus':<12}{'len':>6}{'chars/s':>12}{'ev/char':>9}"
+        f"{'p50 ms':>10}{'p99 ms':>10}{'sleep s':>10}{'active s':>10}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.method:<18}{r.corpus:<12}{r.length:>6}{r.chars_per_sec:>12.1f}"
+            f"{r.events_per_char:>9.2f}{r.latency_p50_ms:>10.2f}{r.latency_p99_ms:>10.2f}"
+            f"{r.sleep_s:>10.3f}{r.active_s:>10.3f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark DirectTyper typing methods.")
+    parser.add_argument("--methods", nargs="+", choices=[m.value for m in METHODS])
+    parser.add_argument("--corpora", nargs="+", choices=list(CORPORA))
+    parser.add_argument("--lengths", nargs="+", type=int, default=list(DEFAULT_LENGTHS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--delay-ms", type=float, default=5)
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        help="Also post real CGEvents to these targets (hid, session, pid:N, app:BUNDLE_ID)",
+    )
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    methods = tuple(TypingMethod(m) for m in args.methods) if args.methods else METHODS
+    results = run_benchmarks(
+        methods=methods,
+        corpora=args.corpora,
+        lengths=tuple(args.lengths),
+        repeat=args.repeat,
+        delay_ms=args.delay_ms,
+    )
+    if args.targets:
+        results += run_target_benchmarks(
+            args.targets,
+            corpora=args.corpora,
+            lengths=tuple(args.lengths),
+            repeat=args.repeat,
+            delay_ms=args.delay_ms,
+        )
+    print(_format_table(results))
+
+    if args.output:
+        data = to_json(results, repeat=args.repeat, delay_ms=args.delay_ms)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"\nResults written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,610 @@
-"""CGEvent low-level implementation for Unicode text input on macOS."""
+"""CGEvent low-level implementation for Unicode text input on macOS.
 
+Quartz is imported when the first TypingContext is created, so the
+segmentation and chunking helpers (and every function given an explicit
+sink) also work on platforms without PyObjC.
+"""
+
+import threading
 import time
-from typing import Optional
-
-from Quartz import (
-    CGEventCreateKeyboardEvent,
-    CGEventKeyboardSetUnicodeString,
-    CGEventPost,
-    kCGHIDEventTap,
-    kCGEventKeyDown,
-    kCGEventKeyUp,
-    CGEventSetFlags,
-)
+import unicodedata
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from typing import Iterator, Optional
+
+from direct_typer.backends import KeyEventSink
+from direct_typer.pacing import PacingScheduler, PacingStats
 
 
 # Virtual key codes for special characters
 SPECIAL_KEYS = {
     "\n": 36,  # Return
     "\r": 36,  # Return
+    "\r\n": 36,  # Return
     "\t": 48,  # Tab
 }
 
+# Virtual key code of "v" on ANSI (QWERTY) layouts, used for the Cmd+V
+# paste chord when the current layout's key code is not known
+PASTE_KEYCODE = 9
+
+# Event posting routes for EventTarget
+TARGET_HID = "hid"
+TARGET_SESSION = "session"
+TARGET_PID = "pid"
+
+
+@dataclass(frozen=True)
+class EventTarget:
+    """Where a TypingContext posts its events.
+
+    - TARGET_HID: the HID event tap. Events pass through the whole system
+      pipeline and every event tap, like real key presses (default).
+    - TARGET_SESSION: the session event tap, skipping the HID stage.
+    - TARGET_PID: straight to one process with CGEventPostToPid. Lowest
+      latency, but only that process receives the input, whether or not
+      it is focused.
+
+    Attributes:
+        route: TARGET_HID, TARGET_SESSION, or TARGET_PID.
+        pid: Target process ID for TARGET_PID.
+    """
+
+    route: str = TARGET_HID
+    pid: Optional[int] = None
+
+    def __post_init__(self):
+        if self.route not in (TARGET_HID, TARGET_SESSION, TARGET_PID):
+            raise ValueError(f"Unknown event target: {self.route}")
+        if (self.route == TARGET_PID) != (self.pid is not None):
+            raise ValueError("A process ID is required for (and only for) the pid target")
+
+    @classmethod
+    def parse(cls, value: str) -> "EventTarget":
+        """Parse "hid", "session", "pid:<pid>", or "app:<bundle id>".
+
+        Raises:
+            ValueError: If value is not a valid target.
+            LookupError: If the application is not running.
+        """
+        route, _, argument = value.strip().partition(":")
+        route = route.lower()
+        if route == "app":
+            return cls.application(argument)
+        if route == TARGET_PID:
+            if not argument.isdigit():
+                raise ValueError(f"Invalid process ID: {argument!r}")
+            return cls(TARGET_PID, int(argument))
+        return cls(route)
+
+    @classmethod
+    def application(cls, bundle_id: str) -> "EventTarget":
+        """Return a TARGET_PID target for a running application.
 
-def type_unicode_char(char: str, delay_ms: float = 0) -> None:
-    """Send a single Unicode character as keyboard event.
+        Args:
+            bundle_id: Bundle identifier, e.g. "com.apple.TextEdit".
+
+        Raises:
+            LookupError: If no such application is running.
+        """
+        from AppKit import NSRunningApplication
+
+        apps = NSRunningApplication.runningApplicationsWithBundleIdentifier_(bundle_id)
+        if not apps:
+            raise LookupError(f"Application not running: {bundle_id}")
+        return cls(TARGET_PID, int(apps[0].processIdentifier()))
+
+
+# Maximum UTF-16 code units a single keyboard event can carry.
+# CGEventKeyboardSetUnicodeString silently truncates longer strings.
+MAX_CHUNK_UTF16 = 20
+
+
+def type_unicode_char(
+    char: str, delay_ms: float = 0, sink: Optional[KeyEventSink] = None
+) -> None:
+    """Send a single user-perceived character as keyboard event.
+
+    A character here is one grapheme cluster, so emoji with skin tone
+    modifiers, ZWJ sequences, and kana followed by a combining dakuten
+    are sent as one event pair.
 
     Args:
-        char: Single character to type.
+        char: Single grapheme cluster to type.
         delay_ms: Delay after typing in milliseconds.
+        sink: Event sink to post to. If None, uses the shared TypingContext.
 
     Raises:
-        ValueError: If char is not exactly one character.
+        ValueError: If char is not exactly one grapheme cluster.
     """
-    if len(char) != 1:
-        raise ValueError(f"Expected single character, got {len(char)} characters")
+    clusters = list(iter_graphemes(char))
+    if len(clusters) != 1:
+        raise ValueError(f"Expected single character, got {len(clusters)} characters")
 
+    sink = sink or get_context()
     # Handle special keys with virtual key codes
     if char in SPECIAL_KEYS:
-        keycode = SPECIAL_KEYS[char]
-        event_down = CGEventCreateKeyboardEvent(None, keycode, True)
-        event_up = CGEventCreateKeyboardEvent(None, keycode, False)
+        sink.post_keycode(SPECIAL_KEYS[char])
     else:
-        # Use Unicode string for regular characters
-        event_down = CGEventCreateKeyboardEvent(None, 0, True)
-        CGEventKeyboardSetUnicodeString(event_down, len(char), char)
-
-        event_up = CGEventCreateKeyboardEvent(None, 0, False)
-        CGEventKeyboardSetUnicodeString(event_up, len(char), char)
-
-    if event_down is None or event_up is None:
-        raise RuntimeError(f"Failed to create keyboard event for character: {char!r}")
-
-    CGEventPost(kCGHIDEventTap, event_down)
-    CGEventPost(kCGHIDEventTap, event_up)
+        sink.post_unicode(char)
 
     if delay_ms > 0:
         time.sleep(delay_ms / 1000.0)
 
 
-def type_unicode_string(text: str, delay_ms: float = 5) -> None:
+def type_unicode_string(
+    text: str,
+    delay_ms: float = 5,
+    scheduler: Optional[PacingScheduler] = None,
+    sink: Optional[KeyEventSink] = None,
+) -> PacingStats:
     """Send a Unicode string as keyboard events.
 
-    Each character is sent as a separate key down/up event pair.
+    Each grapheme cluster is sent as a separate key down/up event pair.
     This method works with any Unicode character including Japanese,
     Chinese, emoji, etc.
 
     Args:
         text: Text to type.
         delay_ms: Delay between characters in milliseconds.
+        scheduler: Pacing scheduler to use. If None, one is created
+            from delay_ms.
+        sink: Event sink to post to. If None, uses the shared TypingContext.
+
+    Returns:
+        Achieved versus requested characters per second.
+    """
+    sink = sink or get_context()
+    scheduler = scheduler or PacingScheduler.from_delay_ms(delay_ms)
+    scheduler.start()
+    for cluster in iter_graphemes(text):
+        scheduler.check_cancelled()
+        if cluster in SPECIAL_KEYS:
+            sink.post_keycode(SPECIAL_KEYS[cluster])
+        else:
+            sink.post_unicode(cluster)
+        scheduler.tick()
+    return scheduler.stats()
+
+
+def _utf16_len(text: str) -> int:
+    """Return the length of text in UTF-16 code units.
+
+    CGEventKeyboardSetUnicodeString counts UniChar units, so characters
+    outside the BMP (e.g. emoji) take two units each.
+    """
+    return len(text) + sum(1 for char in text if ord(char) > 0xFFFF)
+
+
+# Grapheme cluster break classes (subset of UAX #29).
+_GCB_OTHER = 0
+_GCB_CR = 1
+_GCB_LF = 2
+_GCB_CONTROL = 3
+_GCB_EXTEND = 4
+_GCB_ZWJ = 5
+_GCB_REGIONAL = 6
+_GCB_SPACING = 7
+_GCB_L = 8
+_GCB_V = 9
+_GCB_T = 10
+_GCB_LV = 11
+_GCB_LVT = 12
+_GCB_PICTO = 13
+
+# Code point ranges that never take part in cluster joins on their own.
+# These cover ASCII and the CJK blocks that make up most dictated text,
+# so the common case skips the unicodedata lookup entirely.
+_SIMPLE_RANGES = (
+    (0x0020, 0x007E),  # ASCII printable
+    (0x3000, 0x3029),  # CJK symbols and punctuation
+    (0x3041, 0x3096),  # Hiragana
+    (0x309B, 0x309F),  # Hiragana spacing marks
+    (0x30A0, 0x30FF),  # Katakana
+    (0x3400, 0x4DBF),  # CJK unified ideographs extension A
+    (0x4E00, 0x9FFF),  # CJK unified ideographs
+    (0xFF01, 0xFF9D),  # Fullwidth and halfwidth forms
+)
+_SIMPLE_STARTS = tuple(start for start, _ in _SIMPLE_RANGES)
+
+# Approximation of Extended_Pictographic for emoji sequences.
+_PICTOGRAPHIC_RANGES = (
+    (0x00A9, 0x00A9),
+    (0x00AE, 0x00AE),
+    (0x203C, 0x203C),
+    (0x2049, 0x2049),
+    (0x2122, 0x2122),
+    (0x2139, 0x2139),
+    (0x2194, 0x21AA),
+    (0x2300, 0x23FF),
+    (0x25AA, 0x27BF),
+    (0x2934, 0x2935),
+    (0x2B05, 0x2B55),
+    (0x3030, 0x3030),
+    (0x303D, 0x303D),
+    (0x3297, 0x3299),
+    (0x1F000, 0x1F1E5),
+    (0x1F200, 0x1F3FA),
+    (0x1F400, 0x1FAFF),
+)
+
+
+def _in_ranges(code: int, ranges: tuple[tuple[int, int], ...]) -> bool:
+    """Return whether code falls inside any of the given ranges."""
+    for start, end in ranges:
+        if start <= code <= end:
+            return True
+    return False
+
+
+def _is_simple(code: int) -> bool:
+    """Return whether code is in the precomputed simple ranges."""
+    index = bisect_right(_SIMPLE_STARTS, code) - 1
+    return index >= 0 and code <= _SIMPLE_RANGES[index][1]
+
+
+@lru_cache(maxsize=4096)
+def _break_class(char: str) -> int:
+    """Classify a code point for grapheme cluster segmentation.
+
+    Args:
+        char: Single code point.
+
+    Returns:
+        One of the _GCB_* constants.
+    """
+    code = ord(char)
+    if _is_simple(code):
+        return _GCB_OTHER
+    if char == "\r":
+        return _GCB_CR
+    if char == "\n":
+        return _GCB_LF
+    if code == 0x200D:
+        return _GCB_ZWJ
+    if code == 0x200C:
+        return _GCB_EXTEND  # Zero width non-joiner
+    if 0x1F1E6 <= code <= 0x1F1FF:
+        return _GCB_REGIONAL
+    if 0x1F3FB <= code <= 0x1F3FF or 0xE0020 <= code <= 0xE007F:
+        return _GCB_EXTEND  # Emoji modifiers and tag characters
+    if 0xFF9E <= code <= 0xFF9F:
+        return _GCB_EXTEND  # Halfwidth (semi-)voiced sound marks
+    if 0x1100 <= code <= 0x115F or 0xA960 <= code <= 0xA97C:
+        return _GCB_L
+    if 0x1160 <= code <= 0x11A7 or 0xD7B0 <= code <= 0xD7C6:
+        return _GCB_V
+    if 0x11A8 <= code <= 0x11FF or 0xD7CB <= code <= 0xD7FB:
+        return _GCB_T
+    if 0xAC00 <= code <= 0xD7A3:
+        return _GCB_LV if (code - 0xAC00) % 28 == 0 else _GCB_LVT
+
+    category = unicodedata.category(char)
+    if category in ("Mn", "Me"):
+        return _GCB_EXTEND
+    if category == "Mc":
+        return _GCB_SPACING
+    if category in ("Cc", "Cf", "Zl", "Zp"):
+        return _GCB_CONTROL
+    if _in_ranges(code, _PICTOGRAPHIC_RANGES):
+        return _GCB_PICTO
+    return _GCB_OTHER
+
+
+def _is_boundary(prev: int, curr: int, pictographic_zwj: bool, odd_regional: bool) -> bool:
+    """Decide whether a cluster boundary falls between two code points.
+
+    Args:
+        prev: Break class of the previous code point.
+        curr: Break class of the current code point.
+        pictographic_zwj: Whether the cluster so far is a pictograph
+            followed by extenders and a ZWJ.
+        odd_regional: Whether the cluster so far ends in an odd number
+            of regional indicators.
+
+    Returns:
+        True if a new cluster starts at the current code point.
     """
-    for char in text:
-        type_unicode_char(char, delay_ms)
+    if prev == _GCB_CR and curr == _GCB_LF:
+        return False
+    if prev in (_GCB_CR, _GCB_LF, _GCB_CONTROL):
+        return True
+    if curr in (_GCB_CR, _GCB_LF, _GCB_CONTROL):
+        return True
+    if prev == _GCB_L and curr in (_GCB_L, _GCB_V, _GCB_LV, _GCB_LVT):
+        return False
+    if prev in (_GCB_LV, _GCB_V) and curr in (_GCB_V, _GCB_T):
+        return False
+    if prev in (_GCB_LVT, _GCB_T) and curr == _GCB_T:
+        return False
+    if curr in (_GCB_EXTEND, _GCB_ZWJ, _GCB_SPACING):
+        return False
+    if pictographic_zwj and curr == _GCB_PICTO:
+        return False
+    if odd_regional and curr == _GCB_REGIONAL:
+        return False
+    return True
+
 
+def iter_graphemes(text: str) -> Iterator[str]:
+    """Split text into grapheme clusters.
+
+    Implements the parts of the Unicode extended grapheme cluster rules
+    that matter for typing: CR LF, combining marks (including kana
+    dakuten), Hangul jamo, emoji modifiers, ZWJ sequences, and flag
+    pairs. ASCII and common CJK characters take a table-driven fast path.
+
+    Args:
+        text: Text to split.
 
-def type_unicode_batch(text: str, batch_size: int = 20, delay_ms: float = 10) -> None:
+    Yields:
+        Grapheme clusters in order. Joining them gives back text.
+    """
+    start = 0
+    prev = -1
+    pictographic_zwj = False
+    in_pictograph = False
+    regional_count = 0
+
+    for index, char in enumerate(text):
+        curr = _break_class(char)
+        if prev >= 0 and _is_boundary(prev, curr, pictographic_zwj, regional_count % 2 == 1):
+            yield text[start:index]
+            start = index
+            in_pictograph = False
+            regional_count = 0
+
+        if curr == _GCB_PICTO:
+            in_pictograph = True
+        elif curr == _GCB_REGIONAL:
+            regional_count += 1
+        elif curr != _GCB_EXTEND and curr != _GCB_ZWJ:
+            in_pictograph = False
+        pictographic_zwj = in_pictograph and curr == _GCB_ZWJ
+        prev = curr
+
+    if start < len(text):
+        yield text[start:]
+
+
+class TypingContext:
+    """Reusable CGEvent state for a typing session.
+
+    This is the Quartz implementation of KeyEventSink.
+
+    Creates one event source and one pair of Unicode template events up
+    front, and caches the key code event pairs for SPECIAL_KEYS and the
+    Cmd+V paste chord. Posting a chunk only rewrites the template's
+    Unicode payload instead of allocating new events. Events are posted
+    to the route given by an EventTarget.
+    """
+
+    def __init__(self, target: EventTarget = EventTarget()):
+        """Initialize TypingContext.
+
+        Args:
+            target: Where to post events. Defaults to the HID event tap.
+
+        Raises:
+            ImportError: If Quartz (PyObjC) is not available.
+            RuntimeError: If the event source or template events could
+                not be created.
+        """
+        import Quartz
+
+        # Bind the Quartz functions once to keep attribute lookups out of the hot path
+        self._create_event = Quartz.CGEventCreateKeyboardEvent
+        self._set_unicode = Quartz.CGEventKeyboardSetUnicodeString
+        self._set_flags = Quartz.CGEventSetFlags
+        if target.route == TARGET_PID:
+            self._post = partial(Quartz.CGEventPostToPid, target.pid)
+        elif target.route == TARGET_SESSION:
+            self._post = partial(Quartz.CGEventPost, Quartz.kCGSessionEventTap)
+        else:
+            self._post = partial(Quartz.CGEventPost, Quartz.kCGHIDEventTap)
+        self.target = target
+        self._command_flag = Quartz.kCGEventFlagMaskCommand
+
+        self._source = Quartz.CGEventSourceCreate(Quartz.kCGEventSourceStateHIDSystemState)
+        self._unicode_down = self._create_event(self._source, 0, True)
+        self._unicode_up = self._create_event(self._source, 0, False)
+        if self._unicode_down is None or self._unicode_up is None:
+            raise RuntimeError("Failed to create keyboard event templates")
+
+        self._keycode_events: dict[tuple[int, int], tuple] = {}
+        # Templates are mutated before each post, so posting must not interleave
+        self._lock = threading.Lock()
+
+    def _keycode_pair(self, keycode: int, flags: int = 0) -> tuple:
+        """Return the cached down/up event pair for a key code.
+
+        Args:
+            keycode: Virtual key code.
+            flags: CGEventFlags modifier mask to set on the events.
+
+        Returns:
+            Tuple of (key down event, key up event).
+
+        Raises:
+            RuntimeError: If the keyboard events could not be created.
+        """
+        pair = self._keycode_events.get((keycode, flags))
+        if pair is None:
+            event_down = self._create_event(self._source, keycode, True)
+            event_up = self._create_event(self._source, keycode, False)
+            if event_down is None or event_up is None:
+                raise RuntimeError(f"Failed to create keyboard event for keycode: {keycode}")
+            if flags:
+                self._set_flags(event_down, flags)
+                self._set_flags(event_up, flags)
+            pair = (event_down, event_up)
+            self._keycode_events[(keycode, flags)] = pair
+        return pair
+
+    def post_unicode(self, chunk: str) -> None:
+        """Post one key down/up pair carrying a whole Unicode string.
+
+        Args:
+            chunk: Text to attach to the event. Must fit in MAX_CHUNK_UTF16.
+        """
+        length = _utf16_len(chunk)
+        with self._lock:
+            self._set_unicode(self._unicode_down, length, chunk)
+            self._set_unicode(self._unicode_up, length, chunk)
+            self._post(self._unicode_down)
+            self._post(self._unicode_up)
+
+    def post_keycode(self, keycode: int, flags: int = 0) -> None:
+        """Post one key down/up pair for a virtual key code.
+
+        Args:
+            keycode: Virtual key code to press and release.
+            flags: CGEventFlags modifier mask, e.g. Shift for "A".
+        """
+        event_down, event_up = self._keycode_pair(keycode, flags)
+        with self._lock:
+            self._post(event_down)
+            self._post(event_up)
+
+    def post_paste(self, keycode: Optional[int] = None) -> None:
+        """Post the Cmd+V paste chord.
+
+        Args:
+            keycode: Key code of "v" in the current layout. If None, uses
+                PASTE_KEYCODE.
+
+        Raises:
+            RuntimeError: If the keyboard events could not be created.
+        """
+        keycode = PASTE_KEYCODE if keycode is None else keycode
+        event_down, event_up = self._keycode_pair(keycode, self._command_flag)
+        with self._lock:
+            self._post(event_down)
+            self._post(event_up)
+
+
+_default_context: Optional[TypingContext] = None
+_contexts: dict[EventTarget, TypingContext] = {}
+_default_context_lock = threading.Lock()
+
+
+def get_context(target: Optional[EventTarget] = None) -> TypingContext:
+    """Return the shared TypingContext for a target, creating it on first use.
+
+    Args:
+        target: Event target. If None, uses the HID event tap.
+
+    Returns:
+        The process-wide TypingContext for the target.
+    """
+    global _default_context
+    if target is None or target == EventTarget():
+        if _default_context is None:
+            with _default_context_lock:
+                if _default_context is None:
+                    _default_context = TypingContext()
+        return _default_context
+
+    context = _contexts.get(target)
+    if context is None:
+        with _default_context_lock:
+            context = _contexts.get(target)
+            if context is None:
+                context = _contexts[target] = TypingContext(target)
+    return context
+
+
+def type_paste(sink: Optional[KeyEventSink] = None, keycode: Optional[int] = None) -> None:
+    """Send the Cmd+V paste chord using cached events.
+
+    Args:
+        sink: Event sink to post to. If None, uses the shared TypingContext.
+        keycode: Key code of "v" in the current layout. If None, uses
+            PASTE_KEYCODE.
+    """
+    (sink or get_context()).post_paste(keycode)
+
+
+def iter_chunks(text: str, max_units: int = MAX_CHUNK_UTF16) -> Iterator[str]:
+    """Split text into units that can each be posted as one event pair.
+
+    Special keys (newline, tab) are yielded on their own so they can be
+    sent as key code events. All other text is packed into chunks of at
+    most max_units UTF-16 code units, split only between grapheme
+    clusters so surrogate pairs, emoji sequences, and combining marks
+    are never broken. A single cluster longer than max_units is yielded
+    as its own chunk.
+
+    Args:
+        text: Text to split.
+        max_units: Maximum UTF-16 code units per chunk.
+
+    Yields:
+        Either a single special key or a packed Unicode chunk.
+
+    Raises:
+        ValueError: If max_units is less than 2.
+    """
+    if max_units < 2:
+        raise ValueError(f"max_units must be at least 2, got {max_units}")
+
+    chunk: list[str] = []
+    units = 0
+    for cluster in iter_graphemes(text):
+        if cluster in SPECIAL_KEYS:
+            if chunk:
+                yield "".join(chunk)
+                chunk, units = [], 0
+            yield cluster
+            continue
+
+        cluster_units = _utf16_len(cluster)
+        if chunk and units + cluster_units > max_units:
+            yield "".join(chunk)
+            chunk, units = [], 0
+        chunk.append(cluster)
+        units += cluster_units
+
+    if chunk:
+        yield "".join(chunk)
+
+
+def type_unicode_batch(
+    text: str,
+    batch_size: int = MAX_CHUNK_UTF16,
+    delay_ms: float = 10,
+    scheduler: Optional[PacingScheduler] = None,
+    sink: Optional[KeyEventSink] = None,
+) -> PacingStats:
     """Send Unicode text in batches for better performance.
 
-    For longer texts, this can be more efficient than character-by-character
-    typing while still maintaining reliability.
+    Each batch is posted as a single key down/up pair carrying up to
+    batch_size UTF-16 code units, so a 200 character string needs about
+    ten event pairs instead of two hundred. Newlines and tabs are sent
+    as separate key code events.
 
     Args:
         text: Text to type.
-        batch_size: Maximum characters per batch.
+        batch_size: Maximum UTF-16 code units per event, capped at
+            MAX_CHUNK_UTF16.
         delay_ms: Delay between batches in milliseconds.
+        scheduler: Pacing scheduler to use. If None, one is created
+            from delay_ms.
+        sink: Event sink to post to. If None, uses the shared TypingContext.
+
+    Returns:
+        Achieved versus requested batches per second.
     """
-    for i in range(0, len(text), batch_size):
-        batch = text[i : i + batch_size]
-        for char in batch:
-            type_unicode_char(char, delay_ms=0)
-        if delay_ms > 0:
-            time.sleep(delay_ms / 1000.0)
+    max_units = min(batch_size, MAX_CHUNK_UTF16)
+    sink = sink or get_context()
+    scheduler = scheduler or PacingScheduler.from_delay_ms(delay_ms)
+    scheduler.start()
+    for chunk in iter_chunks(text, max_units):
+        scheduler.check_cancelled()
+        if chunk in SPECIAL_KEYS:
+            sink.post_keycode(SPECIAL_KEYS[chunk])
+        else:
+            sink.post_unicode(chunk)
+        scheduler.tick()
+    return scheduler.stats()
@@ -0,0 +1,530 @@
+"""Clipboard backends and paste synchronization.
+
+Instead of sleeping fixed amounts around a paste, clipboard typing polls
+the pasteboard change count until a write is visible and waits for the
+target application to read the paste only as long as it needs to.
+
+NativePasteboard talks to NSPasteboard in-process on macOS;
+PyperclipClipboard is the portable fallback.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+
+@dataclass
+class ClipboardTiming:
+    """Time actually spent waiting during one clipboard paste.
+
+    Attributes:
+        copy_wait: Wait for the new content to become visible, in seconds.
+        paste_wait: Wait for the target to read the paste, in seconds.
+        restored: Whether the original content was written back.
+        deferred: Whether the restore was handed to DeferredRestore.
+    """
+
+    copy_wait: float = 0.0
+    paste_wait: float = 0.0
+    restored: bool = False
+    deferred: bool = False
+
+    @property
+    def total_wait(self) -> float:
+        """Total time spent waiting in seconds."""
+        return self.copy_wait + self.paste_wait
+
+
+class PyperclipClipboard:
+    """ClipboardBackend over pyperclip that also reports the change count.
+
+    The change count comes from NSPasteboard when AppKit is available
+    (macOS); elsewhere change_count() returns None.
+    """
+
+    def __init__(self, module: Any):
+        """Initialize PyperclipClipboard.
+
+        Args:
+            module: pyperclip module (or anything with copy/paste).
+        """
+        self._module = module
+        self._pasteboard: Any = None
+        self._has_pasteboard: Optional[bool] = None
+
+    def copy(self, text: str) -> None:
+        """Replace the clipboard content with text."""
+        self._module.copy(text)
+
+    def paste(self) -> str:
+        """Return the clipboard content as text."""
+        return self._module.paste()
+
+    def change_count(self) -> Optional[int]:
+        """Return the pasteboard change count, or None if unavailable."""
+        if self._has_pasteboard is None:
+            try:
+                from AppKit import NSPasteboard
+
+                self._pasteboard = NSPasteboard.generalPasteboard()
+                self._has_pasteboard = True
+            except ImportError:
+                self._has_pasteboard = False
+        if not self._has_pasteboard:
+            return None
+        return self._pasteboard.changeCount()
+
+
+def save_clipboard(clipboard: Any) -> Any:
+    """Capture a clipboard's content for restore_clipboard().
+
+    Uses snapshot() when the backend supports it, so non-text content
+    survives, and paste() otherwise.
+
+    Args:
+        clipboard: Clipboard backend.
+
+    Returns:
+        The saved content, or None if it could not be read.
+    """
+    try:
+        snapshot = getattr(clipboard, "snapshot", None)
+        if snapshot is not None:
+            return snapshot()
+        return clipboard.paste()
+    except Exception:
+        # Clipboard might be empty or contain non-text data
+        return None
+
+
+def restore_clipboard(clipboard: Any, saved: Any) -> None:
+    """Write back content captured by save_clipboard().
+
+    Args:
+        clipboard: Clipboard backend.
+        saved: Value returned by save_clipboard() (not None).
+    """
+    restore = getattr(clipboard, "restore", None)
+    if restore is not None:
+        restore(saved)
+    else:
+        clipboard.copy(saved)
+
+
+def get_change_count(clipboard: Any) -> Optional[int]:
+    """Return a clipboard's change count if the backend supports it.
+
+    Args:
+        clipboard: Clipboard backend.
+
+    Returns:
+        The change count, or None if the backend does not report one.
+    """
+    change_count = getattr(clipboard, "change_count", None)
+    if change_count is None:
+        return None
+    return change_count()
+
+
+def wait_for_change(
+    clipboard: Any,
+    previous: Optional[int],
+    timeout: float,
+    poll_interval: float = 0.001,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Optional[Callable[[float], None]] = None,
+) -> float:
+    """Wait until the clipboard change count moves past previous.
+
+    Falls back to sleeping the full timeout when the change count is
+    not available, which matches the old fixed wait.
+
+    Args:
+        clipboard: Clipboard backend.
+        previous: Change count before the write, or None if unknown.
+        timeout: Maximum wait in seconds.
+        poll_interval: Delay between polls in seconds.
+        clock: Monotonic clock.
+        sleep: Sleep function. Defaults to time.sleep.
+
+    Returns:
+        Time actually waited in seconds.
+    """
+    sleep = sleep or time.sleep
+    start = clock()
+    if previous is None:
+        sleep(timeout)
+        return clock() - start
+
+    deadline = start + timeout
+    while get_change_count(clipboard) == previous:
+        now = clock()
+        if now >= deadline:
+            break
+        sleep(min(poll_interval, deadline - now))
+    return clock() - start
+
+
+class PasteSettle:
+    """Bounded, adaptive wait for the target application to read a paste.
+
+    Backends that can tell when the pasted data was read implement
+    wait_for_read(timeout) and return how long the read took (or None on
+    timeout). A backend that only sometimes can (NativePasteboard copies
+    lazily only off the main thread) also reports read_pending. Each
+    observed read updates a moving estimate, and the wait used when
+    there is no signal is the estimate times a safety margin, clamped
+    to [minimum, maximum].
+
+    Adapting therefore needs a lazy NativePasteboard (see
+    DirectTyper(lazy_clipboard=True)). Eager backends give no read signal:
+    the target reads the pasteboard without changing its change count,
+    so their wait stays at initial, the fixed pause clipboard typing
+    used before. Callers that cannot use lazy mode avoid the wait with
+    DirectTyper(deferred_restore=True) instead.
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.15,
+        minimum: float = 0.02,
+        maximum: float = 0.5,
+        margin: float = 2.0,
+        smoothing: float = 0.3,
+    ):
+        """Initialize PasteSettle.
+
+        Args:
+            initial: Wait used before any read has been observed, in seconds.
+            minimum: Lower bound of the wait in seconds.
+            maximum: Upper bound of the wait in seconds, and the longest
+                wait for a read signal.
+            margin: Factor applied to the observed read latency.
+            smoothing: Weight of each new observation in the estimate.
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.margin = margin
+        self.smoothing = smoothing
+        self.current = min(max(initial, minimum), maximum)
+
+    def _learn(self, observed: float) -> None:
+        """Move the estimate towards an observed read latency."""
+        target = min(max(observed * self.margin, self.minimum), self.maximum)
+        self.current += self.smoothing * (target - self.current)
+
+    def wait(
+        self,
+        clipboard: Any,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Optional[Callable[[float], None]] = None,
+    ) -> float:
+        """Wait until the paste has (most likely) been read.
+
+        Args:
+            clipboard: Clipboard backend the paste came from.
+            clock: Monotonic clock.
+            sleep: Sleep function. Defaults to time.sleep.
+
+        Returns:
+            Time actually waited in seconds.
+        """
+        sleep = sleep or time.sleep
+        start = clock()
+        wait_for_read = getattr(clipboard, "wait_for_read", None)
+        if wait_for_read is not None and getattr(clipboard, "read_pending", True):
+            observed = wait_for_read(self.maximum)
+            if observed is not None:
+                self._learn(observed)
+                return clock() - start
+            # No read within the bound: assume the slow case next time
+            self._learn(self.maximum)
+            return clock() - start
+
+        sleep(self.current)
+        return clock() - start
+
+
+@dataclass
+class PendingRestore:
+    """A clipboard restore waiting in DeferredRestore.
+
+    Attributes:
+        clipboard: Clipboard backend to restore.
+        saved: Content from save_clipboard().
+        change_count: Change count right after our paste was copied, or
+            None if unknown. The restore is skipped if it has moved.
+        due: Monotonic time the restore runs at.
+    """
+
+    clipboard: Any
+    saved: Any
+    change_count: Optional[int]
+    due: float
+
+
+class DeferredRestore:
+    """Restores the clipboard on a background worker after a paste.
+
+    Instead of waiting for the target to read a paste before putting the
+    original content back, the restore is scheduled delay seconds later
+    and the paste returns immediately. At most one restore is pending:
+    a newer paste takes over the pending one (see take()), so the
+    original content is restored once, after the last paste, and the
+    text of an earlier paste is never written back.
+    """
+
+    def __init__(self, delay: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        """Initialize DeferredRestore.
+
+        Args:
+            delay: Time the target application gets to read the paste,
+                in seconds.
+            clock: Monotonic clock.
+        """
+        self.delay = delay
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._pending: Optional[PendingRestore] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> bool:
+        """Whether a restore is waiting to run."""
+        with self._condition:
+            return self._pending is not None
+
+    def take(self) -> Optional[PendingRestore]:
+        """Cancel the pending restore and return it.
+
+        Called before a new paste: the clipboard still holds the previous
+        paste's text, so the new paste must reuse the pending original
+        instead of saving the clipboard again.
+
+        Returns:
+            The cancelled restore, or None if nothing was pending.
+        """
+        with self._condition:
+            pending, self._pending = self._pending, None
+            return pending
+
+    def schedule(self, clipboard: Any, saved: Any, change_count: Optional[int]) -> None:
+        """Schedule a restore delay seconds from now.
+
+        Args:
+            clipboard: Clipboard backend to restore.
+            saved: Content from save_clipboard().
+            change_count: Change count right after the paste was copied.
+        """
+        with self._condition:
+            self._pending = PendingRestore(
+                clipboard, saved, change_count, self._clock() + self.delay
+            )
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="clipboard-restore", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def flush(self) -> bool:
+        """Run the pending restore now, e.g. before the application quits.
+
+        Returns:
+            Whether the clipboard was written back.
+        """
+        with self._condition:
+            pending, self._pending = self._pending, None
+            return pending is not None and self._restore(pending)
+
+    def _restore(self, pending: PendingRestore) -> bool:
+        """Write back pending.saved unless the clipboard changed since."""
+        try:
+            current = get_change_count(pending.clipboard)
+            if pending.change_count is not None and current != pending.change_count:
+                return False  # Newer content from another application
+            restore_clipboard(pending.clipboard, pending.saved)
+            return True
+        except Exception:
+            return False  # Best effort restore
+
+    def _run(self) -> None:
+        """Worker loop: run each pending restore when it is due."""
+        with self._condition:
+            while True:
+                if self._pending is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._pending.due - self._clock()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                pending, self._pending = self._pending, None
+                # Holding the lock: a concurrent paste waits in take() and
+                # then sees the restored content instead of a half-done one
+                self._restore(pending)
+
+
+_provider_class: Any = None
+
+
+def _paste_provider_class() -> Any:
+    """Return the Objective-C data provider class, defining it on first use.
+
+    The class can only be registered with the Objective-C runtime once
+    per process, so it is cached.
+    """
+    global _provider_class
+    if _provider_class is None:
+        import objc
+        from Foundation import NSObject
+
+        class DirectTyperPasteProvider(NSObject):
+            """Supplies pasted text on demand and signals the read."""
+
+            def initWithText_(self, text):
+                self = objc.super(DirectTyperPasteProvider, self).init()
+                if self is None:
+                    return None
+                self.text = text
+                self.read_at: Optional[float] = None
+                self.read_event = threading.Event()
+                return self
+
+            def pasteboard_item_provideDataForType_(self, pasteboard, item, data_type):
+                item.setString_forType_(self.text, data_type)
+                self.read_at = time.monotonic()
+                self.read_event.set()
+
+            def pasteboardFinishedWithDataProvider_(self, pasteboard):
+                pass
+
+        _provider_class = DirectTyperPasteProvider
+    return _provider_class
+
+
+class NativePasteboard:
+    """In-process ClipboardBackend on NSPasteboard.
+
+    Talks to the general pasteboard through AppKit instead of spawning
+    pbcopy/pbpaste, and can snapshot and restore every item and type on
+    the pasteboard (images, rich text, file URLs), not just plain text.
+
+    With lazy=True, copy() only promises the text and supplies it when
+    the target application asks for it, so wait_for_read() knows exactly
+    when a paste has been read. Promises need the main run loop to be
+    serviced, so lazy mode is used only when copying from a thread other
+    than the main thread.
+    """
+
+    def __init__(self, lazy: bool = False):
+        """Initialize NativePasteboard.
+
+        Args:
+            lazy: Provide pasted text on demand and report reads.
+
+        Raises:
+            ImportError: If AppKit (PyObjC) is not available.
+        """
+        from AppKit import NSPasteboard, NSPasteboardItem, NSPasteboardTypeString
+
+        self._pasteboard = NSPasteboard.generalPasteboard()
+        self._item_class = NSPasteboardItem
+        self._string_type = NSPasteboardTypeString
+        self.lazy = lazy
+        self._provider: Any = None
+        self._copied_at = 0.0
+
+    def copy(self, text: str) -> None:
+        """Replace the pasteboard content with text."""
+        self._pasteboard.clearContents()
+        self._provider = None
+        if self.lazy and threading.current_thread() is not threading.main_thread():
+            provider = _paste_provider_class().alloc().initWithText_(text)
+            item = self._item_class.alloc().init()
+            item.setDataProvider_forTypes_(provider, [self._string_type])
+            self._pasteboard.writeObjects_([item])
+            self._provider = provider
+            self._copied_at = time.monotonic()
+        else:
+            self._pasteboard.setString_forType_(text, self._string_type)
+
+    def paste(self) -> str:
+        """Return the pasteboard content as text ("" if there is none)."""
+        return self._pasteboard.stringForType_(self._string_type) or ""
+
+    def change_count(self) -> int:
+        """Return the pasteboard change count."""
+        return self._pasteboard.changeCount()
+
+    @property
+    def read_pending(self) -> bool:
+        """Whether the last copy was lazy, so wait_for_read() can see its read."""
+        return self._provider is not None
+
+    def wait_for_read(self, timeout: float) -> Optional[float]:
+        """Wait until the last lazily copied text has been read.
+
+        Args:
+            timeout: Maximum wait in seconds.
+
+        Returns:
+            Seconds from copy to read, or None on timeout. Always None
+            if the last copy was not lazy.
+        """
+        provider = self._provider
+        if provider is None or not provider.read_event.wait(timeout):
+            return None
+        return provider.read_at - self._copied_at
+
+    def snapshot(self) -> list[dict[str, bytes]]:
+        """Capture every pasteboard item with all of its types.
+
+        Returns:
+            One {type: data} dictionary per item.
+        """
+        items: list[dict[str, bytes]] = []
+        for item in self._pasteboard.pasteboardItems() or []:
+            saved: dict[str, bytes] = {}
+            for data_type in item.types():
+                data = item.dataForType_(data_type)
+                if data is not None:
+                    saved[str(data_type)] = bytes(data)
+            items.append(saved)
+        return items
+
+    def restore(self, items: list[dict[str, bytes]]) -> None:
+        """Write back a snapshot taken by snapshot().
+
+        Args:
+            items: Snapshot to restore.
+        """
+        from Foundation import NSData
+
+        self._pasteboard.clearContents()
+        self._provider = None
+        restored = []
+        for saved in items:
+            item = self._item_class.alloc().init()
+            for data_type, data in saved.items():
+                item.setData_forType_(NSData.dataWithBytes_length_(data, len(data)), data_type)
+            restored.append(item)
+        if restored:
+            self._pasteboard.writeObjects_(restored)
+
+
+def default_clipboard(module: Any, lazy: bool = False) -> Any:
+    """Return NativePasteboard if AppKit is available, else pyperclip.
+
+    Args:
+        module: pyperclip module used for the fallback.
+        lazy: Passed to NativePasteboard.
+
+    Returns:
+        A clipboard backend.
+    """
+    try:
+        return NativePasteboard(lazy=lazy)
+    except ImportError:
+        return PyperclipClipboard(module)
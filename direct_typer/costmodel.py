@@ -0,0 +1,284 @@
+"""Calibrated latency model for typing method selection.
+
+Each method's latency is modelled as fixed_ms + per_char_ms * chars and
+fitted by weighted least squares from timing samples. Older samples are
+exponentially forgotten, so live measurements keep the model current.
+
+Usage:
+    python -m direct_typer.costmodel  # calibrate and save to DEFAULT_PATH
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    from direct_typer.typer import DirectTyper, TypingMethod
+
+# Methods the model can choose between
+MODELLED_METHODS = ("pynput", "cgevent", "clipboard")
+
+
+@dataclass
+class MethodCost:
+    """Linear latency model for one typing method.
+
+    Attributes:
+        fixed_ms: Per-call cost in milliseconds.
+        per_char_ms: Per-character cost in milliseconds.
+        stats: Weighted sums [w, sum_x, sum_y, sum_xx, sum_xy] of samples.
+        calibrated: False for an uncalibrated default that has not seen
+            a sample yet.
+    """
+
+    fixed_ms: float
+    per_char_ms: float
+    stats: list[float] = field(default_factory=lambda: [0.0] * 5)
+    calibrated: bool = True
+
+    def predict(self, chars: int) -> float:
+        """Predict the latency of typing chars characters in milliseconds."""
+        return self.fixed_ms + self.per_char_ms * chars
+
+    def add_sample(self, chars: int, elapsed_ms: float, decay: float = 1.0) -> None:
+        """Add a timing sample and refit.
+
+        Args:
+            chars: Number of characters typed.
+            elapsed_ms: Measured latency in milliseconds.
+            decay: Factor applied to previous samples' weight.
+        """
+        w, sx, sy, sxx, sxy = (value * decay for value in self.stats)
+        x, y = float(chars), float(elapsed_ms)
+        self.stats = [w + 1, sx + x, sy + y, sxx + x * x, sxy + x * y]
+        self.calibrated = True
+        self._fit()
+
+    def _fit(self) -> None:
+        """Refit fixed and per-character cost from the weighted sums."""
+        w, sx, sy, sxx, sxy = self.stats
+        if w <= 0:
+            return
+        denominator = w * sxx - sx * sx
+        if abs(denominator) < 1e-9:
+            # All samples at one length: keep the slope, move the intercept
+            self.fixed_ms = max(0.0, sy / w - self.per_char_ms * sx / w)
+            return
+        slope = (w * sxy - sx * sy) / denominator
+        self.per_char_ms = max(0.0, slope)
+        self.fixed_ms = max(0.0, (sy - self.per_char_ms * sx) / w)
+
+
+class CostModel:
+    """Per-method latency predictions used by TypingMethod.AUTO.
+
+    Attributes:
+        costs: MethodCost by method value ("pynput", "cgevent", "clipboard").
+        path: File the model is loaded from and saved to.
+    """
+
+    DEFAULT_PATH = Path.home() / ".config" / "direct-typer" / "cost_model.json"
+
+    # Weight kept by previous samples when a live sample arrives
+    LIVE_DECAY = 0.98
+    # Live samples between automatic saves
+    SAVE_EVERY = 20
+
+    def __init__(
+        self,
+        costs: Optional[dict[str, MethodCost]] = None,
+        path: Optional[Path] = None,
+    ):
+        """Initialize CostModel.
+
+        Args:
+            costs: Initial costs. Missing methods get uncalibrated defaults.
+            path: File to save to. If None, uses DEFAULT_PATH.
+        """
+        self.costs = self.default_costs()
+        self.costs.update(costs or {})
+        self.path = path or self.DEFAULT_PATH
+        self._unsaved = 0
+
+    @staticmethod
+    def default_costs() -> dict[str, MethodCost]:
+        """Return uncalibrated defaults matching a 5 ms typing delay.
+
+        They are only used for estimates such as segmented typing's
+        clipboard cost; best_method does not choose from them.
+        """
+        return {
+            "pynput": MethodCost(fixed_ms=0.0, per_char_ms=5.5, calibrated=False),
+            "cgevent": MethodCost(fixed_ms=0.0, per_char_ms=5.3, calibrated=False),
+            "clipboard": MethodCost(fixed_ms=150.0, per_char_ms=0.01, calibrated=False),
+        }
+
+    def predict(self, method: "TypingMethod", chars: int) -> float:
+        """Predict the latency of a method in milliseconds.
+
+        Args:
+            method: Typing method.
+            chars: Number of characters.
+        """
+        return self.costs[method.value].predict(chars)
+
+    def best_method(self, text: str) -> Optional["TypingMethod"]:
+        """Return the method with the lowest predicted latency for text.
+
+        pynput is only considered for ASCII text, since it cannot type
+        most non-ASCII characters reliably. Until every candidate is
+        calibrated (by calibrate() or a live sample), None is returned
+        and DirectTyper keeps its fixed thresholds, which then also
+        supply the live samples for the uncalibrated methods.
+
+        Args:
+            text: Text to type.
+        """
+        from direct_typer.typer import TypingMethod
+
+        candidates = [TypingMethod.CGEVENT, TypingMethod.CLIPBOARD]
+        if text.isascii():
+            candidates.insert(0, TypingMethod.PYNPUT)
+        if not all(self.costs[method.value].calibrated for method in candidates):
+            return None
+        return min(candidates, key=lambda method: self.predict(method, len(text)))
+
+    def observe(self, method: "TypingMethod", chars: int, elapsed_ms: float) -> None:
+        """Refresh the model from a live timing sample.
+
+        Saves to path every SAVE_EVERY samples. Save errors are ignored,
+        since a stale model on disk only costs some accuracy.
+
+        Args:
+            method: Method that was used.
+            chars: Number of characters typed.
+            elapsed_ms: Measured latency in milliseconds.
+        """
+        cost = self.costs.get(method.value)
+        if cost is None:
+            return
+        cost.add_sample(chars, elapsed_ms, decay=self.LIVE_DECAY)
+        self._unsaved += 1
+        if self._unsaved >= self.SAVE_EVERY:
+            try:
+                self.save()
+            except OSError:
+                pass
+
+    def to_dict(self) -> dict:
+        """Return the model as a JSON-serializable dictionary."""
+        return {
+            "version": 1,
+            "methods": {
+                name: {
+                    "fixed_ms": cost.fixed_ms,
+                    "per_char_ms": cost.per_char_ms,
+                    "stats": cost.stats,
+                    "calibrated": cost.calibrated,
+                }
+                for name, cost in self.costs.items()
+            },
+        }
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        """Write the model to disk.
+
+        Args:
+            path: Destination. If None, uses self.path.
+
+        Returns:
+            The path written.
+        """
+        path = path or self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        self._unsaved = 0
+        return path
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "CostModel":
+        """Load a model from disk, falling back to defaults.
+
+        Args:
+            path: Source file. If None, uses DEFAULT_PATH.
+
+        Returns:
+            The loaded model, or an uncalibrated one if the file is
+            missing or unreadable.
+        """
+        path = path or cls.DEFAULT_PATH
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            costs = {
+                name: MethodCost(
+                    fixed_ms=float(entry["fixed_ms"]),
+                    per_char_ms=float(entry["per_char_ms"]),
+                    stats=[float(v) for v in entry.get("stats", [0.0] * 5)],
+                    calibrated=bool(entry.get("calibrated", True)),
+                )
+                for name, entry in data["methods"].items()
+                if name in MODELLED_METHODS
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            costs = {}
+        return cls(costs, path)
+
+
+def calibrate(
+    typer: "DirectTyper",
+    lengths: Iterable[int] = (1, 10, 40, 100),
+    repeat: int = 3,
+    sample: str = "calibrate ",
+    path: Optional[Path] = None,
+) -> CostModel:
+    """Time each method's fixed and per-character cost and fit a model.
+
+    Every call really types text through the typer's backends, so run
+    this with an empty scratch editor focused.
+
+    Args:
+        typer: Typer to measure.
+        lengths: Text lengths to time.
+        repeat: Calls per method and length.
+        sample: Text repeated to build each calibration string.
+        path: Where the model will be saved. If None, uses DEFAULT_PATH.
+
+    Returns:
+        The fitted model (not yet saved).
+    """
+    from direct_typer.typer import TypingMethod
+
+    costs: dict[str, MethodCost] = {}
+    for name in MODELLED_METHODS:
+        method = TypingMethod(name)
+        cost = MethodCost(fixed_ms=0.0, per_char_ms=0.0)
+        for length in lengths:
+            text = (sample * (length // len(sample) + 1))[:length]
+            for _ in range(repeat):
+                start = time.perf_counter()
+                typer.type(text, method=method)
+                cost.add_sample(length, (time.perf_counter() - start) * 1000)
+        costs[name] = cost
+    return CostModel(costs, path)
+
+
+def main() -> None:
+    """Calibrate against the focused window and save the model."""
+    from direct_typer.typer import DirectTyper
+
+    print("Calibration types sample text. Focus an empty text editor.")
+    for i in range(3, 0, -1):
+        print(f"  {i}...")
+        time.sleep(1)
+
+    model = calibrate(DirectTyper())
+    path = model.save()
+    for name, cost in model.costs.items():
+        print(f"{name:<10} fixed={cost.fixed_ms:8.2f} ms  per_char={cost.per_char_ms:6.3f} ms")
+    print(f"Saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""FLAC エンコーダーモジュール。
+
+録音中に少しずつ FLAC へ圧縮するための、numpy だけで書いた小さな
+エンコーダー。16 ビット PCM を固定長ブロックに区切り、各チャンネルを
+FIXED 予測（0〜4 次）と Rice 符号で可逆圧縮する。LPC は使わないが、
+音声なら WAV の半分程度になる。
+
+encode() には任意の長さのサンプルを何度でも渡せる。ブロックが揃うたびに
+フレームを作るので、finish() で残るのは最後の端数ブロックとヘッダーだけ。
+"""
+
+import time
+
+import numpy as np
+
+# FIXED 予測の最大次数
+MAX_FIXED_ORDER = 4
+# 4 ビットの Rice パラメーターで使える最大値（15 はエスケープ）
+MAX_RICE_PARAM = 14
+
+# フレームヘッダーのサンプリングレート符号
+_SAMPLE_RATE_CODES = {
+    8000: 0b0100,
+    16000: 0b0101,
+    22050: 0b0110,
+    24000: 0b0111,
+    32000: 0b1000,
+    44100: 0b1001,
+    48000: 0b1010,
+    96000: 0b1011,
+}
+
+
+def _crc_table(poly: int, width: int) -> list[int]:
+    """MSB ファーストの CRC テーブルを作る。"""
+    top = 1 << (width - 1)
+    mask = (1 << width) - 1
+    table = []
+    for byte in range(256):
+        crc = byte << (width - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & top else (crc << 1)
+        table.append(crc & mask)
+    return table
+
+
+_CRC8_TABLE = _crc_table(0x07, 8)
+_CRC16_TABLE = _crc_table(0x8005, 16)
+
+
+def crc8(data: bytes) -> int:
+    """フレームヘッダー用の CRC-8（多項式 0x07）を返す。"""
+    crc = 0
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def crc16(data: bytes) -> int:
+    """フレーム用の CRC-16（多項式 0x8005）を返す。"""
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+
+def _utf8_number(value: int) -> bytes:
+    """フレーム番号を FLAC の拡張 UTF-8 形式で符号化する。"""
+    if value < 0x80:
+        return bytes([value])
+    tail = []
+    while True:
+        tail.append(0x80 | (value & 0x3F))
+        value >>= 6
+        # 先頭バイトに残るビット数は続くバイトが 1 つ増えるごとに 1 減る
+        if value < 0x40 >> len(tail):
+            break
+    lead = (0xFF00 >> (len(tail) + 1)) & 0xFF
+    return bytes([lead | value] + tail[::-1])
+
+
+class BitWriter:
+    """ビット列を組み立てる。
+
+    値は 0/1 の uint8 配列として溜め、bytes() でまとめて詰める。
+    """
+
+    def __init__(self):
+        """BitWriterを初期化する。"""
+        self._chunks: list[np.ndarray] = []
+
+    def write(self, value: int, width: int) -> None:
+        """value の下位 width ビットを MSB から書く。"""
+        self.write_array(np.array([value], dtype=np.int64), width)
+
+    def write_array(self, values: np.ndarray, width: int) -> None:
+        """各値の下位 width ビットを MSB から順に書く（負数は 2 の補数）。"""
+        if width == 0 or len(values) == 0:
+            return
+        shifts = np.arange(width - 1, -1, -1, dtype=np.int64)
+        bits = (values.astype(np.int64)[:, None] >> shifts) & 1
+        self._chunks.append(bits.astype(np.uint8).ravel())
+
+    def write_rice(self, folded: np.ndarray, param: int) -> None:
+        """非負の値を Rice 符号で書く。
+
+        各値は商ぶんの 0、区切りの 1、下位 param ビットの順になる。
+        """
+        if len(folded) == 0:
+            return
+        lengths = (folded >> param) + 1 + param
+        ends = np.cumsum(lengths)
+        bits = np.zeros(int(ends[-1]), dtype=np.uint8)
+        # 区切りの 1 と剰余をまとめた param + 1 ビットを各符号の末尾に置く
+        tails = (folded & ((1 << param) - 1)) | (1 << param)
+        for bit in range(param + 1):
+            bits[ends - 1 - bit] = (tails >> bit) & 1
+        self._chunks.append(bits)
+
+    def bytes(self) -> bytes:
+        """0 でバイト境界まで埋めたバイト列を返す。"""
+        if not self._chunks:
+            return b""
+        return np.packbits(np.concatenate(self._chunks)).tobytes()
+
+
+def _rice_cost(folded: np.ndarray) -> tuple[int, int]:
+    """Rice 符号のビット数が最小になるパラメーターとそのビット数を返す。"""
+    best = None
+    for param in range(MAX_RICE_PARAM + 1):
+        bits = len(folded) * (param + 1) + int((folded >> param).sum())
+        if best is None or bits < best[1]:
+            best = (param, bits)
+    return best
+
+
+def _encode_subframe(writer: BitWriter, samples: np.ndarray, bits_per_sample: int) -> None:
+    """1 チャンネル分のサブフレームを書く。"""
+    if np.all(samples == samples[0]):
+        writer.write(0b00000000, 8)  # CONSTANT
+        writer.write(int(samples[0]), bits_per_sample)
+        return
+
+    verbatim_bits = len(samples) * bits_per_sample
+    best = None
+    for order in range(min(MAX_FIXED_ORDER, len(samples) - 1) + 1):
+        residual = np.diff(samples, n=order)
+        folded = (residual << 1) ^ (residual >> 63)
+        param, bits = _rice_cost(folded)
+        bits += order * bits_per_sample + 10  # ウォームアップ + 残差ヘッダー
+        if best is None or bits < best[0]:
+            best = (bits, order, param, folded)
+
+    bits, order, param, folded = best
+    if bits >= verbatim_bits:
+        writer.write(0b00000010, 8)  # VERBATIM
+        writer.write_array(samples, bits_per_sample)
+        return
+
+    writer.write((0b001000 | order) << 1, 8)  # FIXED
+    writer.write_array(samples[:order], bits_per_sample)
+    writer.write(0b00, 2)  # 4 ビットの Rice パラメーター
+    writer.write(0, 4)  # パーティション次数 0
+    writer.write(param, 4)
+    writer.write_rice(folded, param)
+
+
+class FlacEncoder:
+    """録音しながら使う逐次 FLAC エンコーダー。
+
+    Attributes:
+        sample_rate: サンプリングレート（Hz）。
+        channels: チャンネル数。
+        block_size: 1 フレームのサンプル数。
+        encode_time: 符号化にかかった累計時間（秒）。
+    """
+
+    BITS_PER_SAMPLE = 16
+
+    def __init__(self, sample_rate: int, channels: int = 1, block_size: int = 4096):
+        """FlacEncoderを初期化する。
+
+        Args:
+            sample_rate: サンプリングレート（Hz）。
+            channels: チャンネル数（1〜8）。
+            block_size: 1 フレームのサンプル数（16〜65535）。
+
+        Raises:
+            ValueError: 範囲外の値の場合。
+        """
+        if not 1 <= channels <= 8:
+            raise ValueError("FLAC supports 1 to 8 channels")
+        if not 16 <= block_size <= 65535:
+            raise ValueError("block_size must be between 16 and 65535")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.encode_time = 0.0
+        self._frames: list[bytes] = []
+        self._pending = np.empty((0, channels), dtype=np.int64)
+        self._frame_number = 0
+        self._total = 0
+        self._size = 0
+
+    @property
+    def encoded_size(self) -> int:
+        """これまでに出力したフレームのバイト数を返す。"""
+        return self._size
+
+    def encode(self, samples: np.ndarray) -> None:
+        """サンプルを追加し、揃ったブロックをフレームにする。
+
+        Args:
+            samples: (frames, channels) の int16 配列。
+        """
+        start = time.perf_counter()
+        samples = np.asarray(samples, dtype=np.int64).reshape(-1, self.channels)
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        full = len(samples) - len(samples) % self.block_size
+        for offset in range(0, full, self.block_size):
+            self._encode_frame(samples[offset : offset + self.block_size])
+        # 端数は次回に回す（ビューのままだと録音バッファが上書きされうる）
+        self._pending = samples[full:].copy()
+        self.encode_time += time.perf_counter() - start
+
+    def rewind(self, frames: int) -> int:
+        """先頭 frames サンプルに収まるフレームだけを残し、それ以降を捨てる。
+
+        録音の末尾を切り詰める時に、作り直さずに済む部分を残すために使う。
+
+        Args:
+            frames: 残したいサンプル数。
+
+        Returns:
+            実際に残ったサンプル数（block_size の倍数）。続きは encode() で渡す。
+        """
+        blocks = min(len(self._frames), max(frames, 0) // self.block_size)
+        del self._frames[blocks:]
+        self._pending = self._pending[:0]
+        self._frame_number = blocks
+        self._total = blocks * self.block_size
+        self._size = sum(len(frame) for frame in self._frames)
+        return self._total
+
+    def finish(self) -> bytes:
+        """端数ブロックを書き出し、FLAC ファイル全体を返す。"""
+        start = time.perf_counter()
+        if len(self._pending):
+            self._encode_frame(self._pending)
+            self._pending = self._pending[:0]
+        data = self._stream_header() + b"".join(self._frames)
+        self.encode_time += time.perf_counter() - start
+        return data
+
+    def _stream_header(self) -> bytes:
+        """fLaC マーカーと STREAMINFO ブロックを返す。"""
+        writer = BitWriter()
+        writer.write(1, 1)  # 最後のメタデータブロック
+        writer.write(0, 7)  # STREAMINFO
+        writer.write(34, 24)
+        writer.write(self.block_size, 16)  # 最小ブロックサイズ
+        writer.write(self.block_size, 16)  # 最大ブロックサイズ
+        writer.write(0, 24)  # 最小フレームサイズ（不明）
+        writer.write(0, 24)  # 最大フレームサイズ（不明）
+        writer.write(self.sample_rate, 20)
+        writer.write(self.channels - 1, 3)
+        writer.write(self.BITS_PER_SAMPLE - 1, 5)
+        writer.write(self._total, 36)
+        return b"fLaC" + writer.bytes() + bytes(16)  # MD5 は未計算（0）
+
+    def _encode_frame(self, block: np.ndarray) -> None:
+        """1 ブロックをフレームにする。"""
+        header = BitWriter()
+        header.write(0b11111111111110, 14)  # 同期コード
+        header.write(0, 1)
+        header.write(0, 1)  # 固定ブロックサイズ
+        header.write(0b0111, 4)  # ブロックサイズは末尾の 16 ビット
+        rate_code, rate_bits, rate_width = self._sample_rate_code()
+        header.write(rate_code, 4)
+        header.write(self.channels - 1, 4)  # 独立チャンネル
+        header.write(0b100, 3)  # 16 ビット
+        header.write(0, 1)
+        head = bytearray(header.bytes())
+        head += _utf8_number(self._frame_number)
+        head += (len(block) - 1).to_bytes(2, "big")
+        if rate_width:
+            head += rate_bits.to_bytes(rate_width // 8, "big")
+        head.append(crc8(head))
+
+        body = BitWriter()
+        for channel in range(self.channels):
+            _encode_subframe(body, block[:, channel], self.BITS_PER_SAMPLE)
+        frame = bytes(head) + body.bytes()
+        frame += crc16(frame).to_bytes(2, "big")
+
+        self._frames.append(frame)
+        self._frame_number += 1
+        self._total += len(block)
+        self._size += len(frame)
+
+    def _sample_rate_code(self) -> tuple[int, int, int]:
+        """フレームヘッダーのサンプリングレート符号を返す。
+
+        Returns:
+            (符号, 末尾に置く値, その幅（ビット）)。
+        """
+        rate = self.sample_rate
+        if rate in _SAMPLE_RATE_CODES:
+            return _SAMPLE_RATE_CODES[rate], 0, 0
+        if rate % 1000 == 0 and rate // 1000 <= 0xFF:
+            return 0b1100, rate // 1000, 8
+        if rate <= 0xFFFF:
+            return 0b1101, rate, 16
+        return 0b0000, 0, 0  # STREAMINFO を参照
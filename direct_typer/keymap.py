@@ -0,0 +1,115 @@
+"""Character to key code tables for the ASCII fast path.
+
+pynput's Controller.type looks every character up and presses Shift and
+other modifiers as separate events. With a table of character ->
+(key code, modifier flags) built once for the current keyboard layout,
+each ASCII character becomes a single pre-built key down/up pair posted
+through the KeyEventSink.
+
+The macOS table is built with UCKeyTranslate through pynput's Carbon
+bindings (pynput._util.darwin). The layout is re-checked at most every
+check_interval seconds and the table rebuilt when it has changed.
+"""
+
+import threading
+import time
+from typing import Callable, Hashable, Optional
+
+# CGEventFlags modifier masks
+FLAG_SHIFT = 0x20000  # kCGEventFlagMaskShift
+FLAG_OPTION = 0x80000  # kCGEventFlagMaskAlternate
+
+# (UCKeyTranslate modifier key state, CGEventFlags) in order of
+# preference: a character reachable without modifiers never uses Shift.
+_MODIFIER_STATES = (
+    (0, 0),
+    (2, FLAG_SHIFT),  # shiftKey >> 8
+    (8, FLAG_OPTION),  # optionKey >> 8
+    (10, FLAG_SHIFT | FLAG_OPTION),
+)
+
+# Virtual key codes on macOS keyboards
+_KEYCODE_COUNT = 128
+
+KeyStroke = tuple[int, int]
+
+
+def darwin_layout_id() -> Hashable:
+    """Return a value that changes whenever the keyboard layout changes."""
+    from pynput._util.darwin import keycode_context
+
+    with keycode_context() as (keyboard_type, layout_data):
+        return (keyboard_type, hash(layout_data))
+
+
+def build_darwin_keymap() -> dict[str, KeyStroke]:
+    """Map every printable ASCII character to a key code and modifiers.
+
+    Returns:
+        Dictionary of character -> (key code, CGEventFlags).
+    """
+    from pynput._util.darwin import keycode_context, keycode_to_string
+
+    table: dict[str, KeyStroke] = {}
+    with keycode_context() as context:
+        for state, flags in _MODIFIER_STATES:
+            for keycode in range(_KEYCODE_COUNT):
+                char = keycode_to_string(context, keycode, state)
+                if len(char) == 1 and " " <= char <= "~" and char not in table:
+                    table[char] = (keycode, flags)
+    return table
+
+
+class KeymapCache:
+    """Keyboard table for the current layout, rebuilt on layout changes."""
+
+    def __init__(
+        self,
+        layout_id: Callable[[], Hashable] = darwin_layout_id,
+        build: Callable[[], dict[str, KeyStroke]] = build_darwin_keymap,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize KeymapCache.
+
+        Args:
+            layout_id: Returns an identifier of the current layout.
+            build: Builds the table for the current layout.
+            check_interval: Minimum time between layout checks in seconds.
+            clock: Monotonic clock.
+        """
+        self._layout_id = layout_id
+        self._build = build
+        self.check_interval = check_interval
+        self._clock = clock
+        self._layout: Optional[Hashable] = None
+        self._table: dict[str, KeyStroke] = {}
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Force a layout check on the next get()."""
+        with self._lock:
+            self._checked_at = None
+
+    def get(self) -> dict[str, KeyStroke]:
+        """Return the table for the current layout.
+
+        Returns an empty table if the layout cannot be read (e.g. outside
+        macOS), so callers fall back to pynput for every character.
+        """
+        with self._lock:
+            now = self._clock()
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._table
+            self._checked_at = now
+            try:
+                layout = self._layout_id()
+                if layout != self._layout or not self._table:
+                    self._table = self._build()
+                    self._layout = layout
+            except Exception:
+                # No usable layout: pynput handles every character
+                self._table = {}
+                self._layout = None
+            return self._table
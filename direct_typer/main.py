@@ -16,9 +16,11 @@ from dotenv import load_dotenv
 from pynput import keyboard
 
 from direct_typer.postprocessor import PostProcessor
-from direct_typer.recorder import AudioRecorder
+from direct_typer.recorder import AudioRecorder, RecordingConfig
 from direct_typer.transcriber import Transcriber
 from direct_typer.typer import DirectTyper, TypingMethod
+from direct_typer.vad import VadConfig
+from direct_typer.worker import TypingJob, TypingWorker
 
 
 def _parse_hotkey(hotkey_str: str) -> set[keyboard.Key | keyboard.KeyCode]:
@@ -113,6 +115,28 @@ def _format_hotkey(keys: set[keyboard.Key | keyboard.KeyCode]) -> str:
     return "+".join(key_names)
 
 
+def _vad_config_from_env() -> VadConfig:
+    """環境変数 VAD_ENERGY_DB から VAD 設定を作る。
+
+    VAD_ENERGY_DB は発話とみなす音量（dBFS）。入力の小さいマイクでは
+    下げる。弱いフレームの下限も同じだけずらす。不正な値は無視する。
+
+    Returns:
+        VAD 設定。
+    """
+    default = VadConfig()
+    value = os.getenv("VAD_ENERGY_DB")
+    if not value:
+        return default
+    try:
+        energy_db = float(value)
+    except ValueError:
+        print(f"[Warning] Invalid VAD_ENERGY_DB: {value!r}, using {default.energy_db}")
+        return default
+    offset = default.energy_db - default.weak_energy_db
+    return VadConfig(energy_db=energy_db, weak_energy_db=energy_db - offset)
+
+
 class VoiceCodeApp(rumps.App):
     """音声入力ツールのメインクラス（メニューバーアプリ）。"""
 
@@ -133,12 +157,26 @@ class VoiceCodeApp(rumps.App):
         load_dotenv()
 
         self._hotkey = _parse_hotkey(os.getenv("HOTKEY", "f15"))
-        self._recorder = AudioRecorder()
+        debug_dir = os.getenv("DEBUG_AUDIO_DIR")
+        # 無音を除いて送信し、発話がなければ送信しない（_stop_and_process で判定）
+        config = RecordingConfig(
+            vad=_vad_config_from_env(), debug_dir=Path(debug_dir) if debug_dir else None
+        )
+        if os.getenv("WARM_STREAM") == "1":
+            # マイクを開いたままにして、押した直後の音の欠けをなくす
+            config.warm = True
+            config.pre_roll_ms = int(os.getenv("PRE_ROLL_MS", str(config.pre_roll_ms)))
+        self._recorder = AudioRecorder(config)
+        self._recorder.open()
         self._transcriber = Transcriber()
         self._postprocessor = PostProcessor()
         # CGEventやpynputはメニューバーアプリのコンテキストで問題が発生する可能性があるため
         # 常にクリップボード方式を使用する
-        self._typer = DirectTyper(default_method=TypingMethod.CLIPBOARD)
+        # 入力は専用スレッドで行い、メインの実行ループは rumps が回しているので、
+        # ペースト内容を遅延提供して読み取り完了まで待つ
+        self._typer = DirectTyper(default_method=TypingMethod.CLIPBOARD, lazy_clipboard=True)
+        # 入力はリスナースレッドをブロックしないよう専用スレッドで順番に実行する
+        self._typing_worker = TypingWorker(self._typer)
 
         self._current_keys: set = set()
         self._processing = False
@@ -182,6 +220,9 @@ class VoiceCodeApp(rumps.App):
     @rumps.clicked("終了")
     def quit_app(self, _):
         """アプリを終了する。"""
+        self._typing_worker.cancel_all()
+        self._typing_worker.shutdown(wait=False)
+        self._recorder.close()
         rumps.quit_application()
 
     def _on_press(self, key: keyboard.Key | keyboard.KeyCode) -> None:
@@ -241,16 +282,22 @@ class VoiceCodeApp(rumps.App):
         self._processing = True
         self.title = self.ICON_PROCESSING
         self._play_sound(self.SOUND_STOP)
-        audio_path: Path | None = None
 
         try:
-            audio_path = self._recorder.stop()
+            audio = self._recorder.stop()
+            if not audio.has_speech:
+                # 発話がなければ文字起こしAPIを呼ばない
+                print("[Warning] No speech detected")
+                self.title = self.ICON_IDLE
+                self._play_sound(self.SOUND_ERROR)
+                return
+
             print("\n" + "-" * 50)
             print("Processing...")
             print("-" * 50)
 
             # 文字起こし
-            transcribed_text = self._transcriber.transcribe(audio_path)
+            transcribed_text = self._transcriber.transcribe(audio)
 
             if not transcribed_text.strip():
                 print("[Warning] No speech detected")
@@ -265,18 +312,9 @@ class VoiceCodeApp(rumps.App):
             print(f"[DEBUG] processed_text: '{processed_text}' (length: {len(processed_text)})")
             print(f"[DEBUG] default_method: {self._typer.default_method}")
 
-            # DirectTyperで直接入力
-            self._typer.type(processed_text)
-            print(f"\n[Typed] {processed_text}")
-            print("[Done]")
-
-            self.title = self.ICON_IDLE
-            self._play_sound(self.SOUND_SUCCESS)
-
-            hotkey_display = self._format_hotkey_display()
-            print("\n" + "=" * 50)
-            print(f"Ready. Press {hotkey_display} to start recording")
-            print("=" * 50)
+            # DirectTyperで直接入力（入力スレッドに渡してすぐ戻る）
+            job = self._typing_worker.submit(processed_text)
+            job.future.add_done_callback(lambda _: self._on_typed(job))
 
         except Exception as e:
             print(f"[Error] Processing failed: {e}")
@@ -284,16 +322,37 @@ class VoiceCodeApp(rumps.App):
             self._play_sound(self.SOUND_ERROR)
 
         finally:
-            # 一時ファイルを削除
-            if audio_path and audio_path.exists():
-                try:
-                    audio_path.unlink()
-                    print(f"[Cleanup] Deleted: {audio_path}")
-                except Exception as e:
-                    print(f"[Warning] Failed to delete temp file: {e}")
-
             self._processing = False
 
+    def _on_typed(self, job: TypingJob) -> None:
+        """入力ジョブ完了時のコールバック（入力スレッドから呼ばれる）。
+
+        Args:
+            job: 完了した入力ジョブ
+        """
+        if job.future.cancelled() or job.cancel_requested:
+            print("[Cancelled] Typing cancelled")
+            return
+
+        error = job.future.exception()
+        if error is not None:
+            print(f"[Error] Typing failed: {error}")
+            if not self._recorder.is_recording:
+                self.title = self.ICON_IDLE
+            self._play_sound(self.SOUND_ERROR)
+            return
+
+        print(f"\n[Typed] {job.text}")
+        print("[Done]")
+        if not self._recorder.is_recording:
+            self.title = self.ICON_IDLE
+        self._play_sound(self.SOUND_SUCCESS)
+
+        hotkey_display = self._format_hotkey_display()
+        print("\n" + "=" * 50)
+        print(f"Ready. Press {hotkey_display} to start recording")
+        print("=" * 50)
+
 
 def main() -> None:
     """エントリポイント。"""
@@ -0,0 +1,288 @@
+"""Deadline-based pacing for keyboard event posting."""
+
+import time
+from concurrent.futures import CancelledError
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class PacingStats:
+    """Throughput summary for one paced typing run.
+
+    Attributes:
+        units: Number of units (characters or chunks) paced.
+        requested_rate: Target rate in units per second, or None if unpaced.
+        elapsed: Wall time from start to the last tick in seconds.
+        slept: Time spent sleeping in seconds.
+    """
+
+    units: int
+    requested_rate: Optional[float]
+    elapsed: float
+    slept: float
+
+    @property
+    def achieved_rate(self) -> float:
+        """Achieved rate in units per second."""
+        if self.elapsed <= 0:
+            return float("inf") if self.units else 0.0
+        return self.units / self.elapsed
+
+    @property
+    def active(self) -> float:
+        """Time spent working (not sleeping) in seconds."""
+        return max(self.elapsed - self.slept, 0.0)
+
+
+class AdaptiveRateController:
+    """Learn the highest typing rate a target application keeps up with.
+
+    Starts at start_rate and uses additive-increase/multiplicative-decrease
+    on feedback from each posted unit. A unit whose posting took longer
+    than latency_budget means the event queue is backing up (the target
+    has not consumed earlier events), so the rate is cut by backoff and
+    that rate becomes a ceiling for the rest of the session. After
+    window consecutive units within budget, the rate grows by increase,
+    staying below the ceiling (or max_rate before any backoff).
+
+    Posting latency only shows backpressure once posting itself blocks.
+    CGEventPost returns before the target has read the event, so a slow
+    target may never trip the budget. Start from a rate known to work
+    (DirectTyper uses its delay_ms) rather than from max_rate.
+    """
+
+    def __init__(
+        self,
+        max_rate: float = 1000.0,
+        start_rate: Optional[float] = None,
+        min_rate: float = 20.0,
+        latency_budget: float = 0.004,
+        backoff: float = 0.5,
+        increase: float = 1.1,
+        window: int = 20,
+    ):
+        """Initialize AdaptiveRateController.
+
+        Args:
+            max_rate: Maximum rate in units per second.
+            start_rate: Rate to start from in units per second, clamped
+                to [min_rate, max_rate]. If None, starts at max_rate.
+            min_rate: Minimum rate in units per second.
+            latency_budget: Posting time per unit above which the target
+                is considered backed up, in seconds.
+            backoff: Factor applied to the rate on backpressure.
+            increase: Factor applied to the rate after a clean window.
+            window: Number of clean units required before increasing.
+
+        Raises:
+            ValueError: If the rate bounds or factors are invalid.
+        """
+        if not 0 < min_rate <= max_rate:
+            raise ValueError(f"Invalid rate bounds: min={min_rate}, max={max_rate}")
+        if not 0 < backoff < 1 or increase <= 1:
+            raise ValueError(f"Invalid factors: backoff={backoff}, increase={increase}")
+
+        self.max_rate = max_rate
+        self.start_rate = min(max(start_rate or max_rate, min_rate), max_rate)
+        self.min_rate = min_rate
+        self.latency_budget = latency_budget
+        self.backoff = backoff
+        self.increase = increase
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything learned and start over at start_rate."""
+        self._rate = self.start_rate
+        self._ceiling = self.max_rate
+        self._clean = 0
+        self._learned: Optional[float] = None
+        self.backoffs = 0
+
+    @property
+    def rate(self) -> float:
+        """Current target rate in units per second."""
+        return self._rate
+
+    @property
+    def learned_rate(self) -> Optional[float]:
+        """Highest rate sustained for a full window, or None if none yet."""
+        return self._learned
+
+    def observe(self, latency: float, units: int = 1) -> None:
+        """Feed back how long posting the last units took.
+
+        Args:
+            latency: Time spent posting the units, in seconds.
+            units: Number of units posted.
+        """
+        if units <= 0:
+            return
+
+        if latency / units > self.latency_budget:
+            self._ceiling = self._rate
+            self._rate = max(self.min_rate, self._rate * self.backoff)
+            self._clean = 0
+            if self._learned is not None and self._learned >= self._ceiling:
+                self._learned = self._rate
+            self.backoffs += 1
+            return
+
+        self._clean += units
+        if self._clean >= self.window:
+            self._clean = 0
+            if self._learned is None or self._rate > self._learned:
+                self._learned = self._rate
+            # Stay just under the rate that last caused backpressure
+            limit = self.max_rate if self.backoffs == 0 else self._ceiling * 0.9
+            self._rate = max(self._rate, min(limit, self._rate * self.increase))
+
+
+class PacingScheduler:
+    """Schedule typing units against absolute deadlines.
+
+    Instead of sleeping a fixed delay after every unit, each unit gets a
+    deadline of start + n / rate on a monotonic clock. Waits shorter than
+    MIN_SLEEP are merged into the next one, and time lost to timer slack
+    or slow posting is made up by skipping sleeps until the schedule is
+    met again. Catch-up is limited to MAX_BURST units so a long stall
+    does not turn into a flood of events.
+
+    With a controller, the time spent between ticks (posting the unit)
+    is reported to it and the rate follows the controller's rate, up to
+    max_rate if one is given.
+
+    With a cancelled callback, check_cancelled() raises CancelledError
+    once it returns True. Typing loops call it before posting each unit,
+    so a run stops before its next unit and a run that already posted
+    everything is never reported as cancelled.
+    """
+
+    # Waits shorter than this are deferred and merged with the next unit
+    MIN_SLEEP = 0.001
+    # Maximum number of units that may be sent back to back to catch up
+    MAX_BURST = 8
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Optional[Callable[[float], None]] = None,
+        controller: Optional[AdaptiveRateController] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+        max_rate: Optional[float] = None,
+    ):
+        """Initialize PacingScheduler.
+
+        Args:
+            rate: Target rate in units per second. None or 0 disables pacing.
+                Ignored when controller is given.
+            clock: Monotonic clock returning seconds.
+            sleep: Sleep function taking seconds. Defaults to time.sleep.
+            controller: Adaptive controller that sets the rate from
+                posting latency feedback.
+            cancelled: Returns True when the run should stop.
+            max_rate: Upper bound on the controller's rate in units per
+                second. None means no bound.
+
+        Raises:
+            ValueError: If rate is negative.
+        """
+        if rate is not None and rate < 0:
+            raise ValueError(f"rate must not be negative, got {rate}")
+        self.controller = controller
+        self.max_rate = max_rate
+        self.rate = self._controller_rate() if controller else (rate or None)
+        self._clock = clock
+        self._sleep = sleep or time.sleep
+        self._cancelled = cancelled
+        self._start: Optional[float] = None
+        self._deadline = 0.0
+        self._last = 0.0
+        self._units = 0
+        self._slept = 0.0
+
+    @classmethod
+    def from_delay_ms(cls, delay_ms: float, **kwargs) -> "PacingScheduler":
+        """Create a scheduler from a per-unit delay.
+
+        Args:
+            delay_ms: Delay per unit in milliseconds. 0 disables pacing.
+            **kwargs: Passed through to the constructor.
+
+        Returns:
+            A scheduler targeting 1000 / delay_ms units per second.
+        """
+        rate = 1000.0 / delay_ms if delay_ms > 0 else None
+        return cls(rate, **kwargs)
+
+    def start(self) -> None:
+        """Start (or restart) the schedule at the current time."""
+        self._start = self._clock()
+        self._deadline = self._start
+        self._last = self._start
+        self._units = 0
+        self._slept = 0.0
+
+    def _controller_rate(self) -> float:
+        """Return the controller's rate, bounded by max_rate."""
+        if self.max_rate is None:
+            return self.controller.rate
+        return min(self.controller.rate, self.max_rate)
+
+    def check_cancelled(self) -> None:
+        """Stop the run if it was cancelled. Call before posting a unit.
+
+        Raises:
+            CancelledError: If the cancelled callback returns True.
+        """
+        if self._cancelled is not None and self._cancelled():
+            raise CancelledError()
+
+    def tick(self, units: int = 1) -> None:
+        """Record that units were sent and wait until the next deadline.
+
+        Args:
+            units: Number of units just sent.
+        """
+        if self._start is None:
+            self.start()
+        self._units += units
+        now = self._clock()
+
+        if self.controller is not None:
+            self.controller.observe(now - self._last, units)
+            self.rate = self._controller_rate()
+
+        if self.rate is None:
+            self._last = now
+            return
+
+        interval = 1.0 / self.rate
+        # Bound catch-up so a stall does not release an unbounded burst
+        self._deadline = max(self._deadline, now - self.MAX_BURST * interval)
+        self._deadline += units * interval
+
+        remaining = self._deadline - now
+        if remaining >= self.MIN_SLEEP:
+            self._sleep(remaining)
+            after = self._clock()
+            self._slept += after - now
+            now = after
+        self._last = now
+
+    def stats(self) -> PacingStats:
+        """Return throughput statistics for the run so far.
+
+        Returns:
+            PacingStats with achieved versus requested rate.
+        """
+        if self._start is None:
+            return PacingStats(0, self.rate, 0.0, 0.0)
+        return PacingStats(
+            units=self._units,
+            requested_rate=self.rate,
+            elapsed=self._last - self._start,
+            slept=self._slept,
+        )
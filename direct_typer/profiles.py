@@ -0,0 +1,356 @@
+"""Per-application typing profiles.
+
+Applications differ in how fast they accept synthetic input: a terminal
+may drop batched CGEvent chunks that a native text view handles fine,
+and Electron apps read the clipboard slowly. ProfileStore keeps a small
+latency model and failure count per method for each application, keyed
+by the frontmost application's bundle identifier, and derives the
+TypingOptions (method, delay, chunk size) to use there.
+
+Profiles are learned from the timing of each call and from failures
+(exceptions, or report_failure() when the caller notices dropped input)
+and are saved to DEFAULT_PATH.
+"""
+
+import json
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Protocol
+
+from direct_typer.costmodel import MODELLED_METHODS, MethodCost
+
+if TYPE_CHECKING:
+    from direct_typer.typer import TypingMethod, TypingOptions
+
+
+class AppIdentityProvider(Protocol):
+    """Source of the identity of the application receiving input."""
+
+    def frontmost_app_id(self) -> Optional[str]:
+        """Return the frontmost application's identifier, or None."""
+
+
+class FrontmostAppIdentity:
+    """AppIdentityProvider using NSWorkspace's frontmost application.
+
+    Returns None when AppKit is not available.
+    """
+
+    def __init__(self):
+        """Initialize FrontmostAppIdentity."""
+        self._workspace = None
+        self._available: Optional[bool] = None
+
+    def frontmost_app_id(self) -> Optional[str]:
+        """Return the bundle identifier of the frontmost application."""
+        if self._available is None:
+            try:
+                from AppKit import NSWorkspace
+
+                self._workspace = NSWorkspace.sharedWorkspace()
+                self._available = True
+            except ImportError:
+                self._available = False
+        if not self._available:
+            return None
+        app = self._workspace.frontmostApplication()
+        if app is None:
+            return None
+        return app.bundleIdentifier()
+
+
+class StaticAppIdentity:
+    """AppIdentityProvider that reports a fixed, settable application."""
+
+    def __init__(self, app_id: Optional[str] = None):
+        """Initialize StaticAppIdentity.
+
+        Args:
+            app_id: Identifier to report.
+        """
+        self.app_id = app_id
+
+    def frontmost_app_id(self) -> Optional[str]:
+        """Return the configured identifier."""
+        return self.app_id
+
+
+@dataclass
+class MethodRecord:
+    """Latency model and reliability of one method in one application.
+
+    Attributes:
+        cost: Latency model fitted from this application's calls.
+        calls: Number of calls made.
+        failures: Number of calls that failed.
+    """
+
+    cost: MethodCost = field(default_factory=lambda: MethodCost(fixed_ms=0.0, per_char_ms=0.0))
+    calls: int = 0
+    failures: int = 0
+
+    @property
+    def failure_rate(self) -> float:
+        """Fraction of calls that failed."""
+        return self.failures / self.calls if self.calls else 0.0
+
+
+@dataclass
+class AppProfile:
+    """Learned typing settings for one application.
+
+    Attributes:
+        methods: MethodRecord by method value.
+        delay_ms: Learned delay, or None to use the default.
+        chunk_size: Learned CGEvent chunk size, or None to use the default.
+            Only learned from calls that set TypingOptions.chunk_size.
+    """
+
+    methods: dict[str, MethodRecord] = field(default_factory=dict)
+    delay_ms: Optional[float] = None
+    chunk_size: Optional[int] = None
+
+    def best_method(self, text: str) -> Optional["TypingMethod"]:
+        """Return the fastest reliable method measured for text, if any.
+
+        The methods competing for text are pynput (ASCII text only),
+        cgevent and clipboard. A method that fails at least
+        ProfileStore.MAX_FAILURE_RATE of its calls is ruled out. A
+        choice is only made once every other competitor has at least
+        ProfileStore.MIN_CALLS calls; until then None is returned and
+        AUTO keeps its usual selection, so one well-measured method
+        cannot win just because the others were never tried.
+
+        Args:
+            text: Text to type.
+        """
+        from direct_typer.typer import TypingMethod
+
+        candidates = []
+        for name in MODELLED_METHODS:
+            if name == "pynput" and not text.isascii():
+                continue
+            record = self.methods.get(name)
+            if record is not None and record.failure_rate >= ProfileStore.MAX_FAILURE_RATE:
+                continue
+            if record is None or record.calls < ProfileStore.MIN_CALLS:
+                return None
+            candidates.append((record.cost.predict(len(text)), name))
+        if not candidates:
+            return None
+        return TypingMethod(min(candidates)[1])
+
+
+class ProfileStore:
+    """Typing profiles by application identifier.
+
+    Attributes:
+        apps: AppProfile by application identifier.
+        path: File the profiles are loaded from and saved to.
+    """
+
+    DEFAULT_PATH = Path.home() / ".config" / "direct-typer" / "profiles.json"
+
+    # Calls before a method's measurements are trusted
+    MIN_CALLS = 3
+    # Methods failing more often than this are not chosen
+    MAX_FAILURE_RATE = 0.2
+    # Delay growth per failure and its upper bound in milliseconds
+    FAILURE_BACKOFF = 1.5
+    MAX_DELAY_MS = 50.0
+    # Smallest learned chunk size (iter_chunks needs room for a surrogate pair)
+    MIN_CHUNK_SIZE = 2
+    # Weight kept by previous samples when a new one arrives
+    DECAY = 0.95
+    # Observations between automatic saves
+    SAVE_EVERY = 20
+
+    def __init__(self, apps: Optional[dict[str, AppProfile]] = None, path: Optional[Path] = None):
+        """Initialize ProfileStore.
+
+        Args:
+            apps: Initial profiles.
+            path: File to save to. If None, uses DEFAULT_PATH.
+        """
+        self.apps = apps or {}
+        self.path = path or self.DEFAULT_PATH
+        self._unsaved = 0
+
+    def options_for(self, app_id: str, base: "TypingOptions", text: str) -> "TypingOptions":
+        """Return the options to type text with in an application.
+
+        The learned best method only replaces an AUTO method; learned
+        delay and chunk size always apply.
+
+        Args:
+            app_id: Application identifier.
+            base: Default options.
+            text: Text about to be typed.
+        """
+        from direct_typer.typer import TypingMethod
+
+        profile = self.apps.get(app_id)
+        if profile is None:
+            return base
+        changes: dict = {}
+        if base.method == TypingMethod.AUTO:
+            method = profile.best_method(text)
+            if method is not None:
+                changes["method"] = method
+        if profile.delay_ms is not None:
+            changes["delay_ms"] = profile.delay_ms
+        if profile.chunk_size is not None:
+            changes["chunk_size"] = profile.chunk_size
+        return replace(base, **changes) if changes else base
+
+    def _record(self, app_id: str, method: "TypingMethod") -> Optional[MethodRecord]:
+        """Return the record for a method in an application, creating it."""
+        if method.value not in MODELLED_METHODS:
+            return None
+        profile = self.apps.setdefault(app_id, AppProfile())
+        return profile.methods.setdefault(method.value, MethodRecord())
+
+    def observe(self, app_id: str, method: "TypingMethod", chars: int, elapsed_ms: float) -> None:
+        """Learn from a successful call.
+
+        Args:
+            app_id: Application identifier.
+            method: Method that was used.
+            chars: Number of characters typed.
+            elapsed_ms: Measured latency in milliseconds.
+        """
+        record = self._record(app_id, method)
+        if record is None:
+            return
+        record.calls += 1
+        record.cost.add_sample(chars, elapsed_ms, decay=self.DECAY)
+        self._changed()
+
+    def record_failure(
+        self,
+        app_id: str,
+        method: "TypingMethod",
+        options: "TypingOptions",
+        new_call: bool = True,
+    ) -> None:
+        """Learn from a failed call.
+
+        Keystroke methods get a longer delay, and CGEvent typing with a
+        chunk size additionally a smaller one (down to MIN_CHUNK_SIZE),
+        the next time they type in this application. Chunk size learning
+        only starts once a call sets TypingOptions.chunk_size (e.g. via
+        DirectTyper.options): without one, CGEvent typing already posts
+        one grapheme cluster per event, which is as slow as it gets.
+
+        Args:
+            app_id: Application identifier.
+            method: Method that failed.
+            options: Options the call used.
+            new_call: False if the call was already recorded by observe()
+                and turned out to have failed later.
+        """
+        from direct_typer.typer import TypingMethod
+
+        record = self._record(app_id, method)
+        if record is None:
+            return
+        if new_call:
+            record.calls += 1
+        record.failures += 1
+        profile = self.apps[app_id]
+        if method in (TypingMethod.PYNPUT, TypingMethod.CGEVENT):
+            delay = max(options.delay_ms, 1.0) * self.FAILURE_BACKOFF
+            profile.delay_ms = min(delay, self.MAX_DELAY_MS)
+        if method == TypingMethod.CGEVENT and options.chunk_size is not None:
+            # Without a chunk size CGEvent typing already posts single clusters
+            profile.chunk_size = max(self.MIN_CHUNK_SIZE, options.chunk_size // 2)
+        self._changed()
+
+    def _changed(self) -> None:
+        """Save every SAVE_EVERY changes, ignoring write errors."""
+        self._unsaved += 1
+        if self._unsaved >= self.SAVE_EVERY:
+            try:
+                self.save()
+            except OSError:
+                pass
+
+    def to_dict(self) -> dict:
+        """Return the profiles as a JSON-serializable dictionary."""
+        return {
+            "version": 1,
+            "apps": {
+                app_id: {
+                    "delay_ms": profile.delay_ms,
+                    "chunk_size": profile.chunk_size,
+                    "methods": {
+                        name: {
+                            "fixed_ms": record.cost.fixed_ms,
+                            "per_char_ms": record.cost.per_char_ms,
+                            "stats": record.cost.stats,
+                            "calls": record.calls,
+                            "failures": record.failures,
+                        }
+                        for name, record in profile.methods.items()
+                    },
+                }
+                for app_id, profile in self.apps.items()
+            },
+        }
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        """Write the profiles to disk.
+
+        Args:
+            path: Destination. If None, uses self.path.
+
+        Returns:
+            The path written.
+        """
+        path = path or self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        self._unsaved = 0
+        return path
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "ProfileStore":
+        """Load profiles from disk.
+
+        Args:
+            path: Source file. If None, uses DEFAULT_PATH.
+
+        Returns:
+            The loaded profiles, or an empty store if the file is missing
+            or unreadable.
+        """
+        path = path or cls.DEFAULT_PATH
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            apps = {}
+            for app_id, entry in data["apps"].items():
+                methods = {
+                    name: MethodRecord(
+                        cost=MethodCost(
+                            fixed_ms=float(method["fixed_ms"]),
+                            per_char_ms=float(method["per_char_ms"]),
+                            stats=[float(v) for v in method.get("stats", [0.0] * 5)],
+                        ),
+                        calls=int(method.get("calls", 0)),
+                        failures=int(method.get("failures", 0)),
+                    )
+                    for name, method in entry.get("methods", {}).items()
+                    if name in MODELLED_METHODS
+                }
+                delay_ms = entry.get("delay_ms")
+                chunk_size = entry.get("chunk_size")
+                apps[app_id] = AppProfile(
+                    methods=methods,
+                    delay_ms=float(delay_ms) if delay_ms is not None else None,
+                    chunk_size=(
+                        max(cls.MIN_CHUNK_SIZE, int(chunk_size)) if chunk_size is not None else None
+                    ),
+                )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            apps = {}
+        return cls(apps, path)
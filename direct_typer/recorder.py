@@ -1,17 +1,23 @@
 """録音機能モジュール。
 
-マイクから音声をキャプチャし、一時ファイルに保存する。
+マイクから音声をキャプチャし、メモリ上の WAV として返す。
 """
 
-import tempfile
+import io
+import struct
+import threading
 import time
-import wave
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 
 import numpy as np
 import sounddevice as sd
 
+from direct_typer.audiobuffer import SampleBuffer
+from direct_typer.flac import FlacEncoder
+from direct_typer.vad import VadConfig, VadResult, first_speech_frame, trim_silence
+
 
 @dataclass
 class RecordingConfig:
@@ -21,21 +27,224 @@ class RecordingConfig:
         sample_rate: サンプリングレート（Hz）。
         channels: チャンネル数。
         dtype: 音声データの型。
-        max_duration: 最大録音時間（秒）。
+        max_duration: 最大録音時間（秒）。バッファはこの長さで事前確保する。
+        raw: numpy 配列を介さない RawInputStream を使うかどうか。
+        ring: リングモード。max_duration で止めず、直近 max_duration 秒を保持する。
+        warm: ウォームモード。入力ストリームを開いたままにし、待機中も録り続ける。
+            start() は開始位置を記録するだけなので、デバイスを開く時間がかからない。
+        pre_roll_ms: ウォームモードで start() より前から含める長さ（ミリ秒）。
+        codec: アップロード形式。"flac" は録音しながら圧縮する。"wav" は無圧縮。
+        vad: 無音を除く VAD の設定。None の場合は録音全体を返す。
+        debug_dir: 録音を WAV ファイルとして保存するディレクトリ（デバッグ用）。
     """
 
     sample_rate: int = 16000
     channels: int = 1
     dtype: str = "int16"
     max_duration: int = 60
+    raw: bool = False
+    ring: bool = False
+    warm: bool = False
+    pre_roll_ms: int = 300
+    codec: str = "flac"
+    vad: VadConfig | None = None
+    debug_dir: Path | None = None
+
+
+def wav_header(frames: int, channels: int, sample_rate: int, sample_width: int = 2) -> bytes:
+    """PCM WAV ファイルの 44 バイトのヘッダーを作る。
+
+    Args:
+        frames: フレーム数。
+        channels: チャンネル数。
+        sample_rate: サンプリングレート（Hz）。
+        sample_width: 1 サンプルのバイト数。
+
+    Returns:
+        ヘッダーのバイト列。
+    """
+    data_size = frames * channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        channels,
+        sample_rate,
+        sample_rate * channels * sample_width,
+        channels * sample_width,
+        sample_width * 8,
+        b"data",
+        data_size,
+    )
+
+
+class WavReader(io.RawIOBase):
+    """ヘッダーとサンプル配列をつなげて 1 つの WAV ファイルとして読むストリーム。
+
+    サンプルは memoryview 経由で読むため、WAV 全体のバイト列は作らない。
+    """
+
+    def __init__(self, header: bytes, samples: np.ndarray):
+        """WavReaderを初期化する。
+
+        Args:
+            header: WAV ヘッダー。
+            samples: C 連続のサンプル配列。
+        """
+        super().__init__()
+        self._parts = (memoryview(header), memoryview(samples).cast("B"))
+        self._size = sum(len(part) for part in self._parts)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        """読み込み可能なので True を返す。"""
+        return True
+
+    def seekable(self) -> bool:
+        """シーク可能なので True を返す。"""
+        return True
+
+    def tell(self) -> int:
+        """現在の読み込み位置を返す。"""
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """読み込み位置を移動する。"""
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(base + offset, 0)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        """buffer に読み込み、読み込んだバイト数を返す。"""
+        out = memoryview(buffer).cast("B")
+        written = 0
+        offset = self._pos
+        for part in self._parts:
+            if offset >= len(part):
+                offset -= len(part)
+                continue
+            count = min(len(part) - offset, len(out) - written)
+            out[written : written + count] = part[offset : offset + count]
+            written += count
+            offset = 0
+            if written == len(out):
+                break
+        self._pos += written
+        return written
+
+
+@dataclass(frozen=True)
+class RecordedAudio:
+    """メモリ上の録音結果。
+
+    samples は録音バッファのビューなので、次の録音を開始するまでに
+    使い終えること。ウォームモードでは停止後もバッファへの書き込みが
+    続くため、コピーを持つ。
+
+    Attributes:
+        samples: (frames, channels) のサンプル配列。
+        sample_rate: サンプリングレート（Hz）。
+        name: WAV としてアップロードする時のファイル名。
+        encoded: 録音中に圧縮した FLAC データ。None の場合は WAV を送る。
+        encode_time: 圧縮にかかった時間（秒）。
+        has_speech: 発話が含まれているかどうか。False なら送る必要はない。
+        removed_ratio: VAD で除いた割合（0〜1）。
+    """
+
+    samples: np.ndarray
+    sample_rate: int
+    name: str = "recording.wav"
+    encoded: bytes | None = None
+    encode_time: float = 0.0
+    has_speech: bool = True
+    removed_ratio: float = 0.0
+
+    @property
+    def channels(self) -> int:
+        """チャンネル数を返す。"""
+        return self.samples.shape[1]
+
+    @property
+    def duration(self) -> float:
+        """録音時間（秒）を返す。"""
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def header(self) -> bytes:
+        """WAV ヘッダーを返す。"""
+        return wav_header(
+            len(self.samples), self.channels, self.sample_rate, self.samples.dtype.itemsize
+        )
+
+    @property
+    def size(self) -> int:
+        """WAV ファイルとしてのバイト数を返す。"""
+        return len(self.header) + self.samples.nbytes
+
+    @property
+    def upload_name(self) -> str:
+        """アップロード時のファイル名を返す。"""
+        if self.encoded is not None:
+            return str(Path(self.name).with_suffix(".flac"))
+        return self.name
+
+    @property
+    def upload_size(self) -> int:
+        """アップロードするバイト数を返す。"""
+        return len(self.encoded) if self.encoded is not None else self.size
+
+    def open(self) -> WavReader:
+        """WAV ファイルとして読むストリームを返す。"""
+        return WavReader(self.header, self.samples)
+
+    def payload(self) -> tuple[str, bytes | WavReader]:
+        """アップロードする (ファイル名, 内容) を返す。圧縮済みなら FLAC を使う。"""
+        if self.encoded is not None:
+            return self.upload_name, self.encoded
+        return self.name, self.open()
+
+    def save(self, path: Path) -> Path:
+        """WAV ファイルとして保存する（デバッグ用）。
+
+        Args:
+            path: 保存先。
+
+        Returns:
+            保存したファイルのパス。
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.header)
+            f.write(memoryview(self.samples).cast("B"))
+        return path
 
 
 class AudioRecorder:
     """音声録音クラス。
 
-    マイクから音声をキャプチャし、WAVファイルとして保存する。
+    マイクから音声をキャプチャし、RecordedAudio として返す。
+    サンプルは事前確保した SampleBuffer に直接書き込むため、録音コールバックは
+    メモリを確保せず、停止時の結合コピーも発生しない。
+
+    codec が "flac" の場合は、録音中に別スレッドで ENCODE_INTERVAL 秒ごとに
+    新しいサンプルを圧縮するため、停止時に残るのは末尾の圧縮だけになる。
+
+    vad が設定されている場合は、停止時に先頭と末尾の無音を除く。圧縮は
+    録音中に発話の始まりを見つけてから始め、停止時には末尾の無音に当たる
+    フレームを捨てるので、間を縮めない限り作り直しは発生しない。
+
+    warm が有効な場合は、open() で開いたストリームを閉じずに使い回す。
+    待機中もリングバッファに書き続け、start() はその時点から pre_roll_ms
+    さかのぼった位置を録音の先頭として記録する。押した直後の音が欠けない。
     """
 
+    # 録音中に圧縮を進める間隔（秒）
+    ENCODE_INTERVAL = 0.25
+
     def __init__(self, config: RecordingConfig | None = None):
         """AudioRecorderを初期化する。
 
@@ -43,12 +252,33 @@ class AudioRecorder:
             config: 録音設定。Noneの場合はデフォルト設定を使用。
         """
         self.config = config or RecordingConfig()
-        self._frames: list[np.ndarray] = []
+        rate = self.config.sample_rate
+        self._max_frames = self.config.max_duration * rate
+        self._pre_roll = self.config.pre_roll_ms * rate // 1000 if self.config.warm else 0
+        capacity = self._max_frames
+        if self.config.warm:
+            # 待機中も書き続けるのでリングにする。停止処理中に録音の先頭が
+            # 上書きされないよう 1 秒の余裕を持たせる
+            capacity += self._pre_roll + rate
+        self._buffer = SampleBuffer(
+            capacity,
+            channels=self.config.channels,
+            dtype=self.config.dtype,
+            ring=self.config.ring or self.config.warm,
+        )
+        # 録音の先頭と末尾（バッファの通し番号）。末尾は録音中 None
+        self._mark = 0
+        self._end: int | None = None
         self._is_recording = False
         self._stream: sd.InputStream | None = None
         self._start_time: float | None = None
-        self._max_duration: int = self.config.max_duration
         self._timeout_reached: bool = False
+        self._encoder: FlacEncoder | None = None
+        self._encoded_frames = 0
+        self._encode_start: int | None = None
+        self._scanned_frames = 0
+        self._encode_stop = threading.Event()
+        self._encode_thread: threading.Thread | None = None
 
     @property
     def is_recording(self) -> bool:
@@ -60,89 +290,273 @@ class AudioRecorder:
         """タイムアウトで録音が停止したかどうかを返す。"""
         return self._timeout_reached
 
+    @property
+    def is_open(self) -> bool:
+        """入力ストリームが開いているかどうかを返す。"""
+        return self._stream is not None
+
+    @property
+    def audio(self) -> np.ndarray:
+        """直近の録音サンプルをコピーせずに返す。
+
+        内部バッファのビューなので、次の start() 以降は内容が変わる。
+        """
+        end = self._buffer.written if self._end is None else self._end
+        return self._buffer.view_range(self._recording_start(end), end)
+
+    def _recording_start(self, end: int) -> int:
+        """end まで録音した時に保持している先頭の通し番号を返す。"""
+        if self.config.warm:
+            # 余裕分はバッファに残っていても録音には含めない
+            return max(self._mark, end - self._max_frames - self._pre_roll)
+        return self._mark
+
+    def open(self) -> None:
+        """入力ストリームを開いて待機する。
+
+        ウォームモードでない場合と、既に開いている場合は何もしない。
+        """
+        if not self.config.warm or self._stream is not None:
+            return
+        opened = time.perf_counter()
+        self._open_stream()
+        elapsed = (time.perf_counter() - opened) * 1000
+        print(f"[Recording] Input stream warm ({elapsed:.0f} ms to open)")
+
+    def close(self) -> None:
+        """入力ストリームを閉じる。録音中の場合は録音も打ち切られる。"""
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def _open_stream(self) -> None:
+        """入力ストリームを作成して開始する。"""
+        buffer = self._buffer
+        warm = self.config.warm
+        limited = not self.config.ring
+
+        def callback(indata, frames: int, time_info: dict, status: sd.CallbackFlags) -> None:
+            if status:
+                print(f"Recording status: {status}")
+
+            buffer.write(indata)
+            if warm:
+                # ストリームは止めず、最大録音時間に達したことだけを知らせる
+                if (
+                    limited
+                    and self._is_recording
+                    and buffer.written - self._mark >= self._max_frames + self._pre_roll
+                ):
+                    self._timeout_reached = True
+                return
+            # バッファが一杯になったら最大録音時間に達している
+            if buffer.full:
+                self._timeout_reached = True
+                raise sd.CallbackAbort()
+
+        stream_class = sd.RawInputStream if self.config.raw else sd.InputStream
+        self._stream = stream_class(
+            samplerate=self.config.sample_rate,
+            channels=self.config.channels,
+            dtype=self.config.dtype,
+            callback=callback,
+        )
+        self._stream.start()
+
     def start(self) -> None:
         """録音を開始する。
 
+        ウォームモードでは開いているストリームの現在位置から pre_roll_ms
+        さかのぼった位置を先頭として記録する。ストリームが開いていなければ
+        ここで開く。
+
         Raises:
             RuntimeError: 既に録音中の場合。
         """
         if self._is_recording:
             raise RuntimeError("Already recording")
 
-        self._frames = []
-        self._is_recording = True
         self._start_time = time.time()
         self._timeout_reached = False
+        self._end = None
+        if self.config.warm and self._stream is not None:
+            written = self._buffer.written
+            self._mark = max(written - self._pre_roll, written - self._buffer.frames)
+        else:
+            self._buffer.clear()
+            self._mark = 0
+            self._open_stream()
+        self._is_recording = True
+        if self.config.codec == "flac":
+            self._start_encoder()
+        if self.config.warm:
+            pre_roll = (self._buffer.written - self._mark) * 1000 // self.config.sample_rate
+            print(f"[Recording] Started (pre-roll {pre_roll} ms)...")
+        else:
+            print("[Recording] Started...")
+
+    def _start_encoder(self) -> None:
+        """録音中の圧縮スレッドを開始する。"""
+        self._encoder = FlacEncoder(self.config.sample_rate, self.config.channels)
+        self._encoded_frames = self._mark
+        self._scanned_frames = self._mark
+        # VAD を使う場合は発話の始まりが見つかるまで圧縮しない
+        self._encode_start = None if self.config.vad is not None else self._mark
+        self._encode_stop.clear()
+        self._encode_thread = threading.Thread(
+            target=self._encode_loop, name="audio-encoder", daemon=True
+        )
+        self._encode_thread.start()
+
+    def _encode_loop(self) -> None:
+        """停止されるまで一定間隔で新しいサンプルを圧縮する。"""
+        while not self._encode_stop.wait(self.ENCODE_INTERVAL):
+            self._encode_pending()
+
+    def _encode_pending(self) -> None:
+        """まだ圧縮していないサンプルを圧縮する。"""
+        end = self._buffer.written
+        if self.config.warm and not self.config.ring:
+            end = min(end, self._mark + self._max_frames + self._pre_roll)
+        if self._encode_start is None and not self._find_speech_start(end):
+            return
+        if end > self._encoded_frames:
+            self._encoder.encode(self._buffer.view_range(self._encoded_frames, end))
+            self._encoded_frames = end
+
+    def _find_speech_start(self, end: int) -> bool:
+        """新しいサンプルから発話の始まりを探し、圧縮の開始位置を決める。
+
+        録音の先頭（_mark）から trim_silence と同じフレーム区切りで判定する
+        ので、停止時の結果と開始位置が一致する。
 
-        def callback(
-            indata: np.ndarray, frames: int, time_info: dict, status: sd.CallbackFlags
-        ) -> None:
-            if status:
-                print(f"Recording status: {status}")
-
-            # タイムアウトチェック
-            if self._start_time is not None:
-                elapsed = time.time() - self._start_time
-                if elapsed >= self._max_duration:
-                    self._timeout_reached = True
-                    raise sd.CallbackAbort()
+        Returns:
+            発話の始まりが見つかったかどうか。
+        """
+        vad = self.config.vad
+        length = vad.frame_length(self.config.sample_rate)
+        samples = self._buffer.view_range(self._scanned_frames, end)
+        found = first_speech_frame(samples, self.config.sample_rate, vad)
+        if found is None:
+            self._scanned_frames += len(samples) - len(samples) % length
+            return False
+        frame = (self._scanned_frames - self._mark) // length + found
+        padded = max(frame - vad.frames_for(vad.padding_ms), 0)
+        self._encode_start = self._mark + padded * length
+        self._encoded_frames = self._encode_start
+        return True
+
+    def _stop_encoder_thread(self) -> None:
+        """圧縮スレッドを止める。"""
+        self._encode_stop.set()
+        if self._encode_thread is not None:
+            self._encode_thread.join()
+            self._encode_thread = None
+
+    def _finish_encoder(
+        self, samples: np.ndarray, offset: int, trimmed: VadResult | None
+    ) -> tuple[bytes, float]:
+        """残りを圧縮して FLAC データを返す。
+
+        録音中に圧縮した部分がそのまま使える場合は、送る範囲を超えるフレームを
+        捨てて残りだけを圧縮する。使えない場合（リングモードで先頭が上書き
+        された、間を縮めたなど）は送るサンプル全体を圧縮し直す。
 
-            self._frames.append(indata.copy())
+        Args:
+            samples: 録音バッファのサンプル。
+            offset: samples 先頭の通し番号。
+            trimmed: VAD の結果。None の場合は samples 全体を送る。
 
-        self._stream = sd.InputStream(
-            samplerate=self.config.sample_rate,
-            channels=self.config.channels,
-            dtype=self.config.dtype,
-            callback=callback,
+        Returns:
+            (FLAC データ, 圧縮の合計時間（秒）)。
+        """
+        tail_start = time.perf_counter()
+        start, end = (trimmed.start, trimmed.end) if trimmed else (0, len(samples))
+        encoder = self._encoder
+        self._encoder = None
+        if (trimmed is None or trimmed.contiguous) and self._encode_start == offset + start:
+            kept = encoder.rewind(end - start)
+            encoder.encode(samples[start + kept : end])
+        else:
+            encoder = FlacEncoder(self.config.sample_rate, self.config.channels)
+            encoder.encode(trimmed.samples if trimmed else samples)
+        data = encoder.finish()
+        tail = time.perf_counter() - tail_start
+        pcm_bytes = trimmed.samples.nbytes if trimmed else samples.nbytes
+        print(
+            f"[Recording] FLAC: {len(data)} bytes "
+            f"({len(data) / max(pcm_bytes, 1):.0%} of PCM), "
+            f"encode {encoder.encode_time * 1000:.0f} ms (at stop {tail * 1000:.0f} ms)"
         )
-        self._stream.start()
-        print("[Recording] Started...")
+        return data, encoder.encode_time
 
-    def stop(self) -> Path:
-        """録音を停止し、音声ファイルのパスを返す。
+    def stop(self) -> RecordedAudio:
+        """録音を停止し、録音結果を返す。
+
+        ファイルには書き出さない。config.debug_dir が設定されている場合のみ、
+        そこに WAV ファイルとしても保存する。ウォームモードではストリームを
+        閉じずに待機に戻る。
 
         Returns:
-            録音された音声ファイルのパス。
+            録音バッファのビュー（ウォームモードではコピー）を持つ RecordedAudio。
 
         Raises:
             RuntimeError: 録音中でない場合。
+            ValueError: 音声が録音されていない場合。
         """
         if not self._is_recording:
             raise RuntimeError("Not recording")
 
-        if self._stream:
-            self._stream.stop()
-            self._stream.close()
-            self._stream = None
+        if self.config.warm:
+            end = self._buffer.written
+            if not self.config.ring:
+                end = min(end, self._mark + self._max_frames + self._pre_roll)
+        else:
+            self.close()
+            end = self._buffer.written
+        self._end = end
 
+        self._stop_encoder_thread()
         self._is_recording = False
         print("[Recording] Stopped.")
 
-        return self._save_to_file()
-
-    def _save_to_file(self) -> Path:
-        """録音データをWAVファイルとして保存する。
-
-        Returns:
-            保存されたファイルのパス。
-        """
-        if not self._frames:
+        offset = self._recording_start(end)
+        samples = self._buffer.view_range(offset, end)
+        offset = end - len(samples)
+        if not len(samples):
+            self._encoder = None
             raise ValueError("No audio data recorded")
 
-        audio_data = np.concatenate(self._frames, axis=0)
-
-        temp_file = tempfile.NamedTemporaryFile(
-            suffix=".wav",
-            delete=False,
-        )
-        temp_path = Path(temp_file.name)
-        temp_file.close()
-
-        with wave.open(str(temp_path), "wb") as wf:
-            wf.setnchannels(self.config.channels)
-            wf.setsampwidth(2)  # int16 = 2 bytes
-            wf.setframerate(self.config.sample_rate)
-            wf.writeframes(audio_data.tobytes())
-
-        print(f"[Recording] Saved to: {temp_path}")
-        return temp_path
+        trimmed = None
+        if self.config.vad is not None:
+            trimmed = trim_silence(samples, self.config.sample_rate, self.config.vad)
+            if not trimmed.has_speech:
+                print("[VAD] No speech detected")
+                self._encoder = None
+                return RecordedAudio(
+                    trimmed.samples, self.config.sample_rate, has_speech=False, removed_ratio=1.0
+                )
+            print(f"[VAD] Removed {trimmed.removed_ratio:.0%} of the recording")
+
+        final = trimmed.samples if trimmed else samples
+        removed = trimmed.removed_ratio if trimmed else 0.0
+        if self.config.warm:
+            # 待機中の書き込みで上書きされる前にコピーしておく
+            final = final.copy()
+        if self._encoder is not None:
+            encoded, encode_time = self._finish_encoder(samples, offset, trimmed)
+            audio = RecordedAudio(
+                final,
+                self.config.sample_rate,
+                encoded=encoded,
+                encode_time=encode_time,
+                removed_ratio=removed,
+            )
+        else:
+            audio = RecordedAudio(final, self.config.sample_rate, removed_ratio=removed)
+        if self.config.debug_dir is not None:
+            name = datetime.now().strftime("recording-%Y%m%d-%H%M%S.wav")
+            path = audio.save(self.config.debug_dir / name)
+            print(f"[Recording] Saved to: {path}")
+        return audio
@@ -0,0 +1,60 @@
+"""Buffering for text that arrives in pieces, such as streamed LLM tokens.
+
+Tokens can end in the middle of a grapheme cluster: a base letter whose
+combining mark is in the next token, half of a flag, or an emoji ZWJ
+sequence. StreamBuffer holds back the last cluster of what it has seen
+until more text arrives, so only complete clusters are typed.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from direct_typer.cgevent import iter_graphemes
+
+
+@dataclass
+class StreamStats:
+    """Measurements of one streamed typing call.
+
+    Attributes:
+        chunks: Number of typing calls made.
+        chars_typed: Number of characters (code points) typed.
+        time_to_first_char: Seconds from the start of the call until the
+            first character was sent, or None if nothing was typed.
+        elapsed: Total duration of the call in seconds.
+    """
+
+    chunks: int = 0
+    chars_typed: int = 0
+    time_to_first_char: Optional[float] = None
+    elapsed: float = 0.0
+
+
+class StreamBuffer:
+    """Accumulates streamed text and releases it on cluster boundaries."""
+
+    def __init__(self):
+        """Initialize StreamBuffer."""
+        self._pending = ""
+
+    def feed(self, token: str) -> None:
+        """Append a token to the buffer."""
+        self._pending += token
+
+    def take(self) -> str:
+        """Return the text that can be typed safely and remove it.
+
+        Everything but the last grapheme cluster is stable: whatever
+        arrives next can only extend the last cluster.
+        """
+        last = ""
+        for cluster in iter_graphemes(self._pending):
+            last = cluster
+        stable = self._pending[: len(self._pending) - len(last)]
+        self._pending = last
+        return stable
+
+    def flush(self) -> str:
+        """Return and remove everything, at the end of the stream."""
+        rest, self._pending = self._pending, ""
+        return rest
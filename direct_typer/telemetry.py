@@ -0,0 +1,279 @@
+"""Typing-layer telemetry.
+
+TypingTelemetry collects one CallRecord per DirectTyper.type call: the
+method actually used, characters, keyboard events posted, time spent
+sleeping for pacing versus working, time spent waiting on the clipboard,
+and the error if the call failed. Records are summed per method,
+the most recent ones are kept, and everything can be exported as JSON.
+An optional hook receives each record as it is made, e.g. to forward it
+to a log.
+
+DirectTyper counts events and waits with a CallMeter: it wraps the
+keyboard and event sink in CountingKeyboard/CountingSink and meters the
+pacing scheduler's sleeps. Counts are per typer, so calls made
+concurrently on one typer from several threads are not told apart.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+@dataclass(frozen=True)
+class CallRecord:
+    """Measurements of one typing call.
+
+    Attributes:
+        method: Method value used (AUTO already resolved).
+        chars: Number of characters in the text.
+        events: Keyboard events posted (key down and key up count as two).
+        elapsed_ms: Wall time of the call in milliseconds.
+        sleep_ms: Time slept for pacing in milliseconds.
+        clipboard_wait_ms: Time waited for the clipboard in milliseconds.
+        error: Exception type and message if the call failed, else None.
+        timestamp: Wall clock time the call finished (time.time()).
+    """
+
+    method: str
+    chars: int
+    events: int
+    elapsed_ms: float
+    sleep_ms: float
+    clipboard_wait_ms: float
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def active_ms(self) -> float:
+        """Time spent neither sleeping nor waiting, in milliseconds."""
+        return max(self.elapsed_ms - self.sleep_ms - self.clipboard_wait_ms, 0.0)
+
+    def to_dict(self) -> dict:
+        """Return the record as a JSON-serializable dictionary."""
+        return {**asdict(self), "active_ms": self.active_ms}
+
+
+@dataclass
+class MethodStats:
+    """Totals over many typing calls.
+
+    Attributes:
+        calls: Number of calls.
+        errors: Number of calls that failed.
+        chars: Characters typed.
+        events: Keyboard events posted.
+        elapsed_ms: Total wall time in milliseconds.
+        sleep_ms: Total pacing sleep in milliseconds.
+        clipboard_wait_ms: Total clipboard wait in milliseconds.
+    """
+
+    calls: int = 0
+    errors: int = 0
+    chars: int = 0
+    events: int = 0
+    elapsed_ms: float = 0.0
+    sleep_ms: float = 0.0
+    clipboard_wait_ms: float = 0.0
+
+    @property
+    def active_ms(self) -> float:
+        """Total time spent neither sleeping nor waiting, in milliseconds."""
+        return max(self.elapsed_ms - self.sleep_ms - self.clipboard_wait_ms, 0.0)
+
+    @property
+    def chars_per_sec(self) -> float:
+        """Average throughput in characters per second."""
+        return self.chars / self.elapsed_ms * 1000 if self.elapsed_ms > 0 else 0.0
+
+    def add(self, record: CallRecord) -> None:
+        """Add one call to the totals."""
+        self.calls += 1
+        self.errors += record.error is not None
+        self.chars += record.chars
+        self.events += record.events
+        self.elapsed_ms += record.elapsed_ms
+        self.sleep_ms += record.sleep_ms
+        self.clipboard_wait_ms += record.clipboard_wait_ms
+
+    def to_dict(self) -> dict:
+        """Return the totals as a JSON-serializable dictionary."""
+        return {**asdict(self), "active_ms": self.active_ms, "chars_per_sec": self.chars_per_sec}
+
+
+class CallMeter:
+    """Running counters a DirectTyper updates while it types.
+
+    Attributes:
+        events: Keyboard events posted.
+        slept: Time slept for pacing in seconds.
+        clipboard_wait: Time waited for the clipboard in seconds.
+    """
+
+    def __init__(self, sleep: Callable[[float], None] = time.sleep):
+        """Initialize CallMeter.
+
+        Args:
+            sleep: Sleep function the metered sleep() delegates to.
+        """
+        self._sleep = sleep
+        self.events = 0
+        self.slept = 0.0
+        self.clipboard_wait = 0.0
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep and add the time actually slept."""
+        start = time.perf_counter()
+        self._sleep(seconds)
+        self.slept += time.perf_counter() - start
+
+    def snapshot(self) -> tuple[int, float, float]:
+        """Return the current (events, slept, clipboard_wait)."""
+        return self.events, self.slept, self.clipboard_wait
+
+
+class CountingSink:
+    """KeyEventSink wrapper that counts posted events."""
+
+    def __init__(self, sink: Any, meter: CallMeter):
+        """Initialize CountingSink.
+
+        Args:
+            sink: KeyEventSink to post through.
+            meter: Meter receiving the counts.
+        """
+        self.sink = sink
+        self._meter = meter
+
+    def post_unicode(self, text: str) -> None:
+        """Post a Unicode key down/up pair."""
+        self.sink.post_unicode(text)
+        self._meter.events += 2
+
+    def post_keycode(self, keycode: int, flags: int = 0) -> None:
+        """Post a key code down/up pair."""
+        self.sink.post_keycode(keycode, flags)
+        self._meter.events += 2
+
+    def post_paste(self, keycode: Optional[int] = None) -> None:
+        """Post the Cmd+V chord."""
+        self.sink.post_paste(keycode)
+        self._meter.events += 2
+
+
+class CountingKeyboard:
+    """KeyboardBackend wrapper that counts key presses and releases."""
+
+    def __init__(self, keyboard: Any, meter: CallMeter):
+        """Initialize CountingKeyboard.
+
+        Args:
+            keyboard: KeyboardBackend to send keys through.
+            meter: Meter receiving the counts.
+        """
+        self.keyboard = keyboard
+        self._meter = meter
+
+    def press(self, key: str) -> None:
+        """Press a key."""
+        self.keyboard.press(key)
+        self._meter.events += 1
+
+    def release(self, key: str) -> None:
+        """Release a key."""
+        self.keyboard.release(key)
+        self._meter.events += 1
+
+    def type(self, text: str) -> None:
+        """Type a string, counting a press and release per character."""
+        self.keyboard.type(text)
+        self._meter.events += 2 * len(text)
+
+
+TelemetryHook = Callable[[CallRecord], None]
+
+
+class TypingTelemetry:
+    """Counters and recent history of typing calls.
+
+    Attributes:
+        hook: Called with every new CallRecord. Exceptions raised by the
+            hook are ignored so telemetry never breaks typing.
+    """
+
+    def __init__(self, hook: Optional[TelemetryHook] = None, history: int = 100):
+        """Initialize TypingTelemetry.
+
+        Args:
+            hook: Callback receiving each CallRecord.
+            history: Number of recent records to keep.
+        """
+        self.hook = hook
+        self._lock = threading.Lock()
+        self._total = MethodStats()
+        self._methods: dict[str, MethodStats] = {}
+        self._recent: deque[CallRecord] = deque(maxlen=history)
+
+    def record(self, record: CallRecord) -> None:
+        """Add a call and pass it to the hook."""
+        with self._lock:
+            self._total.add(record)
+            self._methods.setdefault(record.method, MethodStats()).add(record)
+            self._recent.append(record)
+        if self.hook is not None:
+            try:
+                self.hook(record)
+            except Exception:
+                pass
+
+    def totals(self) -> MethodStats:
+        """Return the totals over all calls."""
+        with self._lock:
+            return replace(self._total)
+
+    def stats(self) -> dict[str, MethodStats]:
+        """Return the totals by method value."""
+        with self._lock:
+            return {name: replace(stats) for name, stats in self._methods.items()}
+
+    def recent(self) -> list[CallRecord]:
+        """Return the most recent calls, oldest first."""
+        with self._lock:
+            return list(self._recent)
+
+    def reset(self) -> None:
+        """Forget all calls."""
+        with self._lock:
+            self._total = MethodStats()
+            self._methods.clear()
+            self._recent.clear()
+
+    def to_dict(self) -> dict:
+        """Return all counters as a JSON-serializable dictionary."""
+        with self._lock:
+            return {
+                "version": 1,
+                "total": self._total.to_dict(),
+                "methods": {name: stats.to_dict() for name, stats in self._methods.items()},
+                "recent": [record.to_dict() for record in self._recent],
+            }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Return all counters as a JSON string."""
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def save(self, path: Path) -> Path:
+        """Write all counters to a JSON file.
+
+        Args:
+            path: Destination.
+
+        Returns:
+            The path written.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_json(), encoding="utf-8")
+        return path
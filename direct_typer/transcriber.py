@@ -8,6 +8,8 @@ from pathlib import Path
 
 from groq import Groq
 
+from direct_typer.recorder import RecordedAudio
+
 
 class Transcriber:
     """音声文字起こしクラス。
@@ -32,11 +34,14 @@ class Transcriber:
 
         self._client = Groq(api_key=self._api_key)
 
-    def transcribe(self, audio_path: Path) -> str:
-        """音声ファイルを文字起こしする。
+    def transcribe(self, audio: RecordedAudio | Path) -> str:
+        """音声を文字起こしする。
+
+        RecordedAudio はファイルを経由せず、録音中に圧縮した FLAC、または
+        メモリ上の WAV をそのままアップロードする。
 
         Args:
-            audio_path: 音声ファイルのパス。
+            audio: 録音結果、または音声ファイルのパス。
 
         Returns:
             文字起こし結果のテキスト。
@@ -44,19 +49,36 @@ class Transcriber:
         Raises:
             FileNotFoundError: 音声ファイルが存在しない場合。
         """
-        if not audio_path.exists():
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        if isinstance(audio, RecordedAudio):
+            name, content = audio.payload()
+            print(
+                f"[Transcription] Processing: {audio.duration:.1f}s, "
+                f"upload {name} {audio.upload_size} bytes"
+            )
+            transcription = self._create(name, content)
+        else:
+            if not audio.exists():
+                raise FileNotFoundError(f"Audio file not found: {audio}")
 
-        print(f"[Transcription] Processing: {audio_path}")
+            print(f"[Transcription] Processing: {audio}")
 
-        with open(audio_path, "rb") as audio_file:
-            transcription = self._client.audio.transcriptions.create(
-                file=(audio_path.name, audio_file.read()),
-                model=self.MODEL,
-                language="ja",
-                response_format="text",
-            )
+            with open(audio, "rb") as audio_file:
+                transcription = self._create(audio.name, audio_file.read())
 
         result = transcription.strip() if isinstance(transcription, str) else str(transcription).strip()
         print(f"[Transcription] Result: {result}")
         return result
+
+    def _create(self, name: str, content) -> object:
+        """文字起こし API を呼び出す。
+
+        Args:
+            name: ファイル名。
+            content: 音声データ（バイト列またはファイルオブジェクト）。
+        """
+        return self._client.audio.transcriptions.create(
+            file=(name, content),
+            model=self.MODEL,
+            language="ja",
+            response_format="text",
+        )
@@ -1,13 +1,53 @@
 """Main DirectTyper implementation with hybrid typing approach."""
 
+import asyncio
+import math
+import threading
 import time
+from concurrent.futures import CancelledError
+from dataclasses import dataclass, replace
 from enum import Enum
-from typing import Optional
+from typing import AsyncIterable, Callable, Iterable, Optional
 
 import pyperclip
-from pynput.keyboard import Controller, Key
 
-from direct_typer.cgevent import type_unicode_string
+from direct_typer.backends import (
+    ClipboardBackend,
+    KeyboardBackend,
+    KeyEventSink,
+    PynputKeyboard,
+)
+from direct_typer.cgevent import (
+    MAX_CHUNK_UTF16,
+    SPECIAL_KEYS,
+    EventTarget,
+    get_context,
+    iter_graphemes,
+    type_unicode_batch,
+    type_unicode_string,
+)
+from direct_typer.clipboard import (
+    ClipboardTiming,
+    DeferredRestore,
+    PasteSettle,
+    default_clipboard,
+    get_change_count,
+    restore_clipboard,
+    save_clipboard,
+    wait_for_change,
+)
+from direct_typer.costmodel import CostModel
+from direct_typer.keymap import KeymapCache
+from direct_typer.pacing import AdaptiveRateController, PacingScheduler, PacingStats
+from direct_typer.profiles import AppIdentityProvider, FrontmostAppIdentity, ProfileStore
+from direct_typer.streaming import StreamBuffer, StreamStats
+from direct_typer.telemetry import (
+    CallMeter,
+    CallRecord,
+    CountingKeyboard,
+    CountingSink,
+    TypingTelemetry,
+)
 
 
 class TypingMethod(Enum):
@@ -17,6 +57,75 @@ class TypingMethod(Enum):
     CGEVENT = "cgevent"
     PYNPUT = "pynput"
     CLIPBOARD = "clipboard"
+    SEGMENTED = "segmented"
+
+
+@dataclass(frozen=True)
+class TypingOptions:
+    """Settings for one typing call.
+
+    Immutable, so a call never sees settings change halfway and several
+    threads can type with different options through one DirectTyper.
+    Derive variants with dataclasses.replace or DirectTyper.with_options.
+
+    Attributes:
+        delay_ms: Delay between characters in milliseconds.
+        method: Typing method.
+        chunk_size: Maximum UTF-16 units per CGEvent chunk. None means
+            the CGEVENT method posts one grapheme cluster per event and
+            segmented typing batches up to MAX_CHUNK_UTF16 units.
+        restore_clipboard: Whether clipboard typing restores the
+            original clipboard content.
+    """
+
+    delay_ms: float = 5
+    method: TypingMethod = TypingMethod.AUTO
+    chunk_size: Optional[int] = None
+    restore_clipboard: bool = True
+
+
+# Run kinds produced by split_runs
+RUN_ASCII = "ascii"
+RUN_UNICODE = "unicode"
+RUN_CONTROL = "control"
+
+
+def split_runs(text: str) -> list[tuple[str, str]]:
+    """Split text into runs of ASCII, non-ASCII, and control characters.
+
+    Splitting happens on grapheme cluster boundaries, so a base letter
+    followed by a combining mark stays in one (non-ASCII) run. Control
+    runs contain only SPECIAL_KEYS such as newline and tab.
+
+    Args:
+        text: Text to split.
+
+    Returns:
+        List of (kind, run) tuples in order, where kind is RUN_ASCII,
+        RUN_UNICODE, or RUN_CONTROL.
+    """
+    runs: list[tuple[str, str]] = []
+    kind = None
+    start = 0
+    position = 0
+    for cluster in iter_graphemes(text):
+        if cluster in SPECIAL_KEYS:
+            cluster_kind = RUN_CONTROL
+        elif cluster.isascii():
+            cluster_kind = RUN_ASCII
+        else:
+            cluster_kind = RUN_UNICODE
+
+        if cluster_kind != kind:
+            if kind is not None:
+                runs.append((kind, text[start:position]))
+            kind = cluster_kind
+            start = position
+        position += len(cluster)
+
+    if kind is not None:
+        runs.append((kind, text[start:]))
+    return runs
 
 
 class DirectTyper:
@@ -32,134 +141,670 @@ class DirectTyper:
     ASCII_THRESHOLD = 50
     CGEVENT_THRESHOLD = 200
 
+    # Estimated cost of one clipboard round-trip in milliseconds, used by
+    # plan_segments without a cost model. Dominated by paste_settle's
+    # initial wait, which is what eager clipboards always wait.
+    CLIPBOARD_COST_MS = 150.0
+
+    # Maximum wait for a clipboard write to become visible, in seconds
+    COPY_TIMEOUT_S = 0.05
+
     def __init__(
         self,
         delay_ms: float = 5,
         default_method: TypingMethod = TypingMethod.AUTO,
+        adaptive: bool = False,
+        keyboard: Optional[KeyboardBackend] = None,
+        clipboard: Optional[ClipboardBackend] = None,
+        event_sink: Optional[KeyEventSink] = None,
+        cost_model: Optional[CostModel] = None,
+        deferred_restore: bool = False,
+        keymap: Optional[KeymapCache] = None,
+        profiles: Optional[ProfileStore] = None,
+        app_identity: Optional[AppIdentityProvider] = None,
+        event_target: Optional[EventTarget] = None,
+        telemetry: Optional[TypingTelemetry] = None,
+        lazy_clipboard: bool = False,
+        sleep: Optional[Callable[[float], None]] = None,
     ):
         """Initialize DirectTyper.
 
         Args:
             delay_ms: Default delay between characters in milliseconds.
             default_method: Default typing method to use.
+            adaptive: Learn the typing rate from backpressure instead of
+                using delay_ms. Starts at the rate delay_ms gives, speeds
+                up while posting keeps up and backs off when it stalls.
+                A call whose delay is longer than this delay_ms (e.g.
+                type_with_delay, or a profile's backoff) is not typed
+                faster than its delay allows.
+            keyboard: Keyboard used by the pynput and clipboard methods.
+                If None, uses pynput's Controller.
+            clipboard: Clipboard used by the clipboard method. If None,
+                uses NativePasteboard, falling back to pyperclip.
+            event_sink: Event sink used by the CGEvent method. If None,
+                uses the shared Quartz TypingContext.
+            cost_model: Calibrated latency model. If given, AUTO picks the
+                method with the lowest predicted latency instead of using
+                the fixed thresholds, and refreshes the model from each
+                call's timing. See CostModel.load().
+            deferred_restore: Restore the clipboard on a background
+                worker after the paste instead of waiting for the target
+                to read it, so clipboard typing returns immediately.
+                See DeferredRestore.
+            keymap: Key code table for the pynput method's ASCII fast
+                path, e.g. KeymapCache() on macOS. Characters in the
+                table are posted as single key code events through the
+                event sink instead of going through pynput, and so is
+                the clipboard method's Cmd+V chord.
+            profiles: Per-application profiles to learn from and apply,
+                e.g. ProfileStore.load().
+            app_identity: Identifies the application receiving input
+                for profiles. If None, uses the frontmost application.
+            event_target: Where the shared TypingContext posts CGEvents
+                when no event_sink is given, e.g.
+                EventTarget.application("com.apple.TextEdit") to deliver
+                straight to a known app. If None, uses the HID event tap.
+            telemetry: Receives a CallRecord (method, characters, events,
+                sleep, clipboard wait, error) for every type() call.
+            lazy_clipboard: Create the default NativePasteboard in lazy
+                mode, so the restore waits exactly until the target has
+                read the paste and paste_settle learns the read latency.
+                Only for apps that type off the main thread while the
+                main run loop is serviced (e.g. a rumps app).
+            sleep: Sleep function used for pacing and clipboard waits,
+                e.g. a meter that adds up the time slept. Defaults to
+                time.sleep.
         """
-        self.delay_ms = delay_ms
-        self.default_method = default_method
-        self._keyboard = Controller()
+        self.options = TypingOptions(delay_ms=delay_ms, method=default_method)
+        if keyboard is None:
+            # Imported here: pynput fails to import on Linux without an X server,
+            # which would break MemoryBackend-only users such as the benchmark
+            from pynput.keyboard import Controller
+
+            keyboard = PynputKeyboard(Controller())
+        self._keyboard = keyboard
+        if clipboard is None:
+            clipboard = default_clipboard(pyperclip, lazy=lazy_clipboard)
+        self._clipboard = clipboard
+        self._event_sink = event_sink
+        self.event_target = event_target
+        self.last_pacing: Optional[PacingStats] = None
+        self._rate_controller = (
+            AdaptiveRateController(start_rate=1000.0 / delay_ms if delay_ms > 0 else None)
+            if adaptive
+            else None
+        )
+        self.cost_model = cost_model
+        self.paste_settle = PasteSettle()
+        self.last_clipboard_timing: Optional[ClipboardTiming] = None
+        self.deferred_restore = DeferredRestore() if deferred_restore else None
+        self.session_text = ""
+        self.keymap = keymap
+        self.profiles = profiles
+        self.app_identity = app_identity if app_identity is not None else FrontmostAppIdentity()
+        self._last_profiled: Optional[tuple[str, TypingMethod, TypingOptions]] = None
+        self.telemetry = telemetry
+        self._sleep = sleep
+        self._meter = CallMeter(sleep or time.sleep) if telemetry is not None else None
+        self._counting_sink: Optional[CountingSink] = None
+        # Cancellation check of the type() call running on each thread
+        self._call = threading.local()
+        if self._meter is not None:
+            self._keyboard = CountingKeyboard(self._keyboard, self._meter)
+
+    @property
+    def delay_ms(self) -> float:
+        """Default delay between characters in milliseconds."""
+        return self.options.delay_ms
+
+    @delay_ms.setter
+    def delay_ms(self, value: float) -> None:
+        self.options = replace(self.options, delay_ms=value)
+
+    @property
+    def default_method(self) -> TypingMethod:
+        """Default typing method."""
+        return self.options.method
+
+    @default_method.setter
+    def default_method(self, value: TypingMethod) -> None:
+        self.options = replace(self.options, method=value)
+
+    def with_options(self, **changes) -> TypingOptions:
+        """Return the default options with some fields changed.
 
-    def type(self, text: str, method: Optional[TypingMethod] = None) -> None:
+        Args:
+            **changes: TypingOptions fields to change.
+        """
+        return replace(self.options, **changes)
+
+    @property
+    def learned_rate(self) -> Optional[float]:
+        """Highest safe characters per second learned in adaptive mode.
+
+        Returns None when adaptive mode is off or nothing is learned yet.
+        """
+        if self._rate_controller is None:
+            return None
+        return self._rate_controller.learned_rate
+
+    def _sink(self) -> Optional[KeyEventSink]:
+        """Return the event sink for CGEvent posting.
+
+        None means the cgevent functions use the default HID context.
+        With telemetry, the sink is wrapped to count posted events.
+        """
+        sink = self._event_sink
+        if sink is None and self.event_target is not None:
+            sink = get_context(self.event_target)
+        if self._meter is None:
+            return sink
+        if sink is None:
+            sink = get_context()
+        if self._counting_sink is None or self._counting_sink.sink is not sink:
+            self._counting_sink = CountingSink(sink, self._meter)
+        return self._counting_sink
+
+    def _scheduler(self, options: TypingOptions) -> PacingScheduler:
+        """Create the pacing scheduler for one typing call."""
+        sleep = self._meter.sleep if self._meter is not None else self._sleep
+        cancelled = getattr(self._call, "cancel", None)
+        if self._rate_controller is not None:
+            # A slower delay than the controller started from is a limit, not a hint
+            max_rate = 1000.0 / options.delay_ms if options.delay_ms > 0 else None
+            if max_rate is not None and max_rate >= self._rate_controller.start_rate:
+                max_rate = None
+            return PacingScheduler(
+                controller=self._rate_controller,
+                sleep=sleep,
+                cancelled=cancelled,
+                max_rate=max_rate,
+            )
+        return PacingScheduler.from_delay_ms(options.delay_ms, sleep=sleep, cancelled=cancelled)
+
+    def type(
+        self,
+        text: str,
+        method: Optional[TypingMethod] = None,
+        options: Optional[TypingOptions] = None,
+        cancel: Optional[Callable[[], bool]] = None,
+    ) -> None:
         """Type text using the specified or auto-selected method.
 
+        With profiles, calls without explicit options use the frontmost
+        application's learned options, and each call's timing or failure
+        is recorded in its profile. With telemetry, every call is
+        recorded there as well. Text typed completely is appended to
+        session_text, so a later revise() edits it.
+
         Args:
             text: Text to type.
-            method: Typing method to use. If None, uses default_method.
+            method: Typing method to use. If None, uses options.method.
+            options: Settings for this call. If None, uses self.options
+                (adjusted by the application profile, if any).
+            cancel: Checked before every paced keystroke or chunk; once
+                it returns True, typing stops and CancelledError is
+                raised. A clipboard paste is never interrupted.
+
+        Raises:
+            CancelledError: If cancel returned True.
         """
         if not text:
             return
-
-        method = method or self.default_method
-
+        self._call.cancel = cancel
+        try:
+            self._type(text, method, options)
+        finally:
+            self._call.cancel = None
+        self.session_text += text
+
+    def _type(
+        self, text: str, method: Optional[TypingMethod], options: Optional[TypingOptions]
+    ) -> None:
+        """Resolve profile options and method, then type and record the call."""
+        app_id = None
+        if options is None and self.profiles is not None:
+            app_id = self.app_identity.frontmost_app_id()
+            if app_id is not None:
+                options = self.profiles.options_for(app_id, self.options, text)
+        options = options or self.options
+        method = method or options.method
+
+        learn = self.cost_model is not None and method == TypingMethod.AUTO
         if method == TypingMethod.AUTO:
-            self._smart_type(text)
-        elif method == TypingMethod.CGEVENT:
-            self.type_cgevent(text)
+            method = self.select_method(text)
+        if not learn and app_id is None and self._meter is None:
+            self._type_with(method, text, options)
+            return
+
+        before = self._meter.snapshot() if self._meter is not None else None
+        start = time.perf_counter()
+        try:
+            self._type_with(method, text, options)
+        except Exception as e:
+            # A cancelled call says nothing about the method's reliability
+            if app_id is not None and not isinstance(e, CancelledError):
+                self.profiles.record_failure(app_id, method, options)
+            if before is not None:
+                self._record_call(method, text, start, before, f"{type(e).__name__}: {e}")
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if before is not None:
+            self._record_call(method, text, start, before)
+        if learn:
+            self.cost_model.observe(method, len(text), elapsed_ms)
+        if app_id is not None:
+            self.profiles.observe(app_id, method, len(text), elapsed_ms)
+            self._last_profiled = (app_id, method, options)
+
+    def _record_call(
+        self,
+        method: TypingMethod,
+        text: str,
+        start: float,
+        before: tuple[int, float, float],
+        error: Optional[str] = None,
+    ) -> None:
+        """Send one call's measurements to telemetry."""
+        elapsed = time.perf_counter() - start
+        events, slept, waited = (
+            now - then for now, then in zip(self._meter.snapshot(), before)
+        )
+        self.telemetry.record(
+            CallRecord(
+                method=method.value,
+                chars=len(text),
+                events=events,
+                elapsed_ms=elapsed * 1000,
+                sleep_ms=slept * 1000,
+                clipboard_wait_ms=waited * 1000,
+                error=error,
+            )
+        )
+
+    def _type_with(self, method: TypingMethod, text: str, options: TypingOptions) -> None:
+        """Type text with a concrete (non-AUTO) method."""
+        if method == TypingMethod.CGEVENT:
+            self.type_cgevent(text, options)
         elif method == TypingMethod.PYNPUT:
-            self.type_pynput(text)
+            self.type_pynput(text, options)
         elif method == TypingMethod.CLIPBOARD:
-            self.type_clipboard(text)
+            self.type_clipboard(text, options=options)
+        elif method == TypingMethod.SEGMENTED:
+            self.type_segmented(text, options)
 
-    def _smart_type(self, text: str) -> None:
-        """Automatically select and use the best typing method.
+    def select_method(self, text: str) -> TypingMethod:
+        """Return the method AUTO uses for text.
 
-        Selection criteria:
+        Selection criteria without a cost model:
         - Short ASCII (< 50 chars): pynput (fastest)
         - Medium length (< 200 chars): CGEvent Unicode
         - Long text (>= 200 chars): Clipboard with restore
 
+        With a cost model, the method with the lowest predicted latency
+        is used once the competing methods are calibrated, and type()
+        feeds the call's measured latency back to the model.
+
         Args:
             text: Text to type.
         """
-        is_ascii = text.isascii()
-        length = len(text)
+        if self.cost_model is not None:
+            method = self.cost_model.best_method(text)
+            if method is not None:
+                return method
 
-        if is_ascii and length < self.ASCII_THRESHOLD:
+        if text.isascii() and len(text) < self.ASCII_THRESHOLD:
             # Short ASCII: use pynput for speed
-            self.type_pynput(text)
-        elif length < self.CGEVENT_THRESHOLD:
+            return TypingMethod.PYNPUT
+        if len(text) < self.CGEVENT_THRESHOLD:
             # Medium length: use CGEvent for Unicode support
-            self.type_cgevent(text)
-        else:
-            # Long text: use clipboard for reliability
-            self.type_clipboard(text)
+            return TypingMethod.CGEVENT
+        # Long text: use clipboard for reliability
+        return TypingMethod.CLIPBOARD
+
+    def report_failure(self) -> None:
+        """Record that the last profiled call did not arrive correctly.
+
+        For callers that notice dropped or garbled input after the fact.
+        The application's profile then backs off that method.
+        """
+        if self.profiles is not None and self._last_profiled is not None:
+            app_id, method, options = self._last_profiled
+            self.profiles.record_failure(app_id, method, options, new_call=False)
+            self._last_profiled = None
+
+    def _run_cost_ms(
+        self, kind: str, run: str, options: TypingOptions
+    ) -> tuple[TypingMethod, float]:
+        """Pick the cheaper keystroke method for a run and estimate its cost.
+
+        ASCII runs are typed with pynput (real key codes, one paced unit
+        per character). Non-ASCII and control runs go through chunked
+        CGEvent posting (one paced unit per chunk or special key).
+
+        Args:
+            kind: Run kind from split_runs.
+            run: Run text.
+            options: Settings for the call.
+
+        Returns:
+            Tuple of (method, estimated cost in milliseconds).
+        """
+        delay_ms = options.delay_ms
+        if kind == RUN_ASCII:
+            return TypingMethod.PYNPUT, len(run) * delay_ms
+        if kind == RUN_CONTROL:
+            return TypingMethod.CGEVENT, len(run) * delay_ms
+        chunk_size = options.chunk_size or MAX_CHUNK_UTF16
+        return TypingMethod.CGEVENT, math.ceil(len(run) / chunk_size) * delay_ms
+
+    def _clipboard_cost_ms(self, chars: int) -> float:
+        """Estimate one clipboard round-trip, from the cost model if set."""
+        if self.cost_model is not None:
+            return self.cost_model.predict(TypingMethod.CLIPBOARD, chars)
+        return self.CLIPBOARD_COST_MS
+
+    def plan_segments(
+        self, text: str, options: Optional[TypingOptions] = None
+    ) -> list[tuple[TypingMethod, str]]:
+        """Plan how segmented typing will send text.
+
+        Each run gets the cheapest keystroke method. Runs whose keystroke
+        cost exceeds a clipboard round-trip (CLIPBOARD_COST_MS, or the
+        cost model's prediction) are pasted instead; if several runs
+        qualify, everything from the first to the last of them is pasted
+        together, so there is at most one clipboard round-trip. Adjacent
+        segments with the same method are merged.
+
+        Args:
+            text: Text to plan.
+            options: Settings for the call. If None, uses self.options.
+
+        Returns:
+            List of (method, segment) tuples whose segments join to text.
+        """
+        options = options or self.options
+        planned: list[tuple[TypingMethod, str]] = []
+        for kind, run in split_runs(text):
+            method, cost = self._run_cost_ms(kind, run, options)
+            if cost > self._clipboard_cost_ms(len(run)):
+                method = TypingMethod.CLIPBOARD
+            planned.append((method, run))
+
+        pasted = [i for i, (method, _) in enumerate(planned) if method == TypingMethod.CLIPBOARD]
+        if pasted:
+            first, last = pasted[0], pasted[-1]
+            span = "".join(run for _, run in planned[first : last + 1])
+            planned[first : last + 1] = [(TypingMethod.CLIPBOARD, span)]
+
+        segments: list[tuple[TypingMethod, str]] = []
+        for method, run in planned:
+            if segments and segments[-1][0] == method:
+                segments[-1] = (method, segments[-1][1] + run)
+            else:
+                segments.append((method, run))
+        return segments
 
-    def type_cgevent(self, text: str) -> None:
+    def type_segmented(self, text: str, options: Optional[TypingOptions] = None) -> None:
+        """Type text run by run with the cheapest method for each run.
+
+        Mixed text such as "ReactのuseStateを使う" types the ASCII words
+        with pynput and the Japanese through chunked CGEvent posting
+        instead of sending the whole string down one slow path. See
+        plan_segments for how methods are chosen.
+
+        Args:
+            text: Text to type.
+            options: Settings for this call. If None, uses self.options.
+        """
+        options = options or self.options
+        for method, segment in self.plan_segments(text, options):
+            if method == TypingMethod.PYNPUT:
+                self.type_pynput(segment, options)
+            elif method == TypingMethod.CLIPBOARD:
+                self.type_clipboard(segment, options=options)
+            else:
+                self.last_pacing = type_unicode_batch(
+                    segment,
+                    batch_size=options.chunk_size or MAX_CHUNK_UTF16,
+                    scheduler=self._scheduler(options),
+                    sink=self._sink(),
+                )
+
+    def type_cgevent(self, text: str, options: Optional[TypingOptions] = None) -> None:
         """Type text using CGEvent Unicode method.
 
         Works with any Unicode character including Japanese, Chinese,
-        emoji, etc. Each character is sent as a keyboard event.
+        emoji, etc. Each grapheme cluster is sent as a keyboard event,
+        or, with options.chunk_size set, up to chunk_size UTF-16 units
+        per event.
 
         Args:
             text: Text to type.
+            options: Settings for this call. If None, uses self.options.
         """
-        type_unicode_string(text, delay_ms=self.delay_ms)
+        options = options or self.options
+        if options.chunk_size is not None:
+            self.last_pacing = type_unicode_batch(
+                text,
+                batch_size=options.chunk_size,
+                scheduler=self._scheduler(options),
+                sink=self._sink(),
+            )
+            return
+        self.last_pacing = type_unicode_string(
+            text, scheduler=self._scheduler(options), sink=self._sink()
+        )
 
-    def type_pynput(self, text: str) -> None:
+    def type_pynput(self, text: str, options: Optional[TypingOptions] = None) -> None:
         """Type text using pynput.
 
         Fast but may have issues with non-ASCII characters.
-        Best for short ASCII text.
+        Best for short ASCII text. With a keymap, characters in the
+        current layout's table skip pynput and are posted directly.
 
         Args:
             text: Text to type.
+            options: Settings for this call. If None, uses self.options.
         """
+        options = options or self.options
+        table = self.keymap.get() if self.keymap is not None else {}
+        sink = (self._sink() or get_context()) if table else None
+        scheduler = self._scheduler(options)
+        scheduler.start()
         for char in text:
+            scheduler.check_cancelled()
             if char == "\n":
-                self._keyboard.press(Key.enter)
-                self._keyboard.release(Key.enter)
+                self._keyboard.press("enter")
+                self._keyboard.release("enter")
             elif char == "\t":
-                self._keyboard.press(Key.tab)
-                self._keyboard.release(Key.tab)
+                self._keyboard.press("tab")
+                self._keyboard.release("tab")
             else:
-                self._keyboard.type(char)
-            if self.delay_ms > 0:
-                time.sleep(self.delay_ms / 1000.0)
-
-    def type_clipboard(self, text: str, restore: bool = True) -> None:
+                stroke = table.get(char)
+                if stroke is not None:
+                    sink.post_keycode(*stroke)
+                else:
+                    self._keyboard.type(char)
+            scheduler.tick()
+        self.last_pacing = scheduler.stats()
+
+    def type_clipboard(
+        self,
+        text: str,
+        restore: Optional[bool] = None,
+        options: Optional[TypingOptions] = None,
+    ) -> None:
         """Type text via clipboard paste with optional restore.
 
         Most reliable method for long text. Optionally preserves
-        the original clipboard content.
+        the original clipboard content, including non-text items when
+        the clipboard backend supports snapshot()/restore().
+
+        Instead of fixed sleeps, the copy is confirmed by polling the
+        pasteboard change count (up to COPY_TIMEOUT_S) and the wait for
+        the target to read the paste is bounded by paste_settle. That
+        wait only adapts with lazy_clipboard; otherwise it is a fixed
+        paste_settle.current, which deferred_restore avoids. If
+        another application changes the clipboard in the meantime, the
+        original content is not written back over it. The time actually
+        waited is stored in last_clipboard_timing.
+
+        With deferred_restore, the restore runs later on a background
+        worker and this returns right after the paste chord. A paste
+        made while an earlier restore is still pending takes over that
+        restore, even with restore=False, so the original content is
+        not lost. If the clipboard was written since that paste (the
+        user copied something), the pending restore is dropped and the
+        clipboard is saved again instead.
 
         Args:
             text: Text to type.
-            restore: Whether to restore original clipboard content.
+            restore: Whether to restore original clipboard content. If
+                None, uses options.restore_clipboard.
+            options: Settings for this call. If None, uses self.options.
         """
-        original = None
-        if restore:
-            try:
-                original = pyperclip.paste()
-            except Exception:
-                # Clipboard might be empty or contain non-text data
-                original = None
+        if restore is None:
+            restore = (options or self.options).restore_clipboard
+        timing = ClipboardTiming()
+        restorer = self.deferred_restore
+        pending = restorer.take() if restorer is not None else None
+        if pending is not None and (
+            pending.change_count is None
+            or get_change_count(self._clipboard) == pending.change_count
+        ):
+            # The previous paste is still on the clipboard: keep its original
+            original = pending.saved
+        else:
+            original = save_clipboard(self._clipboard) if restore else None
 
+        ours = None
         try:
-            pyperclip.copy(text)
-            time.sleep(0.05)  # Wait for clipboard to update
+            before = get_change_count(self._clipboard)
+            self._clipboard.copy(text)
+            timing.copy_wait = wait_for_change(
+                self._clipboard, before, self.COPY_TIMEOUT_S, sleep=self._sleep
+            )
+            ours = get_change_count(self._clipboard)
 
-            # Cmd+V to paste
-            self._keyboard.press(Key.cmd)
-            self._keyboard.press("v")
-            self._keyboard.release("v")
-            self._keyboard.release(Key.cmd)
+            self._paste()
 
-            time.sleep(0.1)  # Wait for paste to complete
+            if restorer is None:
+                timing.paste_wait = self.paste_settle.wait(self._clipboard, sleep=self._sleep)
         finally:
-            if restore and original is not None:
+            if original is not None and restorer is not None:
+                restorer.schedule(self._clipboard, original, ours)
+                timing.deferred = True
+            elif original is not None:
                 try:
-                    time.sleep(0.05)
-                    pyperclip.copy(original)
+                    # Leave newer content from another application alone
+                    if ours is None or get_change_count(self._clipboard) == ours:
+                        restore_clipboard(self._clipboard, original)
+                        timing.restored = True
                 except Exception:
                     pass  # Best effort restore
+            self.last_clipboard_timing = timing
+            if self._meter is not None:
+                self._meter.clipboard_wait += timing.total_wait
+
+    def _paste(self) -> None:
+        """Press Cmd+V.
+
+        With a keymap that knows the current layout's "v" key, the chord
+        is posted as one cached key code event pair through the event
+        sink; otherwise it goes through the keyboard (pynput).
+        """
+        table = self.keymap.get() if self.keymap is not None else {}
+        stroke = table.get("v")
+        if stroke is not None:
+            (self._sink() or get_context()).post_paste(stroke[0])
+            return
+        self._keyboard.press("cmd")
+        self._keyboard.press("v")
+        self._keyboard.release("v")
+        self._keyboard.release("cmd")
+
+    def delete_backward(self, count: int, options: Optional[TypingOptions] = None) -> None:
+        """Press Backspace count times, paced like typed characters.
+
+        Each Backspace removes the last cluster of session_text.
+
+        Args:
+            count: Number of characters (grapheme clusters) to delete.
+            options: Settings for this call. If None, uses self.options.
+        """
+        if count <= 0:
+            return
+        clusters = list(iter_graphemes(self.session_text))
+        kept = len(clusters)
+        scheduler = self._scheduler(options or self.options)
+        scheduler.start()
+        try:
+            for _ in range(count):
+                scheduler.check_cancelled()
+                self._keyboard.press("backspace")
+                self._keyboard.release("backspace")
+                kept = max(kept - 1, 0)
+                scheduler.tick()
+        finally:
+            # Drop only what was actually deleted from the session
+            self.session_text = "".join(clusters[:kept])
+        self.last_pacing = scheduler.stats()
+
+    def reset_session(self, text: str = "") -> None:
+        """Start a new correction session for revise().
+
+        Call this when the cursor may have moved, e.g. before a new
+        dictation, or after a failed call, since text typed before the
+        failure is on screen but not in session_text.
+
+        Args:
+            text: Text already in front of the cursor that belongs to
+                the session.
+        """
+        self.session_text = text
+
+    def revise(
+        self,
+        text: str,
+        method: Optional[TypingMethod] = None,
+        options: Optional[TypingOptions] = None,
+    ) -> tuple[int, str]:
+        """Change the text typed in this session into text.
+
+        The session is the text typed by type() or revise() since the
+        last reset_session(). Only the part after the longest common
+        prefix is replaced: the rest of the old text is deleted with
+        Backspace and the new suffix is typed. Revising "I have a pen" to
+        "I have a pencil" types just "cil". The prefix is compared by
+        grapheme cluster, since one Backspace deletes one cluster.
+
+        If deleting or typing fails, session_text keeps the Backspaces
+        that were sent but not a partly typed suffix.
+
+        Args:
+            text: Revised full text of the session.
+            method: Typing method for the suffix. If None, uses
+                options.method.
+            options: Settings for this call. If None, uses self.options.
+
+        Returns:
+            Tuple of (backspaces sent, suffix typed).
+        """
+        old = list(iter_graphemes(self.session_text))
+        new = list(iter_graphemes(text))
+        common = 0
+        for old_cluster, new_cluster in zip(old, new):
+            if old_cluster != new_cluster:
+                break
+            common += 1
+
+        deletes = len(old) - common
+        suffix = "".join(new[common:])
+        self.delete_backward(deletes, options)
+        self.type(suffix, method=method, options=options)
+        return deletes, suffix
 
     def type_with_delay(self, text: str, delay_ms: float) -> None:
         """Type text with a custom delay between characters.
@@ -168,9 +813,137 @@ class DirectTyper:
             text: Text to type.
             delay_ms: Delay between characters in milliseconds.
         """
-        original_delay = self.delay_ms
-        self.delay_ms = delay_ms
+        self.type(text, options=self.with_options(delay_ms=delay_ms))
+
+    def _stream_method(
+        self, method: Optional[TypingMethod], options: TypingOptions
+    ) -> Optional[TypingMethod]:
+        """Return the method to type stream chunks with.
+
+        Clipboard typing becomes segmented typing, so short chunks are
+        typed as keystrokes instead of costing a clipboard round-trip
+        each, and only runs long enough to be worth it are pasted.
+        """
+        if (method or options.method) == TypingMethod.CLIPBOARD:
+            return TypingMethod.SEGMENTED
+        return method
+
+    def _type_stream_chunk(
+        self,
+        chunk: str,
+        method: Optional[TypingMethod],
+        options: TypingOptions,
+        stats: StreamStats,
+        start: float,
+        cancel: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Type one stable chunk of a stream and update its stats."""
+        if not chunk:
+            return
+        if stats.time_to_first_char is None:
+            stats.time_to_first_char = time.perf_counter() - start
+        self.type(chunk, method=method, options=options, cancel=cancel)
+        stats.chunks += 1
+        stats.chars_typed += len(chunk)
+
+    def type_stream(
+        self,
+        stream: Iterable[str],
+        method: Optional[TypingMethod] = None,
+        options: Optional[TypingOptions] = None,
+    ) -> StreamStats:
+        """Type text as it arrives, e.g. tokens streamed from an LLM.
+
+        Typing starts with the first complete grapheme cluster instead of
+        waiting for the whole text. Each chunk is typed with method
+        (AUTO picks per chunk; CLIPBOARD is typed as SEGMENTED so every
+        token is not a clipboard round-trip); a cluster split across
+        tokens is held back until it is complete.
+
+        Args:
+            stream: Iterable of text pieces.
+            method: Typing method per chunk. If None, uses options.method.
+            options: Settings for the whole stream. If None, uses
+                self.options as of the start of the call.
+
+        Returns:
+            StreamStats for the call.
+        """
+        options = options or self.options
+        method = self._stream_method(method, options)
+        start = time.perf_counter()
+        stats = StreamStats()
+        buffer = StreamBuffer()
+        for token in stream:
+            buffer.feed(token)
+            self._type_stream_chunk(buffer.take(), method, options, stats, start)
+        self._type_stream_chunk(buffer.flush(), method, options, stats, start)
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    async def atype_stream(
+        self,
+        stream: AsyncIterable[str],
+        method: Optional[TypingMethod] = None,
+        options: Optional[TypingOptions] = None,
+    ) -> StreamStats:
+        """Type text from an async stream without blocking the event loop.
+
+        Typing runs in a worker thread while the stream keeps being read.
+        Tokens that arrive while a chunk is being typed are collected and
+        typed together as the next chunk, so a fast stream is sent in
+        fewer, larger calls. Methods are chosen as in type_stream.
+
+        If the stream raises (or the call is cancelled), the chunk being
+        typed stops at its next keystroke and is waited for before the
+        error propagates, so nothing is typed after this returns.
+
+        Args:
+            stream: Async iterable of text pieces.
+            method: Typing method per chunk. If None, uses options.method.
+            options: Settings for the whole stream. If None, uses
+                self.options as of the start of the call.
+
+        Returns:
+            StreamStats for the call.
+        """
+        options = options or self.options
+        method = self._stream_method(method, options)
+        start = time.perf_counter()
+        stats = StreamStats()
+        buffer = StreamBuffer()
+        stopped = threading.Event()
+        typing: Optional[asyncio.Future] = None
         try:
-            self.type(text)
+            async for token in stream:
+                buffer.feed(token)
+                if typing is None or typing.done():
+                    if typing is not None:
+                        typing.result()  # Re-raise typing errors
+                    typing = asyncio.ensure_future(
+                        asyncio.to_thread(
+                            self._type_stream_chunk,
+                            buffer.take(),
+                            method,
+                            options,
+                            stats,
+                            start,
+                            stopped.is_set,
+                        )
+                    )
+            if typing is not None:
+                # Shielded so cancelling this call leaves the chunk to the finally block
+                await asyncio.shield(typing)
+            await asyncio.to_thread(
+                self._type_stream_chunk, buffer.flush(), method, options, stats, start
+            )
         finally:
-            self.delay_ms = original_delay
+            if typing is not None:
+                if not typing.done():
+                    stopped.set()
+                    await asyncio.wait([typing])
+                # Mark a typing error as seen; the stream's own error propagates
+                if not typing.cancelled():
+                    typing.exception()
+        stats.elapsed = time.perf_counter() - start
+        return stats
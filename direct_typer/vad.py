@@ -0,0 +1,181 @@
+"""発話区間検出（VAD）モジュール。
+
+録音をフレームに区切り、エネルギーとゼロ交差率から発話かどうかを判定する。
+判定は numpy でフレーム単位にまとめて行う。先頭と末尾の無音を削り、
+必要なら途中の長い間も短くして、アップロードと文字起こしの量を減らす。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class VadConfig:
+    """VAD 設定。
+
+    Attributes:
+        frame_ms: 判定するフレームの長さ（ミリ秒）。
+        energy_db: 発話とみなす RMS（dBFS）。
+        weak_energy_db: ゼロ交差率が高いフレームを発話とみなす RMS の下限（dBFS）。
+            摩擦音（「さ」「し」など）は弱くてもゼロ交差が多い。
+        zcr_threshold: 弱いフレームを発話とみなすゼロ交差率（0〜1）。
+        padding_ms: 発話の前後に残す長さ（ミリ秒）。
+        max_pause_ms: 途中の間をこの長さまで縮める（ミリ秒）。None の場合は縮めない。
+        min_speech_ms: 発話フレームの合計がこれ未満なら発話なしとする（ミリ秒）。
+    """
+
+    frame_ms: int = 20
+    energy_db: float = -40.0
+    weak_energy_db: float = -50.0
+    zcr_threshold: float = 0.3
+    padding_ms: int = 200
+    max_pause_ms: int | None = None
+    min_speech_ms: int = 100
+
+    def frame_length(self, sample_rate: int) -> int:
+        """1 フレームのサンプル数を返す。"""
+        return max(1, sample_rate * self.frame_ms // 1000)
+
+    def frames_for(self, ms: int) -> int:
+        """ミリ秒をフレーム数に換算する（切り上げ）。"""
+        return -(-ms // self.frame_ms)
+
+
+def frame_activity(samples: np.ndarray, sample_rate: int, config: VadConfig) -> np.ndarray:
+    """フレームごとに発話かどうかを判定する。
+
+    端数のサンプルも 1 フレームとして扱う。
+
+    Args:
+        samples: (frames, channels) または (frames,) の int16 配列。
+        sample_rate: サンプリングレート（Hz）。
+        config: VAD 設定。
+
+    Returns:
+        フレームごとの bool 配列。
+    """
+    mono = samples.reshape(len(samples), -1).mean(axis=1, dtype=np.float32) / 32768.0
+    length = config.frame_length(sample_rate)
+    count = -(-len(mono) // length)
+    if count == 0:
+        return np.zeros(0, dtype=bool)
+    padded = np.zeros(count * length, dtype=np.float32)
+    padded[: len(mono)] = mono
+    frames = padded.reshape(count, length)
+
+    # 端数フレームは実際のサンプル数で平均する
+    sizes = np.full(count, length, dtype=np.float32)
+    sizes[-1] = len(mono) - (count - 1) * length
+    rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / sizes)
+    energy_db = 20 * np.log10(np.maximum(rms, 1e-10))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / np.maximum(sizes - 1, 1)
+
+    loud = energy_db >= config.energy_db
+    fricative = (energy_db >= config.weak_energy_db) & (zcr >= config.zcr_threshold)
+    return loud | fricative
+
+
+def _dilate(active: np.ndarray, radius: int) -> np.ndarray:
+    """発話フレームを前後 radius フレームずつ広げる。"""
+    if radius <= 0 or not active.any():
+        return active
+    kernel = np.ones(2 * radius + 1, dtype=np.int32)
+    return np.convolve(active.astype(np.int32), kernel, mode="same") > 0
+
+
+@dataclass(frozen=True)
+class VadResult:
+    """VAD の結果。
+
+    Attributes:
+        samples: 無音を除いたサンプル。間を縮めていなければ元配列のビュー。
+        original_frames: 元のサンプル数。
+        start: 残した先頭サンプルの位置。
+        end: 残した末尾サンプルの位置（含まない）。
+        has_speech: 発話があったかどうか。
+        contiguous: samples が元配列の [start, end) そのままかどうか。
+    """
+
+    samples: np.ndarray
+    original_frames: int
+    start: int
+    end: int
+    has_speech: bool
+    contiguous: bool = True
+
+    @property
+    def removed_ratio(self) -> float:
+        """除いた割合（0〜1）を返す。"""
+        if not self.original_frames:
+            return 0.0
+        return 1 - len(self.samples) / self.original_frames
+
+
+def trim_silence(
+    samples: np.ndarray, sample_rate: int, config: VadConfig | None = None
+) -> VadResult:
+    """先頭と末尾の無音を除き、必要なら途中の長い間を縮める。
+
+    Args:
+        samples: (frames, channels) の int16 配列。
+        sample_rate: サンプリングレート（Hz）。
+        config: VAD 設定。None の場合はデフォルト設定を使用。
+
+    Returns:
+        VadResult。発話がなければ samples は空になる。
+    """
+    config = config or VadConfig()
+    active = frame_activity(samples, sample_rate, config)
+    length = config.frame_length(sample_rate)
+    total = len(samples)
+
+    if np.count_nonzero(active) < config.frames_for(config.min_speech_ms):
+        return VadResult(samples[:0], total, 0, 0, has_speech=False)
+
+    keep = _dilate(active, config.frames_for(config.padding_ms))
+    speech = np.flatnonzero(keep)
+    first, last = int(speech[0]), int(speech[-1]) + 1
+    start, end = first * length, min(last * length, total)
+
+    if config.max_pause_ms is not None:
+        limit = config.frames_for(config.max_pause_ms)
+        inner = keep[first:last]
+        # 途中の無音区間を探し、limit より長ければ中央を削る
+        edges = np.flatnonzero(np.diff(inner.astype(np.int8)))
+        gap_starts = edges[inner[edges]] + 1
+        gap_ends = edges[~inner[edges]] + 1
+        retain = np.ones(len(inner), dtype=bool)
+        for gap_start, gap_end in zip(gap_starts, gap_ends):
+            if gap_end - gap_start > limit:
+                head = gap_start + limit // 2
+                retain[head : head + (gap_end - gap_start) - limit] = False
+        if not retain.all():
+            mask = np.repeat(retain, length)[: end - start]
+            trimmed = samples[start:end][mask]
+            return VadResult(trimmed, total, start, end, has_speech=True, contiguous=False)
+
+    return VadResult(samples[start:end], total, start, end, has_speech=True)
+
+
+def first_speech_frame(
+    samples: np.ndarray, sample_rate: int, config: VadConfig
+) -> int | None:
+    """最初の発話フレームの番号を返す。
+
+    録音中に少しずつ呼ぶ場合は、samples の先頭をフレーム境界に揃えること。
+
+    Args:
+        samples: (frames, channels) の int16 配列。完全なフレームだけを判定する。
+        sample_rate: サンプリングレート（Hz）。
+        config: VAD 設定。
+
+    Returns:
+        samples 先頭からのフレーム番号。発話がなければ None。
+    """
+    length = config.frame_length(sample_rate)
+    complete = len(samples) - len(samples) % length
+    active = frame_activity(samples[:complete], sample_rate, config)
+    found = np.flatnonzero(active)
+    return int(found[0]) if len(found) else None
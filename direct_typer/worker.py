@@ -0,0 +1,226 @@
+"""Background typing worker with a FIFO job queue.
+
+Typing can take seconds for long text. TypingWorker moves it off the
+calling thread (e.g. the hotkey listener) onto one dedicated thread, so
+jobs are typed strictly in order and never interleave. Each job has a
+Future for completion and can be cancelled; a running job stops at the
+next keystroke. Consecutive queued jobs are typed as one operation (a
+single DirectTyper.type call), so several dictations that pile up while
+typing cost one clipboard round-trip instead of one each.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from direct_typer.typer import DirectTyper, TypingMethod, TypingOptions
+
+
+class TypingJob:
+    """Text queued on a TypingWorker.
+
+    Attributes:
+        text: Text to type.
+        method: Typing method, or None for the typer's default.
+        options: Typing options, or None for the typer's default.
+        mergeable: Whether the job may be typed together with adjacent jobs.
+        future: Resolves to the number of characters typed, or raises
+            CancelledError if the job was cancelled.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        method: Optional["TypingMethod"],
+        options: Optional["TypingOptions"],
+        mergeable: bool,
+    ):
+        """Initialize TypingJob."""
+        self.text = text
+        self.method = method
+        self.options = options
+        self.mergeable = mergeable
+        self.future: Future = Future()
+        self._cancel_requested = threading.Event()
+        # Jobs typed in the same call as this one, set when typing starts
+        self._batch: list[TypingJob] = [self]
+
+    @property
+    def cancel_requested(self) -> bool:
+        """Whether cancel() was called."""
+        return self._cancel_requested.is_set()
+
+    def cancel(self) -> bool:
+        """Cancel the job.
+
+        A queued job is dropped. A running job stops before its next
+        keystroke once every job merged with it is cancelled too (as
+        cancel_all does); text already typed stays typed. A clipboard
+        paste is not interrupted.
+
+        Returns:
+            True if the job was dropped or its typing stops before the
+            next keystroke. False if it had already finished, or if it
+            keeps typing because a job merged with it is not cancelled.
+        """
+        if self.future.done():
+            return False
+        self._cancel_requested.set()
+        if self.future.cancel():
+            return True
+        return all(job.cancel_requested for job in self._batch)
+
+    def result(self, timeout: Optional[float] = None) -> int:
+        """Wait for the job and return the number of characters typed."""
+        return self.future.result(timeout)
+
+    def done(self) -> bool:
+        """Whether the job has finished, failed, or been cancelled."""
+        return self.future.done()
+
+
+class TypingWorker:
+    """Types queued jobs in order on a single background thread."""
+
+    def __init__(self, typer: "DirectTyper"):
+        """Initialize TypingWorker.
+
+        Args:
+            typer: Typer the jobs are sent through.
+        """
+        self._typer = typer
+        self._queue: deque[TypingJob] = deque()
+        self._running: list[TypingJob] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def submit(
+        self,
+        text: str,
+        method: Optional["TypingMethod"] = None,
+        options: Optional["TypingOptions"] = None,
+        merge: bool = True,
+    ) -> TypingJob:
+        """Queue text for typing.
+
+        Args:
+            text: Text to type.
+            method: Typing method. If None, uses the typer's default.
+            options: Typing options. If None, uses the typer's default
+                options at the time the job is typed.
+            merge: Allow typing this job together with adjacent queued
+                jobs that use the same method and options.
+
+        Returns:
+            The queued job.
+
+        Raises:
+            RuntimeError: If the worker has been shut down.
+        """
+        job = TypingJob(text, method, options, merge)
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("TypingWorker has been shut down")
+            self._queue.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="typing-worker", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return job
+
+    def cancel_all(self) -> None:
+        """Cancel every queued and running job."""
+        with self._condition:
+            jobs = list(self._queue)
+            self._queue.clear()
+            running = self._running
+        for job in jobs + running:
+            job.cancel()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and stop the worker once the queue is empty.
+
+        Args:
+            wait: Block until queued jobs have been typed.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            thread = self._thread
+        if wait and thread is not None:
+            thread.join()
+
+    def _next_batch(self) -> Optional[list[TypingJob]]:
+        """Wait for the next job and take it with any jobs it merges with."""
+        with self._condition:
+            while not self._queue:
+                if self._stopping:
+                    return None
+                self._condition.wait()
+            batch: list[TypingJob] = []
+            while self._queue:
+                job = self._queue[0]
+                first = batch[0] if batch else None
+                if first is not None and not (
+                    first.mergeable
+                    and job.mergeable
+                    and job.method == first.method
+                    and job.options == first.options
+                ):
+                    break
+                self._queue.popleft()
+                job._batch = batch
+                # Skips jobs cancelled while queued
+                if job.future.set_running_or_notify_cancel():
+                    batch.append(job)
+            self._running = batch
+            return batch
+
+    def _run(self) -> None:
+        """Worker loop."""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if batch:
+                self._type_batch(batch)
+            with self._condition:
+                self._running = []
+
+    def _type_batch(self, batch: list[TypingJob]) -> None:
+        """Type a batch with one typing call.
+
+        The whole text goes through a single DirectTyper.type call, so
+        AUTO picks one method for it and clipboard typing makes one
+        round-trip. The call is cancelled at the next keystroke once
+        every job in the batch is cancelled.
+        """
+        method, options = batch[0].method, batch[0].options
+        live = []
+        for job in batch:
+            if job.cancel_requested:
+                job.future.set_exception(CancelledError())
+            else:
+                live.append(job)
+        if not live:
+            return
+
+        text = "".join(job.text for job in live)
+        try:
+            self._typer.type(
+                text,
+                method=method,
+                options=options,
+                cancel=lambda: all(job.cancel_requested for job in live),
+            )
+        except Exception as e:
+            for job in live:
+                job.future.set_exception(e)
+        else:
+            for job in live:
+                job.future.set_result(len(job.text))
@@ -0,0 +1,39 @@
+"""Shared pytest configuration."""
+
+import os
+import sys
+
+import pytest
+
+# pynput needs an X server on Linux; its dummy backend lets the typing
+# code be imported and driven through MemoryBackend in headless CI.
+if sys.platform != "darwin":
+    os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+
+@pytest.fixture
+def make_typer():
+    """Return a factory for DirectTypers whose outputs all go to one backend.
+
+    The factory takes the MemoryBackend and DirectTyper keyword arguments,
+    with delay_ms defaulting to 0. Passing store enables per-app profiles
+    for a StaticAppIdentity reporting app_id.
+    """
+    from direct_typer.profiles import StaticAppIdentity
+    from direct_typer.typer import DirectTyper
+
+    def factory(
+        backend, *, delay_ms=0, store=None, telemetry=None, app_id="com.example.editor", **kwargs
+    ):
+        if store is not None:
+            kwargs.update(profiles=store, app_identity=StaticAppIdentity(app_id))
+        return DirectTyper(
+            delay_ms=delay_ms,
+            keyboard=backend,
+            clipboard=backend,
+            event_sink=backend,
+            telemetry=telemetry,
+            **kwargs,
+        )
+
+    return factory
@@ -0,0 +1,250 @@
+"""Tests for audiobuffer module."""
+
+import io
+import wave
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from direct_typer.audiobuffer import SampleBuffer
+from direct_typer.recorder import AudioRecorder, RecordedAudio, RecordingConfig
+from tests.test_flac import decode
+
+
+def block(start, count, channels=1):
+    """Create a block of consecutive int16 samples."""
+    return np.arange(start, start + count * channels, dtype=np.int16).reshape(-1, channels)
+
+
+class TestSampleBuffer:
+    """Test preallocated sample storage."""
+
+    def test_writes_in_place(self):
+        """Test that blocks land in the preallocated array and view is zero-copy."""
+        buffer = SampleBuffer(10)
+        buffer.write(block(0, 4))
+        buffer.write(block(4, 3))
+
+        view = buffer.view()
+        assert view[:, 0].tolist() == list(range(7))
+        assert np.shares_memory(view, buffer._data)
+
+    def test_stops_when_full(self):
+        """Test that writes beyond capacity are dropped."""
+        buffer = SampleBuffer(5)
+        assert buffer.write(block(0, 4)) == 4
+        assert buffer.write(block(4, 4)) == 1
+        assert buffer.full
+        assert buffer.view()[:, 0].tolist() == [0, 1, 2, 3, 4]
+
+    def test_raw_bytes(self):
+        """Test writing interleaved buffers from a raw stream."""
+        buffer = SampleBuffer(4, channels=2)
+        buffer.write(block(0, 2, channels=2).tobytes())
+
+        assert buffer.frames == 2
+        assert buffer.view().tolist() == [[0, 1], [2, 3]]
+
+    def test_ring_keeps_latest(self):
+        """Test that ring mode keeps the most recent frames in order."""
+        buffer = SampleBuffer(5, ring=True)
+        for start in range(0, 12, 3):
+            buffer.write(block(start, 3))
+
+        view = buffer.view()
+        assert view[:, 0].tolist() == [7, 8, 9, 10, 11]
+        assert np.shares_memory(view, buffer._data)
+        assert buffer.written == 12
+        assert not buffer.full
+
+    def test_ring_block_larger_than_capacity(self):
+        """Test that an oversized block leaves only its tail."""
+        buffer = SampleBuffer(3, ring=True)
+        buffer.write(block(0, 7))
+        assert buffer.view()[:, 0].tolist() == [4, 5, 6]
+
+    def test_clear_and_view_start(self):
+        """Test resetting the buffer and skipping leading frames."""
+        buffer = SampleBuffer(5)
+        buffer.write(block(0, 5))
+        assert buffer.view(start=3)[:, 0].tolist() == [3, 4]
+
+        buffer.clear()
+        assert buffer.frames == 0
+        assert len(buffer.view()) == 0
+
+    def test_view_range_by_position(self):
+        """Test reading absolute positions, including after the ring wraps."""
+        buffer = SampleBuffer(4, ring=True)
+        buffer.write(block(0, 6))
+        assert buffer.view_range(3, 6)[:, 0].tolist() == [3, 4, 5]
+        assert buffer.view_range(0, 4)[:, 0].tolist() == [2, 3]  # 0 and 1 are gone
+
+    def test_invalid_capacity(self):
+        """Test that an empty buffer is rejected."""
+        with pytest.raises(ValueError):
+            SampleBuffer(0)
+
+
+class TestAudioRecorder:
+    """Test recording into the preallocated buffer."""
+
+    def record(self, config, blocks):
+        """Run a recording, feeding blocks to the stream callback."""
+        recorder = AudioRecorder(config)
+        recorder.ENCODE_INTERVAL = 3600  # Encoded explicitly below
+        with patch("direct_typer.recorder.sd") as sd:
+            sd.CallbackAbort = RuntimeError
+            recorder.start()
+            stream_class = sd.RawInputStream if config.raw else sd.InputStream
+            callback = stream_class.call_args.kwargs["callback"]
+            for data in blocks:
+                try:
+                    callback(data, len(data), {}, None)
+                except RuntimeError:
+                    break
+                if recorder._encoder is not None:
+                    recorder._encode_pending()
+            audio = recorder.stop()
+        return recorder, audio
+
+    def test_returns_view_of_recorded_samples(self):
+        """Test that stop returns the samples without copying or writing files."""
+        recorder, audio = self.record(RecordingConfig(), [block(0, 160), block(160, 160)])
+
+        assert audio.samples[:, 0].tolist() == list(range(320))
+        assert np.shares_memory(audio.samples, recorder.audio)
+        assert audio.duration == pytest.approx(0.02)
+
+    def test_timeout_when_buffer_full(self):
+        """Test that reaching max_duration stops recording."""
+        config = RecordingConfig(sample_rate=100, max_duration=1, raw=True)
+        recorder, audio = self.record(config, [block(0, 60).tobytes()] * 3)
+
+        assert recorder.is_timeout
+        assert len(audio.samples) == 100
+
+    def test_compresses_while_recording(self):
+        """Test that the FLAC payload is built during recording and is lossless."""
+        blocks = [block(i * 5000, 5000) for i in range(3)]
+        _, audio = self.record(RecordingConfig(), blocks)
+
+        assert audio.upload_name == "recording.flac"
+        assert audio.upload_size == len(audio.encoded) < audio.size
+        assert np.array_equal(decode(audio.encoded)[1], audio.samples)
+
+    def test_wav_codec(self):
+        """Test that codec="wav" uploads the uncompressed WAV."""
+        _, audio = self.record(RecordingConfig(codec="wav"), [block(0, 160)])
+
+        assert audio.encoded is None
+        name, content = audio.payload()
+        assert name == "recording.wav"
+        assert content.read() == audio.header + audio.samples.tobytes()
+
+    def test_ring_reencodes_retained_audio(self):
+        """Test that a wrapped ring buffer is encoded from what it kept."""
+        config = RecordingConfig(sample_rate=100, max_duration=1, ring=True)
+        _, audio = self.record(config, [block(i * 60, 60) for i in range(3)])
+
+        assert audio.samples[:, 0].tolist() == list(range(80, 180))
+        assert np.array_equal(decode(audio.encoded)[1], audio.samples)
+
+    def test_debug_dir(self, tmp_path):
+        """Test that recordings are written to disk only when asked."""
+        _, audio = self.record(RecordingConfig(debug_dir=tmp_path), [block(0, 160)])
+
+        [path] = tmp_path.glob("*.wav")
+        with wave.open(str(path), "rb") as wf:
+            assert wf.getnframes() == 160
+
+
+class TestWarmStream:
+    """Test the always-open input stream with pre-roll."""
+
+    def feed(self, callback, start, count, size=20):
+        """Feed consecutive samples to the stream callback in blocks."""
+        for offset in range(start, start + count, size):
+            callback(block(offset, size), size, {}, None)
+
+    def test_start_includes_pre_roll_and_keeps_stream(self):
+        """Test that start marks pre-roll and stop leaves the stream open."""
+        config = RecordingConfig(sample_rate=100, warm=True, pre_roll_ms=200)
+        recorder = AudioRecorder(config)
+        recorder.ENCODE_INTERVAL = 3600
+        with patch("direct_typer.recorder.sd") as sd:
+            recorder.open()
+            callback = sd.InputStream.call_args.kwargs["callback"]
+            self.feed(callback, 0, 100)
+            recorder.start()
+            self.feed(callback, 100, 60)
+            recorder._encode_pending()
+            first = recorder.stop()
+            self.feed(callback, 160, 40)  # Idle audio keeps flowing
+            recorder.start()
+            self.feed(callback, 200, 40)
+            second = recorder.stop()
+
+        assert sd.InputStream.call_count == 1
+        sd.InputStream.return_value.stop.assert_not_called()
+        assert recorder.is_open
+        assert first.samples[:, 0].tolist() == list(range(80, 160))
+        assert np.array_equal(decode(first.encoded)[1], first.samples)
+        assert second.samples[:, 0].tolist() == list(range(180, 240))
+        assert not np.shares_memory(second.samples, recorder.audio)
+
+    def test_timeout_does_not_abort_stream(self):
+        """Test that max_duration is flagged without stopping the stream."""
+        config = RecordingConfig(sample_rate=100, max_duration=1, warm=True, pre_roll_ms=100)
+        recorder = AudioRecorder(config)
+        with patch("direct_typer.recorder.sd") as sd:
+            recorder.open()
+            callback = sd.InputStream.call_args.kwargs["callback"]
+            self.feed(callback, 0, 40)
+            recorder.start()
+            self.feed(callback, 40, 140)
+            assert recorder.is_timeout
+            audio = recorder.stop()
+
+        assert audio.samples[:, 0].tolist() == list(range(30, 140))
+
+    def test_cold_start_opens_stream(self):
+        """Test that start opens the stream when open was not called."""
+        recorder = AudioRecorder(RecordingConfig(warm=True, codec="wav"))
+        with patch("direct_typer.recorder.sd") as sd:
+            recorder.start()
+            callback = sd.InputStream.call_args.kwargs["callback"]
+            callback(block(0, 160), 160, {}, None)
+            audio = recorder.stop()
+            recorder.close()
+
+        assert len(audio.samples) == 160
+        assert not recorder.is_open
+
+
+class TestRecordedAudio:
+    """Test the in-memory WAV."""
+
+    def test_stream_is_valid_wav(self):
+        """Test that the reader yields a WAV file holding the samples."""
+        audio = RecordedAudio(block(0, 1000, channels=2), sample_rate=16000)
+        data = audio.open().read()
+
+        assert len(data) == audio.size
+        with wave.open(io.BytesIO(data), "rb") as wf:
+            assert (wf.getnchannels(), wf.getframerate(), wf.getsampwidth()) == (2, 16000, 2)
+            frames = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        assert frames.tolist() == list(range(2000))
+
+    def test_chunked_reads_and_seek(self):
+        """Test reading in small chunks across the header boundary."""
+        audio = RecordedAudio(block(0, 100), sample_rate=8000)
+        reader = audio.open()
+        chunks = iter(lambda: reader.read(30), b"")
+        data = b"".join(chunks)
+
+        assert data == audio.header + audio.samples.tobytes()
+        assert reader.seek(0, io.SEEK_END) == audio.size
+        reader.seek(40)
+        assert reader.read(8) == data[40:48]
@@ -0,0 +1,69 @@
+"""Tests for backends module."""
+
+from direct_typer.backends import MemoryBackend
+from direct_typer.cgevent import type_unicode_batch, type_unicode_string
+from direct_typer.typer import TypingMethod
+
+
+
+class TestMemoryBackend:
+    """Test MemoryBackend recording."""
+
+    def test_records_timestamps(self):
+        """Test that events are stamped with the injected clock."""
+        ticks = iter([1.0, 2.0])
+        backend = MemoryBackend(clock=lambda: next(ticks))
+        backend.post_unicode("a")
+
+        assert [e.timestamp for e in backend.events] == [1.0, 2.0]
+        assert [e.kind for e in backend.events] == ["key_down", "key_up"]
+
+    def test_clipboard_round_trip(self):
+        """Test copy and paste through the in-memory clipboard."""
+        backend = MemoryBackend()
+        backend.copy("text")
+
+        assert backend.paste() == "text"
+        assert backend.key_event_count == 0
+
+
+class TestCGEventWithSink:
+    """Test the CGEvent functions against an in-memory sink."""
+
+    def test_string_posts_one_pair_per_character(self):
+        """Test that type_unicode_string posts two events per cluster."""
+        backend = MemoryBackend()
+        type_unicode_string("日本語\n", delay_ms=0, sink=backend)
+
+        assert backend.key_event_count == 8
+        assert backend.typed_text() == "日本語\n"
+
+    def test_batch_cuts_events_per_char(self):
+        """Test that batching posts far fewer events than characters."""
+        text = "音声入力で日本語の文章を書いています。" * 10
+        backend = MemoryBackend()
+        type_unicode_batch(text, delay_ms=0, sink=backend)
+
+        assert backend.typed_text() == text
+        assert backend.events_per_char(len(text)) <= 0.2
+
+
+class TestDirectTyperWithBackend:
+    """Test DirectTyper with injected backends."""
+
+    def test_every_method_types_the_text(self, make_typer):
+        """Test that each method produces the same text."""
+        text = "Hello\tworld\n"
+        for method in (TypingMethod.CGEVENT, TypingMethod.PYNPUT, TypingMethod.CLIPBOARD):
+            backend = MemoryBackend()
+            make_typer(backend).type(text, method=method)
+            assert backend.typed_text() == text, method
+
+    def test_clipboard_is_restored(self, make_typer):
+        """Test that the clipboard method restores the previous content."""
+        backend = MemoryBackend()
+        backend.copy("original")
+        make_typer(backend).type_clipboard("new text")
+
+        assert backend.clipboard == "original"
+        assert backend.typed_text() == "new text"
@@ -0,0 +1,99 @@
+"""Tests for benchmark module."""
+
+import json
+import subprocess
+import sys
+
+from direct_typer.benchmark import (
+    CORPORA,
+    SleepMeter,
+    make_text,
+    run_benchmarks,
+    run_case,
+    run_target_benchmarks,
+    to_json,
+)
+from direct_typer.backends import MemoryBackend
+from direct_typer.cgevent import TARGET_PID, iter_graphemes
+from direct_typer.typer import TypingMethod
+
+
+class TestMakeText:
+    """Test benchmark corpus generation."""
+
+    def test_length_in_grapheme_clusters(self):
+        """Test that emoji text is cut on cluster boundaries."""
+        text = make_text("emoji", 7)
+        assert len(list(iter_graphemes(text))) == 7
+
+    def test_all_corpora(self):
+        """Test that every corpus produces text."""
+        for corpus in CORPORA:
+            assert make_text(corpus, 3)
+
+
+class TestSleepMeter:
+    """Test sleep accounting."""
+
+    def test_counts_sleep(self):
+        """Test that sleeps through the meter are added up."""
+        meter = SleepMeter()
+        meter.sleep(0.002)
+
+        assert meter.total >= 0.002
+
+    def test_run_case_counts_pacing_sleep(self):
+        """Test that the typer's pacing sleeps go through the meter."""
+        _, _, slept = run_case(TypingMethod.CGEVENT, "abc", repeat=1, delay_ms=2)
+
+        assert slept > 0
+
+
+class TestRunBenchmarks:
+    """Test running benchmarks end to end."""
+
+    def test_results_and_json(self):
+        """Test that every case is measured and exports to JSON."""
+        methods = (TypingMethod.CGEVENT, TypingMethod.PYNPUT)
+        results = run_benchmarks(
+            methods=methods, corpora=["japanese"], lengths=(5,), repeat=2, delay_ms=0
+        )
+
+        assert [r.method for r in results] == ["cgevent", "pynput"]
+        assert all(r.events_per_char == 2.0 for r in results)
+
+        data = json.loads(json.dumps(to_json(results, repeat=2, delay_ms=0)))
+        assert data["meta"]["delay_ms"] == 0
+        assert len(data["results"]) == 2
+
+    def test_targets(self):
+        """Test that each event target is measured through its own sink."""
+        sinks = {}
+
+        def factory(target):
+            return sinks.setdefault(target, MemoryBackend())
+
+        results = run_target_benchmarks(
+            ["hid", "pid:42"],
+            corpora=["japanese"],
+            lengths=(5,),
+            repeat=2,
+            delay_ms=0,
+            context_factory=factory,
+        )
+
+        assert [r.method for r in results] == ["cgevent@hid", "cgevent@pid:42"]
+        assert all(r.events_per_char == 2.0 for r in results)
+        assert [t.route for t in sinks] == ["hid", TARGET_PID]
+        assert all(sink.typed_text() for sink in sinks.values())
+
+    def test_runs_without_pynput(self):
+        """Test that the benchmark works where pynput cannot be imported."""
+        code = (
+            "import sys; sys.modules['pynput'] = None\n"
+            "from direct_typer.benchmark import run_benchmarks\n"
+            "run_benchmarks(corpora=['ascii_code'], lengths=(5,), repeat=1, delay_ms=0)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+        assert result.returncode == 0, result.stderr
@@ -0,0 +1,321 @@
+"""Tests for clipboard module."""
+
+from unittest.mock import MagicMock, patch
+
+import time
+
+import pytest
+
+from direct_typer.backends import MemoryBackend
+from direct_typer.clipboard import (
+    DeferredRestore,
+    NativePasteboard,
+    PasteSettle,
+    PyperclipClipboard,
+    default_clipboard,
+    get_change_count,
+    wait_for_change,
+)
+from direct_typer.typer import DirectTyper
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestWaitForChange:
+    """Test change-count polling."""
+
+    def test_returns_immediately_when_already_changed(self):
+        """Test that a visible write needs no wait."""
+        backend = MemoryBackend()
+        before = get_change_count(backend)
+        backend.copy("text")
+        clock = FakeClock()
+
+        waited = wait_for_change(backend, before, 0.05, clock=clock, sleep=clock.sleep)
+        assert waited == 0.0
+
+    def test_times_out_without_change(self):
+        """Test that polling stops at the deadline."""
+        backend = MemoryBackend()
+        clock = FakeClock()
+
+        waited = wait_for_change(
+            backend, get_change_count(backend), 0.05, clock=clock, sleep=clock.sleep
+        )
+        assert waited == pytest.approx(0.05)
+
+    def test_unknown_change_count_sleeps_timeout(self):
+        """Test the fallback for backends without a change count."""
+        clock = FakeClock()
+        waited = wait_for_change(object(), None, 0.05, clock=clock, sleep=clock.sleep)
+        assert waited == pytest.approx(0.05)
+
+
+class ReadSignalClipboard(MemoryBackend):
+    """MemoryBackend that reports a fixed read latency."""
+
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    def wait_for_read(self, timeout):
+        return self.latency
+
+
+class TestPasteSettle:
+    """Test adaptive paste settling."""
+
+    def test_sleeps_current_without_read_signal(self):
+        """Test that backends without a read signal get the bounded wait."""
+        settle = PasteSettle(initial=0.1)
+        clock = FakeClock()
+
+        assert settle.wait(object(), clock=clock, sleep=clock.sleep) == pytest.approx(0.1)
+
+    def test_eager_copy_keeps_fixed_wait(self):
+        """Test that a backend with no pending read never changes the wait."""
+        clipboard = ReadSignalClipboard(0.005)
+        clipboard.read_pending = False
+        settle = PasteSettle(initial=0.1)
+        clock = FakeClock()
+        for _ in range(5):
+            assert settle.wait(clipboard, clock=clock, sleep=clock.sleep) == pytest.approx(0.1)
+
+        assert settle.current == pytest.approx(0.1)
+
+    def test_learns_from_read_latency(self):
+        """Test that observed reads shrink the wait towards the minimum."""
+        settle = PasteSettle(initial=0.15, minimum=0.02, maximum=0.15)
+        for _ in range(20):
+            settle.wait(ReadSignalClipboard(0.005))
+
+        assert settle.current == pytest.approx(0.02, abs=1e-3)
+
+    def test_slow_reads_raise_the_wait(self):
+        """Test that the estimate can grow above its starting value."""
+        settle = PasteSettle()
+        for _ in range(20):
+            settle.wait(ReadSignalClipboard(0.2))
+
+        assert settle.current == pytest.approx(0.4, abs=1e-3)
+
+    def test_missing_read_backs_off_to_maximum(self):
+        """Test that a read timeout pushes the estimate up."""
+        settle = PasteSettle(initial=0.02, minimum=0.02, maximum=0.15)
+        settle.wait(ReadSignalClipboard(None))
+
+        assert settle.current > 0.02
+
+
+class TestTypeClipboardSync:
+    """Test clipboard typing synchronization in DirectTyper."""
+
+    def test_reports_timing(self, make_typer):
+        """Test that waits are reported and the copy wait is skipped."""
+        backend = MemoryBackend()
+        backend.copy("original")
+        typer = make_typer(backend)
+        typer.paste_settle = PasteSettle(initial=0.0, minimum=0.0)
+        typer.type_clipboard("new text")
+
+        timing = typer.last_clipboard_timing
+        assert timing.copy_wait < DirectTyper.COPY_TIMEOUT_S
+        assert timing.restored is True
+        assert backend.clipboard == "original"
+
+    def test_does_not_clobber_newer_content(self, make_typer):
+        """Test that restore is skipped if another app wrote meanwhile."""
+        backend = MemoryBackend()
+        backend.copy("original")
+        typer = make_typer(backend)
+        typer.paste_settle = PasteSettle(initial=0.0, minimum=0.0)
+
+        original_release = backend.release
+
+        def release_and_copy(key):
+            original_release(key)
+            if key == "cmd":
+                backend.copy("from another app")
+
+        backend.release = release_and_copy
+        typer.type_clipboard("new text")
+
+        assert backend.clipboard == "from another app"
+        assert typer.last_clipboard_timing.restored is False
+
+
+class SnapshotClipboard(MemoryBackend):
+    """MemoryBackend that also holds non-text pasteboard items."""
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = items
+
+    def copy(self, text):
+        super().copy(text)
+        self.items = [{"public.utf8-plain-text": text.encode()}]
+
+    def snapshot(self):
+        return [dict(item) for item in self.items]
+
+    def restore(self, items):
+        self.clipboard_changes += 1
+        self.items = items
+
+
+class TestSnapshotRestore:
+    """Test restoring every pasteboard item type."""
+
+    def test_typer_restores_non_text_items(self, make_typer):
+        """Test that an image on the clipboard survives a paste."""
+        image = {"public.png": b"\x89PNG", "public.tiff": b"II*"}
+        backend = SnapshotClipboard([image])
+        typer = make_typer(backend)
+        typer.paste_settle = PasteSettle(initial=0.0, minimum=0.0)
+
+        typer.type_clipboard("new text")
+
+        assert backend.typed_text() == "new text"
+        assert backend.items == [image]
+        assert typer.last_clipboard_timing.restored is True
+
+    def test_default_clipboard_falls_back_without_appkit(self):
+        """Test the pyperclip fallback when AppKit cannot be imported."""
+        with patch("direct_typer.clipboard.NativePasteboard", side_effect=ImportError):
+            clipboard = default_clipboard(MagicMock())
+        assert isinstance(clipboard, PyperclipClipboard)
+
+
+class TestNativePasteboard:
+    """Test NativePasteboard against a mocked AppKit."""
+
+    def make_pasteboard(self):
+        appkit = MagicMock()
+        pasteboard = appkit.NSPasteboard.generalPasteboard.return_value
+        modules = {"AppKit": appkit, "Foundation": MagicMock()}
+        with patch.dict("sys.modules", modules):
+            native = NativePasteboard()
+        return native, pasteboard, modules
+
+    def test_snapshot_keeps_all_types(self):
+        """Test that every type of every item is captured."""
+        native, pasteboard, _ = self.make_pasteboard()
+        item = MagicMock()
+        item.types.return_value = ["public.rtf", "public.utf8-plain-text"]
+        item.dataForType_.side_effect = lambda t: t.encode()
+        pasteboard.pasteboardItems.return_value = [item]
+
+        assert native.snapshot() == [
+            {"public.rtf": b"public.rtf", "public.utf8-plain-text": b"public.utf8-plain-text"}
+        ]
+
+    def test_restore_writes_items(self):
+        """Test that restore clears and writes one item per snapshot entry."""
+        native, pasteboard, modules = self.make_pasteboard()
+        with patch.dict("sys.modules", modules):
+            native.restore([{"public.png": b"png"}, {"public.rtf": b"rtf"}])
+
+        pasteboard.clearContents.assert_called_once()
+        written = pasteboard.writeObjects_.call_args[0][0]
+        assert len(written) == 2
+
+    def test_copy_is_in_process(self):
+        """Test that copy sets the string directly on the pasteboard."""
+        native, pasteboard, _ = self.make_pasteboard()
+        native.copy("text")
+
+        pasteboard.setString_forType_.assert_called_once()
+        assert not native.read_pending
+        assert native.wait_for_read(0.0) is None
+
+    def test_eager_copy_gets_settle_wait(self):
+        """Test that a non-lazy copy still waits before the restore."""
+        native, _, _ = self.make_pasteboard()
+        native.copy("text")
+        settle = PasteSettle(initial=0.1)
+        clock = FakeClock()
+
+        assert settle.wait(native, clock=clock, sleep=clock.sleep) == pytest.approx(0.1)
+        assert settle.current == pytest.approx(0.1)
+
+
+class TestDeferredRestore:
+    """Test restoring the clipboard on a background worker."""
+
+    def test_returns_before_restore(self, make_typer):
+        """Test that the paste returns with the restore still pending."""
+        backend = MemoryBackend()
+        backend.copy("original")
+        typer = make_typer(backend, deferred_restore=True)
+        typer.deferred_restore.delay = 60.0
+        typer.type_clipboard("new text")
+
+        assert typer.last_clipboard_timing.deferred is True
+        assert typer.last_clipboard_timing.paste_wait == 0.0
+        assert typer.deferred_restore.pending
+        assert backend.clipboard == "new text"
+
+        assert typer.deferred_restore.flush() is True
+        assert backend.clipboard == "original"
+
+    def test_newer_paste_takes_over_pending_restore(self, make_typer):
+        """Test that an earlier paste's text is never restored."""
+        backend = MemoryBackend()
+        backend.copy("original")
+        typer = make_typer(backend, deferred_restore=True)
+        typer.deferred_restore.delay = 60.0
+        typer.type_clipboard("first")
+        typer.type_clipboard("second")
+
+        assert backend.typed_text() == "firstsecond"
+        typer.deferred_restore.flush()
+        assert backend.clipboard == "original"
+
+    def test_copy_between_pastes_is_kept(self, make_typer):
+        """Test that a copy made while a restore is pending becomes the new original."""
+        backend = MemoryBackend()
+        backend.copy("original")
+        typer = make_typer(backend, deferred_restore=True)
+        typer.deferred_restore.delay = 60.0
+        typer.type_clipboard("first")
+        backend.copy("copied by the user")
+        typer.type_clipboard("second")
+
+        assert backend.typed_text() == "firstsecond"
+        typer.deferred_restore.flush()
+        assert backend.clipboard == "copied by the user"
+
+    def test_worker_restores_after_delay(self, make_typer):
+        """Test that the worker restores once the delay has passed."""
+        backend = MemoryBackend()
+        backend.copy("original")
+        typer = make_typer(backend, deferred_restore=True)
+        typer.deferred_restore.delay = 0.01
+        typer.type_clipboard("new text")
+
+        deadline = time.monotonic() + 2.0
+        while typer.deferred_restore.pending and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert backend.clipboard == "original"
+
+    def test_skips_restore_after_foreign_write(self):
+        """Test that newer content from another application is kept."""
+        backend = MemoryBackend()
+        backend.copy("original")
+        restorer = DeferredRestore(delay=60.0)
+        restorer.schedule(backend, "original", backend.change_count())
+        backend.copy("from another app")
+
+        assert restorer.flush() is False
+        assert backend.clipboard == "from another app"
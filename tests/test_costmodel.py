@@ -0,0 +1,126 @@
+"""Tests for costmodel module."""
+
+import pytest
+
+from direct_typer.backends import MemoryBackend
+from direct_typer.costmodel import CostModel, MethodCost, calibrate
+from direct_typer.typer import TypingMethod
+
+
+class TestMethodCost:
+    """Test linear fitting of method cost."""
+
+    def test_fits_fixed_and_per_char(self):
+        """Test that exact samples recover the line."""
+        cost = MethodCost(fixed_ms=0.0, per_char_ms=0.0)
+        for chars in (1, 10, 100):
+            cost.add_sample(chars, 50 + 2 * chars)
+
+        assert cost.fixed_ms == pytest.approx(50)
+        assert cost.per_char_ms == pytest.approx(2)
+
+    def test_single_length_keeps_slope(self):
+        """Test that samples at one length only move the intercept."""
+        cost = MethodCost(fixed_ms=0.0, per_char_ms=1.0)
+        cost.add_sample(10, 30)
+
+        assert cost.per_char_ms == 1.0
+        assert cost.fixed_ms == pytest.approx(20)
+
+
+class TestCostModel:
+    """Test method selection and persistence."""
+
+    def test_best_method(self):
+        """Test picking the lowest predicted latency."""
+        model = CostModel(
+            {
+                "pynput": MethodCost(0.0, 1.0),
+                "cgevent": MethodCost(0.0, 2.0),
+                "clipboard": MethodCost(100.0, 0.0),
+            }
+        )
+
+        assert model.best_method("short") == TypingMethod.PYNPUT
+        assert model.best_method("日本語") == TypingMethod.CGEVENT
+        assert model.best_method("a" * 500) == TypingMethod.CLIPBOARD
+
+    def test_uncalibrated_defaults_choose_nothing(self):
+        """Test that defaults leave selection to the fixed thresholds."""
+        model = CostModel({"cgevent": MethodCost(0.0, 1.0), "clipboard": MethodCost(100.0, 0.0)})
+
+        assert CostModel().best_method("a" * 30) is None
+        assert model.best_method("日本語") == TypingMethod.CGEVENT
+        # pynput competes for ASCII text and is still a default
+        assert model.best_method("Hello") is None
+
+    def test_thresholds_until_calibrated(self, make_typer):
+        """Test that an uncalibrated model keeps the threshold selection."""
+        backend = MemoryBackend()
+        typer = make_typer(backend, delay_ms=5)
+        typer.cost_model = CostModel()
+
+        assert typer.select_method("Hello") == TypingMethod.PYNPUT
+        assert typer.select_method("あ" * 50) == TypingMethod.CGEVENT
+        assert typer.select_method("a" * 200) == TypingMethod.CLIPBOARD
+
+    def test_save_and_load(self, tmp_path):
+        """Test round-tripping the model through disk."""
+        path = tmp_path / "model.json"
+        model = CostModel({"clipboard": MethodCost(42.0, 0.5)}, path)
+        model.save()
+
+        loaded = CostModel.load(path)
+        assert loaded.costs["clipboard"].fixed_ms == 42.0
+        assert loaded.costs["clipboard"].per_char_ms == 0.5
+        assert not loaded.costs["pynput"].calibrated
+
+    def test_load_missing_file_uses_defaults(self, tmp_path):
+        """Test that a missing model file gives defaults."""
+        model = CostModel.load(tmp_path / "missing.json")
+        assert model.costs == CostModel.default_costs()
+
+    def test_live_samples_are_saved(self, tmp_path):
+        """Test that live observations refresh and persist the model."""
+        path = tmp_path / "model.json"
+        model = CostModel(path=path)
+        for _ in range(CostModel.SAVE_EVERY):
+            model.observe(TypingMethod.CLIPBOARD, 10, 60.0)
+
+        assert path.exists()
+        assert model.costs["clipboard"].predict(10) < 100
+
+
+class TestCalibrate:
+    """Test calibration against an in-memory backend."""
+
+    def test_calibrate_fits_every_method(self, tmp_path, make_typer):
+        """Test that calibration measures each method."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        model = calibrate(typer, lengths=(1, 5), repeat=1, path=tmp_path / "m.json")
+
+        assert set(model.costs) == {"pynput", "cgevent", "clipboard"}
+        assert model.costs["clipboard"].fixed_ms > model.costs["pynput"].fixed_ms
+
+
+class TestDirectTyperWithCostModel:
+    """Test AUTO selection with a cost model."""
+
+    def test_auto_uses_model_and_learns(self, tmp_path, make_typer):
+        """Test that AUTO follows the model and feeds back timing."""
+        model = CostModel(
+            {
+                "pynput": MethodCost(0.0, 100.0),
+                "cgevent": MethodCost(0.0, 0.1),
+                "clipboard": MethodCost(1000.0, 0.0),
+            },
+            tmp_path / "m.json",
+        )
+        backend = MemoryBackend()
+        typer = make_typer(backend, cost_model=model)
+        typer.type("hello")
+
+        assert backend.typed_text() == "hello"
+        assert model.costs["cgevent"].stats[0] == 1
+        assert model.costs["pynput"].stats[0] == 0
@@ -0,0 +1,168 @@
+"""Tests for flac module."""
+
+import numpy as np
+import pytest
+
+from direct_typer.flac import FlacEncoder, _utf8_number, crc8, crc16
+
+
+def bitwise_crc(data, poly, width):
+    """Reference MSB-first CRC computed bit by bit."""
+    crc = 0
+    top = 1 << (width - 1)
+    for byte in data:
+        crc ^= byte << (width - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & top else (crc << 1)
+            crc &= (1 << width) - 1
+    return crc
+
+
+class BitReader:
+    """Minimal MSB-first bit reader."""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def read(self, width):
+        value = 0
+        for _ in range(width):
+            byte = self.data[self.pos >> 3]
+            value = (value << 1) | ((byte >> (7 - (self.pos & 7))) & 1)
+            self.pos += 1
+        return value
+
+    def read_signed(self, width):
+        value = self.read(width)
+        return value - (1 << width) if value >> (width - 1) else value
+
+    def align(self):
+        self.pos = (self.pos + 7) & ~7
+
+
+def decode(data):
+    """Decode the FLAC subset FlacEncoder writes, checking every CRC."""
+    assert data[:4] == b"fLaC"
+    reader = BitReader(data)
+    reader.pos = 32
+    assert reader.read(1) == 1 and reader.read(7) == 0 and reader.read(24) == 34
+    reader.read(16 + 16 + 24 + 24)
+    sample_rate = reader.read(20)
+    channels = reader.read(3) + 1
+    assert reader.read(5) == 15
+    total = reader.read(36)
+    reader.pos += 128
+
+    blocks = []
+    while reader.pos < len(data) * 8:
+        start = reader.pos >> 3
+        assert reader.read(14) == 0b11111111111110
+        reader.read(2)
+        assert reader.read(4) == 0b0111
+        rate_code = reader.read(4)
+        assert reader.read(4) == channels - 1
+        assert reader.read(3) == 0b100
+        reader.read(1)
+        lead = reader.read(8)
+        while lead & 0x40:  # Continuation bytes of the frame number
+            reader.read(8)
+            lead <<= 1
+        block_size = reader.read(16) + 1
+        reader.read({0b1100: 8, 0b1101: 16, 0b1110: 16}.get(rate_code, 0))
+        header_end = reader.pos >> 3
+        assert reader.read(8) == bitwise_crc(data[start:header_end], 0x07, 8)
+
+        block = np.zeros((block_size, channels), dtype=np.int64)
+        for channel in range(channels):
+            assert reader.read(1) == 0
+            kind = reader.read(6)
+            assert reader.read(1) == 0
+            if kind == 0:
+                block[:, channel] = reader.read_signed(16)
+            elif kind == 1:
+                block[:, channel] = [reader.read_signed(16) for _ in range(block_size)]
+            else:
+                order = kind & 0b111
+                samples = [reader.read_signed(16) for _ in range(order)]
+                assert reader.read(2) == 0 and reader.read(4) == 0
+                param = reader.read(4)
+                residual = []
+                for _ in range(block_size - order):
+                    quotient = 0
+                    while reader.read(1) == 0:
+                        quotient += 1
+                    folded = (quotient << param) | reader.read(param)
+                    residual.append((folded >> 1) ^ -(folded & 1))
+                coefficients = {0: [], 1: [1], 2: [2, -1], 3: [3, -3, 1], 4: [4, -6, 4, -1]}
+                for value in residual:
+                    prediction = sum(c * samples[-1 - i] for i, c in enumerate(coefficients[order]))
+                    samples.append(prediction + value)
+                block[:, channel] = samples
+        reader.align()
+        frame_end = reader.pos >> 3
+        assert reader.read(16) == bitwise_crc(data[start:frame_end], 0x8005, 16)
+        blocks.append(block)
+
+    audio = np.concatenate(blocks)
+    assert len(audio) == total
+    return sample_rate, audio
+
+
+def speech_like(frames, channels=1, seed=0):
+    """Create smooth noisy int16 audio."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames)[:, None] / 16000
+    tone = 8000 * np.sin(2 * np.pi * 220 * t + np.arange(channels))
+    return (tone + rng.normal(0, 200, (frames, channels))).astype(np.int16)
+
+
+class TestHelpers:
+    """Test checksums and frame number coding."""
+
+    def test_crc_tables_match_reference(self):
+        """Test that the table CRCs match a bit-by-bit implementation."""
+        data = bytes(range(256)) * 3
+        assert crc8(data) == bitwise_crc(data, 0x07, 8)
+        assert crc16(data) == bitwise_crc(data, 0x8005, 16)
+
+    def test_utf8_frame_numbers(self):
+        """Test the UTF-8 style coding against Python's UTF-8 encoder."""
+        for value in (0, 0x7F, 0x80, 0x7FF, 0x800, 0xFFFF, 0x10000):
+            assert _utf8_number(value) == chr(value).encode("utf-8", "surrogatepass")
+
+
+class TestFlacEncoder:
+    """Test lossless round trips."""
+
+    @pytest.mark.parametrize("channels", [1, 2])
+    def test_round_trip(self, channels):
+        """Test that incrementally encoded audio decodes to the input."""
+        audio = speech_like(5000, channels)
+        encoder = FlacEncoder(16000, channels=channels, block_size=1024)
+        for offset in range(0, len(audio), 700):
+            encoder.encode(audio[offset : offset + 700])
+        data = encoder.finish()
+
+        sample_rate, decoded = decode(data)
+        assert sample_rate == 16000
+        assert np.array_equal(decoded, audio)
+        assert len(data) < audio.nbytes * 0.8
+
+    def test_silence_and_noise(self):
+        """Test constant blocks and incompressible blocks."""
+        rng = np.random.default_rng(1)
+        noise = rng.integers(-32768, 32768, (300, 1)).astype(np.int16)
+        audio = np.concatenate([np.zeros((300, 1), dtype=np.int16), noise])
+        encoder = FlacEncoder(16000, block_size=300)
+        encoder.encode(audio)
+
+        assert np.array_equal(decode(encoder.finish())[1], audio)
+
+    def test_frames_are_built_while_encoding(self):
+        """Test that only the partial tail is left for finish()."""
+        encoder = FlacEncoder(16000, block_size=1024)
+        encoder.encode(speech_like(2500))
+
+        assert encoder.encoded_size > 0
+        assert encoder.encode_time > 0
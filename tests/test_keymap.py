@@ -0,0 +1,111 @@
+"""Tests for keymap module."""
+
+from unittest.mock import MagicMock
+
+from direct_typer.backends import MemoryBackend
+from direct_typer.keymap import FLAG_SHIFT, KeymapCache
+from direct_typer.typer import DirectTyper
+
+US_KEYMAP = {"a": (0, 0), "A": (0, FLAG_SHIFT), "b": (11, 0), "!": (18, FLAG_SHIFT)}
+
+
+def us_keymap() -> KeymapCache:
+    """Return a cache that always holds US_KEYMAP."""
+    return KeymapCache(layout_id=lambda: "us", build=lambda: dict(US_KEYMAP))
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestKeymapCache:
+    """Test per-layout table caching."""
+
+    def test_builds_once_per_layout(self):
+        """Test that an unchanged layout reuses the table."""
+        builds = []
+        clock = FakeClock()
+        cache = KeymapCache(
+            layout_id=lambda: "us",
+            build=lambda: builds.append(1) or dict(US_KEYMAP),
+            check_interval=0.0,
+            clock=clock,
+        )
+        for _ in range(3):
+            assert cache.get() == US_KEYMAP
+        assert len(builds) == 1
+
+    def test_rebuilds_on_layout_change(self):
+        """Test that switching layouts invalidates the table."""
+        layouts = {"current": "us"}
+        tables = {"us": {"a": (0, 0)}, "fr": {"a": (12, 0)}}
+        clock = FakeClock()
+        cache = KeymapCache(
+            layout_id=lambda: layouts["current"],
+            build=lambda: dict(tables[layouts["current"]]),
+            check_interval=1.0,
+            clock=clock,
+        )
+        assert cache.get()["a"] == (0, 0)
+
+        layouts["current"] = "fr"
+        assert cache.get()["a"] == (0, 0)  # Not re-checked yet
+        clock.now = 1.0
+        assert cache.get()["a"] == (12, 0)
+
+    def test_unreadable_layout_gives_empty_table(self):
+        """Test the fallback when the layout cannot be read."""
+
+        def fail():
+            raise ImportError("no Carbon")
+
+        assert KeymapCache(layout_id=fail).get() == {}
+
+
+class TestAsciiFastPath:
+    """Test posting table characters directly in type_pynput."""
+
+    def test_posts_keycodes_with_modifiers(self, make_typer):
+        """Test that one key code event pair is posted per character."""
+        backend = MemoryBackend(keymap=US_KEYMAP)
+        make_typer(backend, keymap=us_keymap()).type_pynput("Ab!")
+
+        downs = [(e.value, e.flags) for e in backend.events if e.kind == "key_down"]
+        assert downs == [(0, FLAG_SHIFT), (11, 0), (18, FLAG_SHIFT)]
+        assert backend.typed_text() == "Ab!"
+
+    def test_unmapped_characters_use_pynput(self, make_typer):
+        """Test that characters outside the table go through the keyboard."""
+        backend = MemoryBackend(keymap=US_KEYMAP)
+        make_typer(backend, keymap=us_keymap()).type_pynput("a?\n")
+
+        assert backend.typed_text() == "a?\n"
+        assert [e.value for e in backend.events if e.kind == "key_down"] == [0, "?", "enter"]
+
+    def test_paste_uses_layout_keycode(self):
+        """Test that the paste chord is posted with the layout's key code for "v"."""
+        dvorak = {"v": (47, 0)}
+        backend = MemoryBackend()
+        sink = MagicMock()
+        cache = KeymapCache(layout_id=lambda: "dvorak", build=lambda: dict(dvorak))
+        typer = DirectTyper(
+            delay_ms=0, keyboard=backend, clipboard=backend, event_sink=sink, keymap=cache
+        )
+        typer.type_clipboard("pasted")
+
+        sink.post_paste.assert_called_once_with(47)
+        assert not [e for e in backend.events if e.kind == "key_down"]
+
+    def test_paste_without_v_uses_pynput(self, make_typer):
+        """Test that the keyboard presses Cmd+V when the table has no "v"."""
+        backend = MemoryBackend(keymap=US_KEYMAP)
+        make_typer(backend, keymap=us_keymap()).type_clipboard("pasted")
+
+        assert backend.typed_text() == "pasted"
+        assert [e.value for e in backend.events if e.kind == "key_down"] == ["cmd", "v"]
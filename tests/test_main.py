@@ -1,11 +1,14 @@
 """Tests for main module (VoiceCodeApp)."""
 
+import os
+
 import pytest
-from unittest.mock import MagicMock, patch, PropertyMock
+from unittest.mock import ANY, MagicMock, patch, PropertyMock
 from pynput import keyboard
 
-from direct_typer.main import _parse_hotkey, _format_hotkey, VoiceCodeApp
+from direct_typer.main import _parse_hotkey, _format_hotkey, _vad_config_from_env, VoiceCodeApp
 from direct_typer.typer import TypingMethod
+from direct_typer.vad import VadConfig
 
 
 class TestParseHotkey:
@@ -131,9 +134,78 @@ class TestVoiceCodeAppInit:
         mock_transcriber.assert_called_once()
         mock_postprocessor.assert_called_once()
         # Verify DirectTyper is initialized with CLIPBOARD method for reliability
-        mock_typer_class.assert_called_once_with(default_method=TypingMethod.CLIPBOARD)
+        mock_typer_class.assert_called_once_with(
+            default_method=TypingMethod.CLIPBOARD, lazy_clipboard=True
+        )
         mock_start_listener.assert_called_once()
 
+    @patch("direct_typer.main.rumps.App.__init__", return_value=None)
+    @patch("direct_typer.main.load_dotenv")
+    @patch("direct_typer.main.AudioRecorder")
+    @patch("direct_typer.main.Transcriber")
+    @patch("direct_typer.main.PostProcessor")
+    @patch("direct_typer.main.DirectTyper")
+    @patch.object(VoiceCodeApp, "_start_keyboard_listener")
+    def test_warm_stream(
+        self,
+        mock_start_listener,
+        mock_typer_class,
+        mock_postprocessor,
+        mock_transcriber,
+        mock_recorder,
+        mock_load_dotenv,
+        mock_app_init,
+    ):
+        """Test that WARM_STREAM opens the input stream at startup."""
+        env = {"HOTKEY": "f15", "WARM_STREAM": "1", "PRE_ROLL_MS": "500"}
+        with patch("os.getenv", side_effect=lambda key, default=None: env.get(key, default)):
+            VoiceCodeApp()
+
+        config = mock_recorder.call_args.args[0]
+        assert config.warm
+        assert config.pre_roll_ms == 500
+        mock_recorder.return_value.open.assert_called_once()
+
+    @patch("direct_typer.main.rumps.App.__init__", return_value=None)
+    @patch("direct_typer.main.load_dotenv")
+    @patch("direct_typer.main.AudioRecorder")
+    @patch("direct_typer.main.Transcriber")
+    @patch("direct_typer.main.PostProcessor")
+    @patch("direct_typer.main.DirectTyper")
+    @patch.object(VoiceCodeApp, "_start_keyboard_listener")
+    def test_vad_energy_db(
+        self,
+        mock_start_listener,
+        mock_typer_class,
+        mock_postprocessor,
+        mock_transcriber,
+        mock_recorder,
+        mock_load_dotenv,
+        mock_app_init,
+    ):
+        """Test that VAD_ENERGY_DB lowers the speech threshold for quiet microphones."""
+        env = {"HOTKEY": "f15", "VAD_ENERGY_DB": "-55"}
+        with patch("os.getenv", side_effect=lambda key, default=None: env.get(key, default)):
+            VoiceCodeApp()
+
+        vad = mock_recorder.call_args.args[0].vad
+        assert vad.energy_db == -55.0
+        assert vad.weak_energy_db == -65.0
+
+
+class TestVadConfigFromEnv:
+    """Test _vad_config_from_env function."""
+
+    def test_default(self):
+        """Test that the default VadConfig is used when VAD_ENERGY_DB is unset."""
+        with patch.dict(os.environ, {}, clear=True):
+            assert _vad_config_from_env() == VadConfig()
+
+    def test_invalid_value(self):
+        """Test that an invalid VAD_ENERGY_DB falls back to the default."""
+        with patch.dict(os.environ, {"VAD_ENERGY_DB": "loud"}, clear=True):
+            assert _vad_config_from_env() == VadConfig()
+
 
 class TestVoiceCodeAppMethods:
     """Test VoiceCodeApp methods."""
@@ -320,12 +392,16 @@ class TestStopAndProcess:
         app.title = VoiceCodeApp.ICON_RECORDING
 
         app._stop_and_process()
+        app._typing_worker.shutdown()
 
-        # Verify DirectTyper.type was called with processed text
-        mock_typer_instance.type.assert_called_once_with("Hello world.")
+        # Verify DirectTyper.type was called with processed text on the typing worker
+        mock_typer_instance.type.assert_called_once_with(
+            "Hello world.", method=None, options=None, cancel=ANY
+        )
 
-        # Verify cleanup was called
-        mock_audio_path.unlink.assert_called_once()
+        # Verify the in-memory recording was uploaded without touching the disk
+        mock_transcriber_instance.transcribe.assert_called_once_with(mock_audio_path)
+        mock_audio_path.unlink.assert_not_called()
 
     @patch("direct_typer.main.rumps.App.__init__", return_value=None)
     @patch("direct_typer.main.load_dotenv")
@@ -373,3 +449,44 @@ class TestStopAndProcess:
 
         # Verify error sound was played
         mock_play_sound.assert_called_with(VoiceCodeApp.SOUND_ERROR)
+
+    @patch("direct_typer.main.rumps.App.__init__", return_value=None)
+    @patch("direct_typer.main.load_dotenv")
+    @patch("direct_typer.main.AudioRecorder")
+    @patch("direct_typer.main.Transcriber")
+    @patch("direct_typer.main.PostProcessor")
+    @patch("direct_typer.main.DirectTyper")
+    @patch.object(VoiceCodeApp, "_start_keyboard_listener")
+    @patch.object(VoiceCodeApp, "_play_sound")
+    @patch("os.getenv", return_value="f15")
+    def test_stop_and_process_skips_silent_recording(
+        self,
+        mock_getenv,
+        mock_play_sound,
+        mock_start_listener,
+        mock_typer_class,
+        mock_postprocessor,
+        mock_transcriber,
+        mock_recorder,
+        mock_load_dotenv,
+        mock_app_init,
+    ):
+        """Test that a recording without speech is never uploaded."""
+        mock_audio = MagicMock()
+        mock_audio.has_speech = False
+
+        mock_recorder_instance = MagicMock()
+        mock_recorder_instance.stop.return_value = mock_audio
+        mock_recorder.return_value = mock_recorder_instance
+
+        mock_transcriber_instance = MagicMock()
+        mock_transcriber.return_value = mock_transcriber_instance
+
+        app = VoiceCodeApp()
+        app.title = VoiceCodeApp.ICON_RECORDING
+
+        app._stop_and_process()
+
+        mock_transcriber_instance.transcribe.assert_not_called()
+        mock_play_sound.assert_called_with(VoiceCodeApp.SOUND_ERROR)
+        assert app.title == VoiceCodeApp.ICON_IDLE
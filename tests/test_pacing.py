@@ -0,0 +1,205 @@
+"""Tests for pacing module."""
+
+from concurrent.futures import CancelledError
+
+import pytest
+
+from direct_typer.pacing import AdaptiveRateController, PacingScheduler, PacingStats
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestPacingScheduler:
+    """Test PacingScheduler deadlines."""
+
+    def test_from_delay_ms(self):
+        """Test conversion from per-unit delay to rate."""
+        assert PacingScheduler.from_delay_ms(5).rate == 200
+        assert PacingScheduler.from_delay_ms(0).rate is None
+
+    def test_negative_rate_raises(self):
+        """Test that a negative rate raises ValueError."""
+        with pytest.raises(ValueError):
+            PacingScheduler(rate=-1)
+
+    def test_unpaced_never_sleeps(self):
+        """Test that no rate means no sleeping."""
+        clock = FakeClock()
+        scheduler = PacingScheduler(None, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        for _ in range(10):
+            scheduler.tick()
+
+        assert clock.sleeps == []
+        assert scheduler.stats().units == 10
+
+    def test_sleeps_until_deadline(self):
+        """Test that each unit waits for its absolute deadline."""
+        clock = FakeClock()
+        scheduler = PacingScheduler(100, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        for _ in range(5):
+            clock.now += 0.002  # Work takes 2 ms of the 10 ms budget
+            scheduler.tick()
+
+        stats = scheduler.stats()
+        assert stats.elapsed == pytest.approx(0.05)
+        assert stats.slept == pytest.approx(0.04)
+        assert stats.achieved_rate == pytest.approx(100)
+
+    def test_merges_sub_millisecond_waits(self):
+        """Test that waits below MIN_SLEEP are deferred, not slept."""
+        clock = FakeClock()
+        scheduler = PacingScheduler(5000, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        for _ in range(10):
+            scheduler.tick()
+
+        # 0.2 ms per unit: only every fifth unit reaches a 1 ms wait
+        assert len(clock.sleeps) == 2
+        assert sum(clock.sleeps) == pytest.approx(0.002)
+
+    def test_catches_up_after_overshoot(self):
+        """Test that a slow unit is made up by skipping later sleeps."""
+        clock = FakeClock()
+        scheduler = PacingScheduler(100, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        clock.now += 0.035  # First unit overshoots by 25 ms
+        scheduler.tick()
+        for _ in range(4):
+            scheduler.tick()
+
+        assert scheduler.stats().elapsed == pytest.approx(0.05)
+
+    def test_catch_up_is_bounded(self):
+        """Test that a long stall does not release an unbounded burst."""
+        clock = FakeClock()
+        scheduler = PacingScheduler(100, clock=clock, sleep=clock.sleep)
+        scheduler.start()
+        clock.now += 1.0
+        scheduler.tick()
+        burst = 0
+        while not clock.sleeps:
+            scheduler.tick()
+            burst += 1
+
+        assert burst <= PacingScheduler.MAX_BURST
+
+    def test_cancelled_stops_before_next_unit(self):
+        """Test that check_cancelled raises once the cancelled callback is set."""
+        stop = []
+        clock = FakeClock()
+        scheduler = PacingScheduler(
+            100, clock=clock, sleep=clock.sleep, cancelled=lambda: bool(stop)
+        )
+        scheduler.check_cancelled()
+        scheduler.tick()
+        stop.append(True)
+        scheduler.tick()  # The unit was already posted
+
+        with pytest.raises(CancelledError):
+            scheduler.check_cancelled()
+
+
+class TestPacingStats:
+    """Test PacingStats properties."""
+
+    def test_active_time(self):
+        """Test that active time excludes sleeping."""
+        stats = PacingStats(units=10, requested_rate=200, elapsed=0.06, slept=0.05)
+        assert stats.active == pytest.approx(0.01)
+        assert stats.achieved_rate == pytest.approx(166.67, rel=1e-3)
+
+
+class TestAdaptiveRateController:
+    """Test AdaptiveRateController backoff and convergence."""
+
+    def test_starts_fast(self):
+        """Test that the controller starts at the maximum rate."""
+        controller = AdaptiveRateController(max_rate=500)
+        assert controller.rate == 500
+        assert controller.learned_rate is None
+
+    def test_starts_at_start_rate_and_grows(self):
+        """Test that a start rate is grown towards max_rate while posting keeps up."""
+        controller = AdaptiveRateController(max_rate=1000, start_rate=200, window=5)
+        assert controller.rate == 200
+
+        for _ in range(50):
+            controller.observe(0.001)
+        assert 200 < controller.rate < 1000
+        assert AdaptiveRateController(max_rate=100, start_rate=500).rate == 100
+
+    def test_backs_off_on_slow_posting(self):
+        """Test that posting over budget halves the rate."""
+        controller = AdaptiveRateController(max_rate=800, latency_budget=0.004)
+        controller.observe(0.010)
+
+        assert controller.rate == 400
+        assert controller.backoffs == 1
+
+    def test_rate_never_below_minimum(self):
+        """Test that backoff stops at min_rate."""
+        controller = AdaptiveRateController(max_rate=100, min_rate=40)
+        for _ in range(5):
+            controller.observe(1.0)
+
+        assert controller.rate == 40
+
+    def test_converges_below_failing_rate(self):
+        """Test that recovery stays under the rate that caused backpressure."""
+        controller = AdaptiveRateController(max_rate=1000, window=5)
+
+        # Target only keeps up below 300 units per second
+        for _ in range(500):
+            latency = 0.010 if controller.rate >= 300 else 0.001
+            controller.observe(latency)
+
+        assert controller.rate < 300
+        assert 200 < controller.learned_rate < 300
+
+    def test_invalid_bounds_raise(self):
+        """Test that invalid configuration raises ValueError."""
+        with pytest.raises(ValueError):
+            AdaptiveRateController(max_rate=10, min_rate=20)
+        with pytest.raises(ValueError):
+            AdaptiveRateController(backoff=1.5)
+
+    def test_scheduler_follows_controller(self):
+        """Test that the scheduler reports posting time to the controller."""
+        clock = FakeClock()
+        controller = AdaptiveRateController(max_rate=1000, latency_budget=0.004)
+        scheduler = PacingScheduler(clock=clock, sleep=clock.sleep, controller=controller)
+        scheduler.start()
+        clock.now += 0.02  # Posting stalled for 20 ms
+        scheduler.tick()
+
+        assert controller.backoffs == 1
+        assert scheduler.rate == controller.rate == 500
+
+    def test_max_rate_bounds_controller(self):
+        """Test that max_rate caps the controller's rate for one run."""
+        clock = FakeClock()
+        controller = AdaptiveRateController(max_rate=1000)
+        scheduler = PacingScheduler(
+            clock=clock, sleep=clock.sleep, controller=controller, max_rate=50
+        )
+        scheduler.start()
+        scheduler.tick()
+
+        assert controller.rate == 1000
+        assert scheduler.rate == 50
+        assert clock.sleeps == [pytest.approx(0.02)]
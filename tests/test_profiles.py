@@ -0,0 +1,191 @@
+"""Tests for profiles module."""
+
+import pytest
+
+from direct_typer.backends import MemoryBackend
+from direct_typer.clipboard import PasteSettle
+from direct_typer.profiles import ProfileStore
+from direct_typer.typer import TypingMethod, TypingOptions
+
+
+
+class FailingSink(MemoryBackend):
+    """Event sink whose CGEvent posting fails."""
+
+    def post_unicode(self, text):
+        raise RuntimeError("event dropped")
+
+
+class TestProfileStore:
+    """Test learning and applying per-application options."""
+
+    def test_unknown_app_uses_base_options(self):
+        """Test that an application without a profile changes nothing."""
+        base = TypingOptions()
+        assert ProfileStore().options_for("com.example.new", base, "text") is base
+
+    def test_learns_fastest_method(self):
+        """Test that AUTO switches to the fastest measured method."""
+        store = ProfileStore()
+        for chars in (10, 20, 30):
+            store.observe("com.example.term", TypingMethod.CGEVENT, chars, 2.0 * chars)
+            store.observe("com.example.term", TypingMethod.CLIPBOARD, chars, 20.0)
+
+        options = store.options_for("com.example.term", TypingOptions(), "あ" * 50)
+        assert options.method == TypingMethod.CLIPBOARD
+        options = store.options_for("com.example.term", TypingOptions(), "あ" * 5)
+        assert options.method == TypingMethod.CGEVENT
+
+    def test_unmeasured_competitor_keeps_auto(self):
+        """Test that one measured method does not win over untried ones."""
+        store = ProfileStore()
+        for chars in (10, 20, 30):
+            store.observe("com.example.term", TypingMethod.CGEVENT, chars, 2.0 * chars)
+
+        options = store.options_for("com.example.term", TypingOptions(), "あ" * 1000)
+        assert options.method == TypingMethod.AUTO
+        # pynput competes for ASCII text and has no measurements either
+        for chars in (10, 20, 30):
+            store.observe("com.example.term", TypingMethod.CLIPBOARD, chars, 20.0)
+        options = store.options_for("com.example.term", TypingOptions(), "x" * 50)
+        assert options.method == TypingMethod.AUTO
+
+    def test_explicit_method_is_kept(self):
+        """Test that a non-AUTO default method is not overridden."""
+        store = ProfileStore()
+        for chars in (10, 20, 30):
+            store.observe("com.example.term", TypingMethod.CGEVENT, chars, 1.0)
+
+        base = TypingOptions(method=TypingMethod.CLIPBOARD)
+        assert store.options_for("com.example.term", base, "text").method == TypingMethod.CLIPBOARD
+
+    def test_failures_back_off(self):
+        """Test that a CGEvent failure slows down and shrinks chunks."""
+        store = ProfileStore()
+        failed = TypingOptions(delay_ms=4, chunk_size=20)
+        store.record_failure("com.example.term", TypingMethod.CGEVENT, failed)
+
+        options = store.options_for("com.example.term", TypingOptions(), "text")
+        assert options.delay_ms == pytest.approx(6)
+        assert options.chunk_size == 10
+
+    def test_repeated_failures_stop_at_min_chunk_size(self, make_typer):
+        """Test that halving the chunk size never goes below what iter_chunks accepts."""
+        store = ProfileStore()
+        base = TypingOptions(chunk_size=20)
+        options = base
+        for _ in range(8):
+            store.record_failure("com.example.term", TypingMethod.CGEVENT, options)
+            options = store.options_for("com.example.term", base, "text")
+        assert options.chunk_size == ProfileStore.MIN_CHUNK_SIZE
+
+        backend = MemoryBackend()
+        typer = make_typer(backend, store=store, app_id="com.example.term")
+        typer.options = typer.with_options(chunk_size=20)
+        typer.type("テキスト", method=TypingMethod.CGEVENT)
+        assert backend.typed_text() == "テキスト"
+
+    def test_per_cluster_failure_keeps_chunk_size(self):
+        """Test that unchunked CGEvent typing only backs off its delay."""
+        store = ProfileStore()
+        store.record_failure("com.example.term", TypingMethod.CGEVENT, TypingOptions())
+
+        assert store.options_for("com.example.term", TypingOptions(), "text").chunk_size is None
+
+    def test_unreliable_method_is_not_chosen(self):
+        """Test that a fast but failing method loses to a reliable one."""
+        store = ProfileStore()
+        for chars in (10, 20, 30):
+            store.observe("com.example.term", TypingMethod.CGEVENT, chars, 1.0)
+            store.observe("com.example.term", TypingMethod.CLIPBOARD, chars, 100.0)
+        store.record_failure("com.example.term", TypingMethod.CGEVENT, TypingOptions())
+
+        options = store.options_for("com.example.term", TypingOptions(), "テキスト")
+        assert options.method == TypingMethod.CLIPBOARD
+
+    def test_save_and_load(self, tmp_path):
+        """Test the JSON round-trip."""
+        path = tmp_path / "profiles.json"
+        store = ProfileStore(path=path)
+        store.observe("com.example.term", TypingMethod.PYNPUT, 10, 50.0)
+        store.record_failure(
+            "com.example.term", TypingMethod.CGEVENT, TypingOptions(chunk_size=20)
+        )
+        store.save()
+
+        loaded = ProfileStore.load(path)
+        profile = loaded.apps["com.example.term"]
+        assert profile.methods["pynput"].calls == 1
+        assert profile.methods["cgevent"].failures == 1
+        assert profile.chunk_size == 10
+
+    def test_load_clamps_chunk_size(self, tmp_path):
+        """Test that a chunk size below the floor in a saved file is raised to it."""
+        path = tmp_path / "profiles.json"
+        path.write_text('{"apps": {"com.example.term": {"chunk_size": 1}}}', encoding="utf-8")
+        profile = ProfileStore.load(path).apps["com.example.term"]
+        assert profile.chunk_size == ProfileStore.MIN_CHUNK_SIZE
+
+    def test_load_missing_file(self, tmp_path):
+        """Test that a missing file gives an empty store."""
+        assert ProfileStore.load(tmp_path / "missing.json").apps == {}
+
+
+class TestTyperProfiles:
+    """Test DirectTyper integration."""
+
+    def test_records_calls_per_app(self, make_typer):
+        """Test that calls are timed under the frontmost application."""
+        store = ProfileStore()
+        backend = MemoryBackend()
+        typer = make_typer(backend, store=store)
+        typer.type("hello")
+        typer.app_identity.app_id = "com.example.other"
+        typer.type("日本語")
+
+        assert store.apps["com.example.editor"].methods["pynput"].calls == 1
+        assert store.apps["com.example.other"].methods["cgevent"].calls == 1
+        assert backend.typed_text() == "hello日本語"
+
+    def test_failure_is_recorded_and_raised(self, make_typer):
+        """Test that a failing call backs off and re-raises."""
+        store = ProfileStore()
+        typer = make_typer(FailingSink(), store=store)
+
+        with pytest.raises(RuntimeError):
+            typer.type("日本語")
+        assert store.apps["com.example.editor"].methods["cgevent"].failures == 1
+        assert store.apps["com.example.editor"].delay_ms is not None
+
+    def test_report_failure(self, make_typer):
+        """Test reporting dropped input after a call succeeded."""
+        store = ProfileStore()
+        typer = make_typer(MemoryBackend(), store=store)
+        typer.type("hello")
+        typer.report_failure()
+
+        record = store.apps["com.example.editor"].methods["pynput"]
+        assert (record.calls, record.failures) == (1, 1)
+
+    def test_long_text_uses_clipboard_after_short_calls(self, make_typer):
+        """Test that short dictations do not force keystrokes for long text."""
+        store = ProfileStore()
+        backend = MemoryBackend()
+        typer = make_typer(backend, store=store)
+        typer.paste_settle = PasteSettle(initial=0.0, minimum=0.0)
+        for _ in range(3):
+            typer.type("短い文")
+        typer.type("長" * 1000)
+
+        methods = store.apps["com.example.editor"].methods
+        assert methods["cgevent"].calls == 3
+        assert methods["clipboard"].calls == 1
+
+    def test_no_app_id_skips_profiles(self, make_typer):
+        """Test that typing works unprofiled when the app is unknown."""
+        store = ProfileStore()
+        backend = MemoryBackend()
+        make_typer(backend, store=store, app_id=None).type("hello")
+
+        assert store.apps == {}
+        assert backend.typed_text() == "hello"
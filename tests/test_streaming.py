@@ -0,0 +1,124 @@
+"""Tests for streaming module."""
+
+import asyncio
+import time
+
+import pytest
+
+from direct_typer.backends import MemoryBackend
+from direct_typer.streaming import StreamBuffer
+from direct_typer.typer import TypingMethod
+
+
+
+class TestStreamBuffer:
+    """Test releasing streamed text on cluster boundaries."""
+
+    def test_holds_back_last_cluster(self):
+        """Test that the last cluster waits for more text."""
+        buffer = StreamBuffer()
+        buffer.feed("hello")
+        assert buffer.take() == "hell"
+        assert buffer.flush() == "o"
+
+    def test_combining_mark_in_next_token(self):
+        """Test that a base letter is not typed without its accent."""
+        buffer = StreamBuffer()
+        buffer.feed("cafe")
+        assert buffer.take() == "caf"
+        buffer.feed("\u0301!")
+        assert buffer.take() == "e\u0301"
+        assert buffer.flush() == "!"
+
+    def test_flag_split_across_tokens(self):
+        """Test that both halves of a flag are typed together."""
+        buffer = StreamBuffer()
+        buffer.feed("\U0001F1EF")
+        assert buffer.take() == ""
+        buffer.feed("\U0001F1F5")
+        assert buffer.take() == ""
+        assert buffer.flush() == "\U0001F1EF\U0001F1F5"
+
+
+class TestTypeStream:
+    """Test DirectTyper.type_stream."""
+
+    def test_types_before_stream_ends(self, make_typer):
+        """Test that typing starts with the first stable chunk."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        seen_while_streaming = []
+
+        def tokens():
+            yield "音声"
+            yield "入力"
+            seen_while_streaming.append(backend.typed_text())
+            yield "です"
+
+        stats = typer.type_stream(tokens(), method=TypingMethod.CGEVENT)
+
+        assert seen_while_streaming == ["音声入"]
+        assert backend.typed_text() == "音声入力です"
+        assert stats.chars_typed == 6
+        assert stats.time_to_first_char is not None
+        assert stats.time_to_first_char <= stats.elapsed
+
+    def test_empty_stream(self, make_typer):
+        """Test that an empty stream types nothing."""
+        backend = MemoryBackend()
+        stats = make_typer(backend).type_stream(iter([]))
+
+        assert backend.events == []
+        assert stats.chunks == 0
+        assert stats.time_to_first_char is None
+
+    def test_async_stream(self, make_typer):
+        """Test typing from an async iterable."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+
+        async def tokens():
+            for token in ["Use ", "React", "の", "useState\n"]:
+                await asyncio.sleep(0)
+                yield token
+
+        stats = asyncio.run(typer.atype_stream(tokens()))
+
+        assert backend.typed_text() == "Use ReactのuseState\n"
+        assert stats.chars_typed == len("Use ReactのuseState\n")
+
+    def test_clipboard_streams_as_keystrokes(self, make_typer):
+        """Test that short streamed chunks do not each cost a clipboard round-trip."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.paste_settle.current = 0.0
+
+        typer.type_stream(iter(["Hello", " wor", "ld"]), method=TypingMethod.CLIPBOARD)
+
+        assert backend.typed_text() == "Hello world"
+        assert backend.clipboard_changes == 0
+
+    def test_async_stream_error_stops_typing(self, make_typer):
+        """Test that a failing stream stops the chunk in flight before raising."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        post_unicode = backend.post_unicode
+
+        def slow_post(text):
+            post_unicode(text)
+            time.sleep(0.01)
+
+        backend.post_unicode = slow_post
+
+        async def tokens():
+            yield "あいうえおかきくけこさ"
+            await asyncio.sleep(0.03)
+            raise ValueError("stream broke")
+
+        with pytest.raises(ValueError):
+            asyncio.run(typer.atype_stream(tokens(), method=TypingMethod.CGEVENT))
+
+        typed = backend.typed_text()
+        time.sleep(0.05)
+        assert backend.typed_text() == typed
+        assert 0 < len(typed) < 10
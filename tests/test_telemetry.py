@@ -0,0 +1,118 @@
+"""Tests for telemetry module."""
+
+import json
+
+import pytest
+
+from direct_typer.backends import MemoryBackend
+from direct_typer.telemetry import CallRecord, TypingTelemetry
+from direct_typer.typer import DirectTyper, TypingMethod
+
+
+class FailingSink(MemoryBackend):
+    """Event sink whose CGEvent posting fails."""
+
+    def post_unicode(self, text):
+        raise RuntimeError("event dropped")
+
+
+
+class TestTypingTelemetry:
+    """Test counters and export."""
+
+    def test_totals_by_method(self):
+        """Test that records are summed per method."""
+        telemetry = TypingTelemetry()
+        telemetry.record(CallRecord("pynput", 5, 10, 20.0, 15.0, 0.0))
+        telemetry.record(CallRecord("pynput", 3, 6, 10.0, 5.0, 0.0, error="RuntimeError: x"))
+        telemetry.record(CallRecord("clipboard", 100, 4, 50.0, 0.0, 40.0))
+
+        pynput = telemetry.stats()["pynput"]
+        assert (pynput.calls, pynput.errors, pynput.chars, pynput.events) == (2, 1, 8, 16)
+        assert pynput.active_ms == pytest.approx(10.0)
+        assert telemetry.totals().calls == 3
+        assert telemetry.stats()["clipboard"].active_ms == pytest.approx(10.0)
+
+    def test_hook_errors_are_ignored(self):
+        """Test that a failing hook does not stop recording."""
+
+        def hook(record):
+            raise ValueError("broken hook")
+
+        telemetry = TypingTelemetry(hook=hook)
+        telemetry.record(CallRecord("cgevent", 1, 2, 1.0, 0.0, 0.0))
+        assert telemetry.totals().calls == 1
+
+    def test_history_and_json(self, tmp_path):
+        """Test bounded history and the JSON export."""
+        telemetry = TypingTelemetry(history=2)
+        for chars in (1, 2, 3):
+            telemetry.record(CallRecord("cgevent", chars, 2 * chars, 1.0, 0.5, 0.0))
+
+        assert [r.chars for r in telemetry.recent()] == [2, 3]
+        data = json.loads(telemetry.save(tmp_path / "telemetry.json").read_text())
+        assert data["total"]["chars"] == 6
+        assert data["methods"]["cgevent"]["events"] == 12
+        assert data["recent"][-1]["active_ms"] == pytest.approx(0.5)
+
+        telemetry.reset()
+        assert telemetry.totals().calls == 0
+
+
+class TestTyperTelemetry:
+    """Test DirectTyper integration."""
+
+    def test_records_each_call(self, make_typer):
+        """Test that method, characters, and events are reported."""
+        records = []
+        telemetry = TypingTelemetry(hook=records.append)
+        backend = MemoryBackend()
+        typer = make_typer(backend, telemetry=telemetry, delay_ms=0)
+        typer.type("hello")
+        typer.type("日本語")
+
+        assert [(r.method, r.chars, r.events) for r in records] == [
+            ("pynput", 5, 10),
+            ("cgevent", 3, 6),
+        ]
+        assert sum(r.events for r in records) == backend.key_event_count
+
+    def test_sleep_is_metered(self, make_typer):
+        """Test that pacing sleep is separated from active time."""
+        telemetry = TypingTelemetry()
+        typer = make_typer(MemoryBackend(), telemetry=telemetry, delay_ms=2)
+        typer.type("日本語です", TypingMethod.CGEVENT)
+
+        record = telemetry.recent()[0]
+        assert record.sleep_ms > 0
+        assert record.sleep_ms <= record.elapsed_ms
+
+    def test_clipboard_wait(self, make_typer):
+        """Test that clipboard waits and the paste chord are counted."""
+        telemetry = TypingTelemetry()
+        typer = make_typer(MemoryBackend(), telemetry=telemetry, delay_ms=0)
+        typer.type("x" * 300, TypingMethod.CLIPBOARD)
+
+        record = telemetry.recent()[0]
+        assert record.method == "clipboard"
+        assert record.events == 4  # Cmd down, V down, V up, Cmd up
+        assert record.clipboard_wait_ms == pytest.approx(
+            typer.last_clipboard_timing.total_wait * 1000
+        )
+
+    def test_errors_are_recorded_and_raised(self):
+        """Test that a failing call is recorded with its error."""
+        telemetry = TypingTelemetry()
+        backend = MemoryBackend()
+        typer = DirectTyper(
+            delay_ms=0,
+            keyboard=backend,
+            clipboard=backend,
+            event_sink=FailingSink(),
+            telemetry=telemetry,
+        )
+
+        with pytest.raises(RuntimeError):
+            typer.type("日本語")
+        assert telemetry.recent()[0].error == "RuntimeError: event dropped"
+        assert telemetry.stats()["cgevent"].errors == 1
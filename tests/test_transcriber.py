@@ -0,0 +1,41 @@
+"""Tests for transcriber module."""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from direct_typer.recorder import RecordedAudio
+from direct_typer.transcriber import Transcriber
+
+
+class TestTranscribe:
+    """Test uploading audio."""
+
+    @patch("direct_typer.transcriber.Groq")
+    def test_uploads_recording_from_memory(self, mock_groq):
+        """Test that a RecordedAudio is uploaded as an in-memory WAV."""
+        client = MagicMock()
+        client.audio.transcriptions.create.return_value = " こんにちは \n"
+        mock_groq.return_value = client
+        audio = RecordedAudio(np.zeros((1600, 1), dtype=np.int16), sample_rate=16000)
+
+        assert Transcriber(api_key="test").transcribe(audio) == "こんにちは"
+
+        name, content = client.audio.transcriptions.create.call_args.kwargs["file"]
+        assert name == "recording.wav"
+        assert content.read() == audio.header + audio.samples.tobytes()
+
+    @patch("direct_typer.transcriber.Groq")
+    def test_uploads_compressed_bytes(self, mock_groq):
+        """Test that FLAC data encoded while recording is sent instead of WAV."""
+        client = MagicMock()
+        client.audio.transcriptions.create.return_value = "text"
+        mock_groq.return_value = client
+        audio = RecordedAudio(
+            np.zeros((1600, 1), dtype=np.int16), sample_rate=16000, encoded=b"fLaC..."
+        )
+
+        Transcriber(api_key="test").transcribe(audio)
+
+        file = client.audio.transcriptions.create.call_args.kwargs["file"]
+        assert file == ("recording.flac", b"fLaC...")
@@ -4,7 +4,15 @@ import pytest
 from unittest.mock import MagicMock, patch, call
 
 from direct_typer import DirectTyper
-from direct_typer.typer import TypingMethod
+from direct_typer.backends import MemoryBackend
+from direct_typer.typer import (
+    RUN_ASCII,
+    RUN_CONTROL,
+    RUN_UNICODE,
+    TypingMethod,
+    TypingOptions,
+    split_runs,
+)
 
 
 class TestDirectTyperInit:
@@ -23,6 +31,37 @@ class TestDirectTyperInit:
         assert typer.default_method == TypingMethod.CGEVENT
 
 
+class TestAdaptiveMode:
+    """Test adaptive typing rate."""
+
+    def test_learned_rate_disabled_by_default(self):
+        """Test that learned_rate is None without adaptive mode."""
+        typer = DirectTyper()
+        assert typer.learned_rate is None
+
+    @patch("pynput.keyboard.Controller")
+    def test_adaptive_pynput_learns_rate(self, mock_controller_class):
+        """Test that adaptive typing reports a learned rate."""
+        typer = DirectTyper(adaptive=True)
+        typer._rate_controller.max_rate = 100000.0
+        typer._rate_controller.reset()
+        assert typer._rate_controller.rate == 200  # 5 ms default delay
+        typer.type_pynput("a" * 40)
+
+        assert typer.learned_rate is not None
+        assert typer.last_pacing.units == 40
+
+    def test_slower_call_delay_caps_adaptive_rate(self, make_typer):
+        """Test that a longer per-call delay is honoured in adaptive mode."""
+        backend = MemoryBackend()
+        typer = make_typer(backend, delay_ms=5, adaptive=True)
+        typer.type_with_delay("ab", delay_ms=20)
+        assert typer.last_pacing.requested_rate == 50
+
+        typer.type("ab", method=TypingMethod.PYNPUT, options=typer.with_options(delay_ms=1))
+        assert typer.last_pacing.requested_rate == typer._rate_controller.rate
+
+
 class TestSmartType:
     """Test automatic method selection."""
 
@@ -31,14 +70,14 @@ class TestSmartType:
         """Short ASCII text should use pynput."""
         typer = DirectTyper()
         typer.type("Hello")
-        mock_pynput.assert_called_once_with("Hello")
+        mock_pynput.assert_called_once_with("Hello", typer.options)
 
     @patch.object(DirectTyper, "type_cgevent")
     def test_unicode_uses_cgevent(self, mock_cgevent):
         """Unicode text should use CGEvent."""
         typer = DirectTyper()
         typer.type("こんにちは")
-        mock_cgevent.assert_called_once_with("こんにちは")
+        mock_cgevent.assert_called_once_with("こんにちは", typer.options)
 
     @patch.object(DirectTyper, "type_cgevent")
     def test_medium_ascii_uses_cgevent(self, mock_cgevent):
@@ -46,7 +85,7 @@ class TestSmartType:
         typer = DirectTyper()
         text = "a" * 60  # Over ASCII_THRESHOLD
         typer.type(text)
-        mock_cgevent.assert_called_once_with(text)
+        mock_cgevent.assert_called_once_with(text, typer.options)
 
     @patch.object(DirectTyper, "type_clipboard")
     def test_long_text_uses_clipboard(self, mock_clipboard):
@@ -54,7 +93,61 @@ class TestSmartType:
         typer = DirectTyper()
         text = "a" * 250  # Over CGEVENT_THRESHOLD
         typer.type(text)
-        mock_clipboard.assert_called_once_with(text)
+        mock_clipboard.assert_called_once_with(text, options=typer.options)
+
+
+class TestSegmentedTyping:
+    """Test run-splitting hybrid typing."""
+
+    def test_split_runs(self):
+        """Test splitting into ASCII, non-ASCII, and control runs."""
+        runs = split_runs("ReactのuseStateを使う\n")
+        assert runs == [
+            (RUN_ASCII, "React"),
+            (RUN_UNICODE, "の"),
+            (RUN_ASCII, "useState"),
+            (RUN_UNICODE, "を使う"),
+            (RUN_CONTROL, "\n"),
+        ]
+
+    def test_split_runs_keeps_combining_marks(self):
+        """Test that a combining mark keeps its ASCII base in one run."""
+        assert split_runs("ae\u0301") == [(RUN_ASCII, "a"), (RUN_UNICODE, "e\u0301")]
+
+    def test_plan_routes_each_run(self):
+        """Test that short mixed text avoids the clipboard."""
+        typer = DirectTyper(delay_ms=5)
+        plan = typer.plan_segments("ReactのuseStateを使う\n")
+
+        assert plan == [
+            (TypingMethod.PYNPUT, "React"),
+            (TypingMethod.CGEVENT, "の"),
+            (TypingMethod.PYNPUT, "useState"),
+            (TypingMethod.CGEVENT, "を使う\n"),
+        ]
+
+    def test_plan_merges_long_runs_into_one_paste(self):
+        """Test that there is at most one clipboard segment."""
+        typer = DirectTyper(delay_ms=5)
+        long_ascii = "x" * 60  # 300 ms of keystrokes
+        text = "あ" + long_ascii + "の" + long_ascii + "い"
+        plan = typer.plan_segments(text)
+
+        assert plan == [
+            (TypingMethod.CGEVENT, "あ"),
+            (TypingMethod.CLIPBOARD, long_ascii + "の" + long_ascii),
+            (TypingMethod.CGEVENT, "い"),
+        ]
+
+    def test_segmented_types_text(self, make_typer):
+        """Test that segmented typing produces the original text."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        text = "ReactのuseStateを使う\n"
+        typer.type(text, method=TypingMethod.SEGMENTED)
+
+        assert backend.typed_text() == text
+        assert not any(e.kind == "copy" for e in backend.events)
 
 
 class TestMethodSelection:
@@ -65,21 +158,21 @@ class TestMethodSelection:
         """Explicit pynput method should be used."""
         typer = DirectTyper()
         typer.type("test", method=TypingMethod.PYNPUT)
-        mock_pynput.assert_called_once_with("test")
+        mock_pynput.assert_called_once_with("test", typer.options)
 
     @patch.object(DirectTyper, "type_cgevent")
     def test_explicit_cgevent(self, mock_cgevent):
         """Explicit CGEvent method should be used."""
         typer = DirectTyper()
         typer.type("test", method=TypingMethod.CGEVENT)
-        mock_cgevent.assert_called_once_with("test")
+        mock_cgevent.assert_called_once_with("test", typer.options)
 
     @patch.object(DirectTyper, "type_clipboard")
     def test_explicit_clipboard(self, mock_clipboard):
         """Explicit clipboard method should be used."""
         typer = DirectTyper()
         typer.type("test", method=TypingMethod.CLIPBOARD)
-        mock_clipboard.assert_called_once_with("test")
+        mock_clipboard.assert_called_once_with("test", options=typer.options)
 
 
 class TestEmptyInput:
@@ -102,7 +195,7 @@ class TestEmptyInput:
 class TestTypePynput:
     """Test pynput typing method."""
 
-    @patch("direct_typer.typer.Controller")
+    @patch("pynput.keyboard.Controller")
     def test_type_regular_chars(self, mock_controller_class):
         """Test typing regular characters."""
         mock_keyboard = MagicMock()
@@ -115,7 +208,7 @@ class TestTypePynput:
         mock_keyboard.type.assert_any_call("a")
         mock_keyboard.type.assert_any_call("b")
 
-    @patch("direct_typer.typer.Controller")
+    @patch("pynput.keyboard.Controller")
     def test_type_newline(self, mock_controller_class):
         """Test typing newline character."""
         mock_keyboard = MagicMock()
@@ -127,7 +220,7 @@ class TestTypePynput:
         mock_keyboard.press.assert_called()
         mock_keyboard.release.assert_called()
 
-    @patch("direct_typer.typer.Controller")
+    @patch("pynput.keyboard.Controller")
     def test_type_tab(self, mock_controller_class):
         """Test typing tab character."""
         mock_keyboard = MagicMock()
@@ -143,9 +236,10 @@ class TestTypePynput:
 class TestTypeClipboard:
     """Test clipboard typing method."""
 
+    @patch("direct_typer.clipboard.NativePasteboard", side_effect=ImportError)
     @patch("direct_typer.typer.pyperclip")
-    @patch("direct_typer.typer.Controller")
-    def test_clipboard_restore(self, mock_controller_class, mock_pyperclip):
+    @patch("pynput.keyboard.Controller")
+    def test_clipboard_restore(self, mock_controller_class, mock_pyperclip, mock_native):
         """Test clipboard content is restored."""
         mock_keyboard = MagicMock()
         mock_controller_class.return_value = mock_keyboard
@@ -161,9 +255,10 @@ class TestTypeClipboard:
         mock_pyperclip.copy.assert_any_call("new text")
         mock_pyperclip.copy.assert_any_call("original")
 
+    @patch("direct_typer.clipboard.NativePasteboard", side_effect=ImportError)
     @patch("direct_typer.typer.pyperclip")
-    @patch("direct_typer.typer.Controller")
-    def test_clipboard_no_restore(self, mock_controller_class, mock_pyperclip):
+    @patch("pynput.keyboard.Controller")
+    def test_clipboard_no_restore(self, mock_controller_class, mock_pyperclip, mock_native):
         """Test clipboard without restore."""
         mock_keyboard = MagicMock()
         mock_controller_class.return_value = mock_keyboard
@@ -189,6 +284,156 @@ class TestTypeWithDelay:
         assert typer.delay_ms == 5  # Original delay restored
 
 
+class TestTypingOptions:
+    """Test immutable per-call typing options."""
+
+    def test_options_are_frozen(self):
+        """Test that options cannot be changed in place."""
+        options = TypingOptions()
+        with pytest.raises(AttributeError):
+            options.delay_ms = 20
+
+    def test_with_delay_does_not_touch_shared_state(self, make_typer):
+        """Test that type_with_delay passes the delay instead of setting it."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        seen = []
+        original_type = typer.type
+
+        def spy(text, method=None, options=None):
+            seen.append((typer.delay_ms, options.delay_ms))
+            original_type(text, method=method, options=options)
+
+        typer.type = spy
+        typer.type_with_delay("ab", delay_ms=0.5)
+
+        assert seen == [(0, 0.5)]
+        assert backend.typed_text() == "ab"
+
+    def test_injected_sleep_paces_typing(self, make_typer):
+        """Test that pacing sleeps go through the given sleep function."""
+        sleeps = []
+        typer = make_typer(MemoryBackend(), delay_ms=10, sleep=sleeps.append)
+        typer.type("abcd", method=TypingMethod.CGEVENT)
+
+        assert sleeps
+
+    def test_properties_follow_options(self, make_typer):
+        """Test that delay_ms and default_method read and replace options."""
+        typer = make_typer(MemoryBackend())
+        before = typer.options
+        typer.default_method = TypingMethod.CGEVENT
+
+        assert typer.options.method == TypingMethod.CGEVENT
+        assert before.method == TypingMethod.AUTO
+
+    def test_per_call_chunk_size(self, make_typer):
+        """Test that chunk_size limits batched CGEvent chunks."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.type_segmented("日本語の文章", options=typer.with_options(chunk_size=2))
+
+        payloads = [e.value for e in backend.events if e.kind == "key_down"]
+        assert payloads == ["日本", "語の", "文章"]
+
+    def test_cgevent_honors_chunk_size(self, make_typer):
+        """Test that the plain CGEvent method batches when chunk_size is set."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.type("日本語", method=TypingMethod.CGEVENT)
+        chunked = typer.with_options(chunk_size=2)
+        typer.type("日本語", method=TypingMethod.CGEVENT, options=chunked)
+
+        payloads = [e.value for e in backend.events if e.kind == "key_down"]
+        assert payloads == ["日", "本", "語", "日本", "語"]
+
+    def test_per_call_restore_policy(self, make_typer):
+        """Test that restore_clipboard=False leaves the pasted text."""
+        backend = MemoryBackend()
+        backend.copy("original")
+        typer = make_typer(backend)
+        typer.paste_settle.current = 0.0
+        typer.type(
+            "pasted",
+            method=TypingMethod.CLIPBOARD,
+            options=typer.with_options(restore_clipboard=False),
+        )
+
+        assert backend.clipboard == "pasted"
+
+
+class TestRevise:
+    """Test diff-based correction typing."""
+
+    def test_appends_only_new_suffix(self, make_typer):
+        """Test that an extension types just the added text."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.revise("I have a pen")
+        backend.clear()
+
+        assert typer.revise("I have a pencil") == (0, "cil")
+        assert backend.typed_text() == "cil"
+
+    def test_replaces_changed_tail(self, make_typer):
+        """Test that a correction deletes back to the first difference."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.revise("今日は天気がいい")
+        typer.revise("今日は天気が悪い")
+
+        assert backend.typed_text() == "今日は天気が悪い"
+        backspaces = [e for e in backend.events if e.kind == "key_down" and e.value == "backspace"]
+        assert len(backspaces) == 2
+
+    def test_counts_grapheme_clusters(self, make_typer):
+        """Test that one Backspace is sent per cluster, not per code point."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.revise("ok \U0001F44D\U0001F3FD")
+
+        assert typer.revise("ok") == (2, "")
+        assert backend.typed_text() == "ok"
+
+    def test_reset_session(self, make_typer):
+        """Test that a new session does not delete earlier text."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.revise("first")
+        typer.reset_session()
+
+        assert typer.revise("second") == (0, "second")
+
+    def test_revises_text_typed_with_type(self, make_typer):
+        """Test that revise() continues from text typed by type()."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.type("I have a pen")
+
+        assert typer.revise("I have a pencil") == (0, "cil")
+        assert backend.typed_text() == "I have a pencil"
+
+    def test_failed_delete_keeps_session_in_sync(self, make_typer):
+        """Test that only Backspaces actually sent leave the session."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.revise("abcdef")
+        presses = []
+
+        def press(key):
+            if len(presses) == 2:
+                raise RuntimeError("keyboard gone")
+            presses.append(key)
+            MemoryBackend.press(backend, key)
+
+        backend.press = press
+        with pytest.raises(RuntimeError):
+            typer.revise("abc")
+
+        assert typer.session_text == "abcd"
+        assert backend.typed_text() == "abcd"
+
+
 class TestCGEventModule:
     """Test CGEvent module functions."""
 
@@ -201,3 +446,226 @@ class TestCGEventModule:
 
         with pytest.raises(ValueError):
             type_unicode_char("")  # Empty string
+
+    def test_iter_chunks_packs_up_to_limit(self):
+        """Test that plain text is packed into full chunks."""
+        from direct_typer.cgevent import MAX_CHUNK_UTF16, iter_chunks
+
+        text = "あ" * 45
+        chunks = list(iter_chunks(text))
+
+        assert [len(c) for c in chunks] == [MAX_CHUNK_UTF16, MAX_CHUNK_UTF16, 5]
+        assert "".join(chunks) == text
+
+    def test_iter_chunks_separates_special_keys(self):
+        """Test that newline and tab are yielded on their own."""
+        from direct_typer.cgevent import iter_chunks
+
+        chunks = list(iter_chunks("ab\ncd\te"))
+
+        assert chunks == ["ab", "\n", "cd", "\t", "e"]
+
+    def test_iter_chunks_does_not_split_surrogate_pairs(self):
+        """Test that astral characters count as two UTF-16 units."""
+        from direct_typer.cgevent import iter_chunks
+
+        chunks = list(iter_chunks("a" + "\U0001F600" * 3, max_units=4))
+
+        assert chunks == ["a\U0001F600", "\U0001F600\U0001F600"]
+
+    def test_iter_chunks_keeps_grapheme_clusters(self):
+        """Test that emoji sequences are never split across chunks."""
+        from direct_typer.cgevent import iter_chunks
+
+        family = "\U0001F468\u200d\U0001F469\u200d\U0001F467"  # 8 UTF-16 units
+        chunks = list(iter_chunks(family * 3, max_units=20))
+
+        assert chunks == [family * 2, family]
+
+    def test_iter_chunks_crlf_is_one_return(self):
+        """Test that CRLF is sent as a single special key."""
+        from direct_typer.cgevent import iter_chunks
+
+        assert list(iter_chunks("a\r\nb")) == ["a", "\r\n", "b"]
+
+
+class TestGraphemeSegmentation:
+    """Test grapheme cluster segmentation in the CGEvent module."""
+
+    def test_ascii_and_cjk(self):
+        """Test that simple characters are one cluster each."""
+        from direct_typer.cgevent import iter_graphemes
+
+        assert list(iter_graphemes("aあ漢")) == ["a", "あ", "漢"]
+
+    def test_combining_dakuten(self):
+        """Test that a combining voiced sound mark joins its base."""
+        from direct_typer.cgevent import iter_graphemes
+
+        assert list(iter_graphemes("か\u3099き")) == ["か\u3099", "き"]
+
+    def test_emoji_modifier_and_zwj(self):
+        """Test that modifiers and ZWJ sequences stay together."""
+        from direct_typer.cgevent import iter_graphemes
+
+        thumbs = "\U0001F44D\U0001F3FD"
+        family = "\U0001F468\u200d\U0001F469\u200d\U0001F467"
+        assert list(iter_graphemes(thumbs + family)) == [thumbs, family]
+
+    def test_regional_indicator_pairs(self):
+        """Test that flags are split into pairs of regional indicators."""
+        from direct_typer.cgevent import iter_graphemes
+
+        jp = "\U0001F1EF\U0001F1F5"
+        us = "\U0001F1FA\U0001F1F8"
+        assert list(iter_graphemes(jp + us)) == [jp, us]
+
+    def test_type_unicode_char_accepts_cluster(self):
+        """Test that a multi code point cluster is a single character."""
+        from direct_typer.cgevent import type_unicode_char
+
+        sink = MagicMock()
+        type_unicode_char("\U0001F44D\U0001F3FD", sink=sink)
+
+        sink.post_unicode.assert_called_once_with("\U0001F44D\U0001F3FD")
+
+    def test_utf16_len(self):
+        """Test UTF-16 length counts astral characters twice."""
+        from direct_typer.cgevent import _utf16_len
+
+        assert _utf16_len("aあ\U0001F600") == 4
+
+
+class TestTypingContext:
+    """Test reusable CGEvent typing context."""
+
+    @patch.dict("sys.modules", {"Quartz": MagicMock()})
+    def test_unicode_templates_are_reused(self):
+        """Test that posting chunks does not allocate new events."""
+        import sys
+        from direct_typer.cgevent import TypingContext
+
+        quartz = sys.modules["Quartz"]
+        context = TypingContext()
+        context.post_unicode("こんにちは")
+        context.post_unicode("世界")
+
+        quartz.CGEventSourceCreate.assert_called_once()
+        assert quartz.CGEventCreateKeyboardEvent.call_count == 2  # Templates only
+        assert quartz.CGEventKeyboardSetUnicodeString.call_count == 4
+        assert quartz.CGEventPost.call_count == 4
+
+    @patch.dict("sys.modules", {"Quartz": MagicMock()})
+    def test_keycode_events_are_cached(self):
+        """Test that special key events are created once per key code."""
+        import sys
+        from direct_typer.cgevent import SPECIAL_KEYS, TypingContext
+
+        quartz = sys.modules["Quartz"]
+        context = TypingContext()
+        for _ in range(3):
+            context.post_keycode(SPECIAL_KEYS["\n"])
+
+        assert quartz.CGEventCreateKeyboardEvent.call_count == 4  # Templates + Return
+        assert quartz.CGEventPost.call_count == 6
+
+    @patch.dict("sys.modules", {"Quartz": MagicMock()})
+    def test_paste_chord_is_cached(self):
+        """Test that the Cmd+V chord is built once and reused."""
+        import sys
+        from direct_typer.cgevent import TypingContext
+
+        quartz = sys.modules["Quartz"]
+        context = TypingContext()
+        context.post_paste()
+        context.post_paste()
+
+        assert quartz.CGEventCreateKeyboardEvent.call_count == 4
+        assert quartz.CGEventSetFlags.call_count == 2
+        assert quartz.CGEventPost.call_count == 4
+
+    @patch.dict("sys.modules", {"Quartz": MagicMock()})
+    def test_paste_chord_uses_given_keycode(self):
+        """Test that the paste chord is built for the layout's "v" key code."""
+        import sys
+        from direct_typer.cgevent import PASTE_KEYCODE, TypingContext
+
+        quartz = sys.modules["Quartz"]
+        context = TypingContext()
+        context.post_paste(47)
+        context.post_paste()
+
+        keycodes = [c[0][1] for c in quartz.CGEventCreateKeyboardEvent.call_args_list[2:]]
+        assert keycodes == [47, 47, PASTE_KEYCODE, PASTE_KEYCODE]
+
+
+class TestEventTarget:
+    """Test selecting where CGEvents are posted."""
+
+    def test_parse(self):
+        """Test parsing target specifications."""
+        from direct_typer.cgevent import TARGET_PID, TARGET_SESSION, EventTarget
+
+        assert EventTarget.parse("hid") == EventTarget()
+        assert EventTarget.parse("Session") == EventTarget(TARGET_SESSION)
+        assert EventTarget.parse("pid:123") == EventTarget(TARGET_PID, 123)
+
+    def test_invalid_targets(self):
+        """Test that malformed targets are rejected."""
+        from direct_typer.cgevent import TARGET_PID, EventTarget
+
+        with pytest.raises(ValueError):
+            EventTarget.parse("pid:abc")
+        with pytest.raises(ValueError):
+            EventTarget.parse("socket")
+        with pytest.raises(ValueError):
+            EventTarget(TARGET_PID)
+
+    @patch.dict("sys.modules", {"Quartz": MagicMock()})
+    def test_session_tap(self):
+        """Test posting to the session event tap."""
+        import sys
+        from direct_typer.cgevent import TARGET_SESSION, EventTarget, TypingContext
+
+        quartz = sys.modules["Quartz"]
+        context = TypingContext(EventTarget(TARGET_SESSION))
+        context.post_unicode("あ")
+
+        assert quartz.CGEventPost.call_count == 2
+        assert quartz.CGEventPost.call_args[0][0] is quartz.kCGSessionEventTap
+
+    @patch.dict("sys.modules", {"Quartz": MagicMock()})
+    def test_process_target(self):
+        """Test posting straight to a process."""
+        import sys
+        from direct_typer.cgevent import TARGET_PID, EventTarget, TypingContext
+
+        quartz = sys.modules["Quartz"]
+        context = TypingContext(EventTarget(TARGET_PID, 4242))
+        context.post_unicode("あ")
+        context.post_paste()
+
+        quartz.CGEventPost.assert_not_called()
+        assert quartz.CGEventPostToPid.call_count == 4
+        assert all(c[0][0] == 4242 for c in quartz.CGEventPostToPid.call_args_list)
+
+    @patch.dict("sys.modules", {"Quartz": MagicMock()})
+    def test_typer_uses_target_context(self):
+        """Test that DirectTyper posts through the context for its target."""
+        import sys
+        from direct_typer import cgevent
+        from direct_typer.cgevent import TARGET_PID, EventTarget
+
+        quartz = sys.modules["Quartz"]
+        backend = MemoryBackend()
+        typer = DirectTyper(
+            delay_ms=0,
+            keyboard=backend,
+            clipboard=backend,
+            event_target=EventTarget(TARGET_PID, 99),
+        )
+        with patch.dict(cgevent._contexts, clear=True):
+            typer.type_cgevent("日本語")
+
+        assert quartz.CGEventPostToPid.call_count == 6  # One pair per character
+        quartz.CGEventPost.assert_not_called()
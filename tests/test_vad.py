@@ -0,0 +1,128 @@
+"""Tests for vad module."""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from direct_typer.recorder import AudioRecorder, RecordingConfig
+from direct_typer.vad import VadConfig, first_speech_frame, frame_activity, trim_silence
+from tests.test_flac import decode
+
+RATE = 16000
+
+
+def silence(seconds, level=30, seed=0):
+    """Create quiet background noise."""
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, level, (int(seconds * RATE), 1)).astype(np.int16)
+
+
+def voice(seconds, amplitude=6000):
+    """Create a loud voiced tone."""
+    t = np.arange(int(seconds * RATE))[:, None] / RATE
+    return (amplitude * np.sin(2 * np.pi * 200 * t)).astype(np.int16)
+
+
+def fricative(seconds, level=300, seed=1):
+    """Create weak broadband noise like an "s" sound."""
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, level, (int(seconds * RATE), 1)).astype(np.int16)
+
+
+class TestFrameActivity:
+    """Test per-frame speech decisions."""
+
+    def test_energy_and_zero_crossings(self):
+        """Test that loud frames and weak high-ZCR frames count as speech."""
+        audio = np.concatenate([silence(0.1), voice(0.1), fricative(0.1)])
+        active = frame_activity(audio, RATE, VadConfig())
+
+        assert active.tolist() == [False] * 5 + [True] * 10
+
+    def test_partial_last_frame(self):
+        """Test that trailing samples form their own frame."""
+        audio = np.concatenate([silence(0.02), voice(0.005)])
+        assert frame_activity(audio, RATE, VadConfig()).tolist() == [False, True]
+
+
+class TestTrimSilence:
+    """Test trimming and pause shortening."""
+
+    def test_trims_leading_and_trailing_silence(self):
+        """Test that only the speech and its padding remain, as a view."""
+        audio = np.concatenate([silence(1.0), voice(0.5), silence(1.5)])
+        result = trim_silence(audio, RATE, VadConfig(padding_ms=100))
+
+        assert result.has_speech
+        assert (result.start, result.end) == (int(0.9 * RATE), int(1.6 * RATE))
+        assert np.shares_memory(result.samples, audio)
+        assert result.removed_ratio == pytest.approx(1 - 0.7 / 3.0)
+
+    def test_no_speech(self):
+        """Test that background noise alone is reported as silence."""
+        result = trim_silence(silence(2.0), RATE)
+
+        assert not result.has_speech
+        assert len(result.samples) == 0
+        assert result.removed_ratio == 1.0
+
+    def test_shortens_long_pauses(self):
+        """Test that internal pauses are cut down to max_pause_ms."""
+        audio = np.concatenate([voice(0.2), silence(2.0), voice(0.2), silence(0.2), voice(0.2)])
+        config = VadConfig(padding_ms=0, max_pause_ms=400)
+        result = trim_silence(audio, RATE, config)
+
+        assert not result.contiguous
+        # 2.0 s pause -> 0.4 s; the 0.2 s pause is kept
+        assert len(result.samples) == int(1.2 * RATE)
+        assert np.array_equal(result.samples[: int(0.2 * RATE)], audio[: int(0.2 * RATE)])
+        assert np.array_equal(result.samples[-int(0.6 * RATE) :], audio[-int(0.6 * RATE) :])
+
+    def test_first_speech_frame(self):
+        """Test incremental detection of where speech starts."""
+        audio = np.concatenate([silence(0.5), voice(0.1)])
+        assert first_speech_frame(audio, RATE, VadConfig()) == 25
+        assert first_speech_frame(silence(0.5), RATE, VadConfig()) is None
+
+
+class TestRecorderVad:
+    """Test VAD in AudioRecorder.stop."""
+
+    def record(self, config, audio, block=1600, encode_every=1):
+        """Feed audio through the stream callback, encoding as the thread would."""
+        recorder = AudioRecorder(config)
+        recorder.ENCODE_INTERVAL = 3600
+        with patch("direct_typer.recorder.sd") as sd:
+            recorder.start()
+            callback = sd.InputStream.call_args.kwargs["callback"]
+            for index, offset in enumerate(range(0, len(audio), block)):
+                callback(audio[offset : offset + block], block, {}, None)
+                if index % encode_every == 0:
+                    recorder._encode_pending()
+            return recorder.stop()
+
+    def test_trimmed_flac_matches_samples(self):
+        """Test that the incrementally encoded upload holds exactly the kept audio."""
+        audio = np.concatenate([silence(1.0), voice(1.0), silence(1.5)])
+        result = self.record(RecordingConfig(vad=VadConfig()), audio)
+
+        assert result.has_speech
+        assert result.removed_ratio > 0.5
+        assert np.array_equal(decode(result.encoded)[1], result.samples)
+
+    def test_silent_recording(self):
+        """Test that a silent recording is flagged and not encoded."""
+        result = self.record(RecordingConfig(vad=VadConfig()), silence(1.0))
+
+        assert not result.has_speech
+        assert result.encoded is None
+
+    def test_shortened_pauses_are_reencoded(self):
+        """Test the payload when internal pauses were cut."""
+        audio = np.concatenate([voice(0.5), silence(2.0), voice(0.5)])
+        config = RecordingConfig(vad=VadConfig(max_pause_ms=300))
+        result = self.record(config, audio)
+
+        assert len(result.samples) < len(audio)
+        assert np.array_equal(decode(result.encoded)[1], result.samples)
@@ -0,0 +1,195 @@
+"""Tests for worker module."""
+
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from direct_typer.backends import MemoryBackend
+from direct_typer.clipboard import PasteSettle
+from direct_typer.typer import TypingMethod
+from direct_typer.worker import TypingWorker
+
+
+class BlockingTyper:
+    """Typer stand-in that records calls and can be held on the first one."""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def type(self, text, method=None, options=None, cancel=None):
+        self.calls.append((text, method))
+        self.started.set()
+        self.release.wait(5)
+        if cancel is not None and cancel():
+            raise CancelledError()
+
+
+class GateTyper(BlockingTyper):
+    """Typer stand-in that holds every call until the gate is opened once for it."""
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Semaphore(0)
+        self.gate = threading.Semaphore(0)
+
+    def type(self, text, method=None, options=None, cancel=None):
+        self.calls.append((text, method))
+        self.entered.release()
+        self.gate.acquire(timeout=5)
+        if cancel is not None and cancel():
+            raise CancelledError()
+
+
+class TestTypingWorker:
+    """Test queued background typing."""
+
+    def test_types_on_worker_thread(self, make_typer):
+        """Test that a job is typed and its future resolves."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        worker = TypingWorker(typer)
+
+        job = worker.submit("音声入力", method=TypingMethod.CGEVENT)
+
+        assert job.result(timeout=5) == 4
+        assert backend.typed_text() == "音声入力"
+        worker.shutdown()
+
+    def test_merges_queued_jobs(self):
+        """Test that jobs queued behind a running one are typed together."""
+        typer = BlockingTyper()
+        typer.release.clear()
+        worker = TypingWorker(typer)
+
+        first = worker.submit("one")
+        typer.started.wait(5)
+        second = worker.submit(" two")
+        third = worker.submit(" three")
+        typer.release.set()
+
+        assert [job.result(timeout=5) for job in (first, second, third)] == [3, 4, 6]
+        assert typer.calls == [("one", None), (" two three", None)]
+        worker.shutdown()
+
+    def test_does_not_merge_different_methods(self):
+        """Test that jobs with different methods stay separate."""
+        typer = BlockingTyper()
+        typer.release.clear()
+        worker = TypingWorker(typer)
+
+        worker.submit("a")
+        typer.started.wait(5)
+        worker.submit("b", method=TypingMethod.PYNPUT)
+        last = worker.submit("c", method=TypingMethod.CLIPBOARD)
+        typer.release.set()
+        last.result(timeout=5)
+
+        assert [text for text, _ in typer.calls] == ["a", "b", "c"]
+        worker.shutdown()
+
+    def test_cancel_queued_job(self):
+        """Test that a cancelled queued job is never typed."""
+        typer = BlockingTyper()
+        typer.release.clear()
+        worker = TypingWorker(typer)
+
+        worker.submit("first")
+        typer.started.wait(5)
+        cancelled = worker.submit("second")
+        assert cancelled.cancel() is True
+        typer.release.set()
+        worker.shutdown()
+
+        assert [text for text, _ in typer.calls] == ["first"]
+        with pytest.raises(CancelledError):
+            cancelled.result(timeout=5)
+
+    def test_long_clipboard_job_is_one_round_trip(self, make_typer):
+        """Test that long text is pasted with a single clipboard round-trip."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        typer.paste_settle = PasteSettle(initial=0.0, minimum=0.0)
+        worker = TypingWorker(typer)
+
+        job = worker.submit("a" * 500, method=TypingMethod.CLIPBOARD)
+
+        assert job.result(timeout=5) == 500
+        assert backend.typed_text() == "a" * 500
+        assert backend.clipboard_changes == 2  # Copy and restore
+        worker.shutdown()
+
+    def test_cancel_running_job_at_next_keystroke(self, make_typer):
+        """Test that a running job stops before its next keystroke."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+        worker = TypingWorker(typer)
+        posted = threading.Event()
+        proceed = threading.Event()
+        post_unicode = backend.post_unicode
+
+        def slow_post(text):
+            post_unicode(text)
+            posted.set()
+            proceed.wait(5)
+
+        backend.post_unicode = slow_post
+        job = worker.submit("abcdef", method=TypingMethod.CGEVENT)
+        posted.wait(5)
+        job.cancel()
+        proceed.set()
+
+        with pytest.raises(CancelledError):
+            job.result(timeout=5)
+        worker.shutdown()
+        assert backend.typed_text() == "a"
+
+    def test_cancel_merged_job_needs_every_job(self):
+        """Test that cancelling one of several merged jobs reports that typing goes on."""
+        typer = GateTyper()
+        worker = TypingWorker(typer)
+
+        first = worker.submit("one")
+        typer.entered.acquire(timeout=5)
+        second = worker.submit(" two")
+        third = worker.submit(" three")
+        typer.gate.release()
+        typer.entered.acquire(timeout=5)
+
+        assert second.cancel() is False
+        assert third.cancel() is True
+        typer.gate.release()
+
+        assert first.result(timeout=5) == 3
+        for job in (second, third):
+            with pytest.raises(CancelledError):
+                job.result(timeout=5)
+        worker.shutdown()
+
+    def test_cancel_after_last_keystroke_keeps_result(self, make_typer):
+        """Test that text typed completely is not reported as cancelled."""
+        backend = MemoryBackend()
+        typer = make_typer(backend)
+
+        typer.type("ab", method=TypingMethod.CGEVENT, cancel=lambda: len(backend.events) >= 4)
+        assert backend.typed_text() == "ab"
+        with pytest.raises(CancelledError):
+            typer.type("cd", method=TypingMethod.CGEVENT, cancel=lambda: len(backend.events) >= 6)
+        assert backend.typed_text() == "abc"
+
+    def test_typing_error_fails_job(self):
+        """Test that a typing exception is set on the job's future."""
+
+        class FailingTyper:
+            def type(self, text, method=None, options=None, cancel=None):
+                raise RuntimeError("no event source")
+
+        worker = TypingWorker(FailingTyper())
+        job = worker.submit("text")
+
+        with pytest.raises(RuntimeError):
+            job.result(timeout=5)
+        worker.shutdown()